@@ -0,0 +1,67 @@
+"""
+Compares reading a tab delimited report through a text mode csv.reader, skipping the chunks that raise
+UnicodeDecodeError, against the memory-mapped iter_delimited_rows, on a clean file and on one with a bad line every
+thousand lines.
+
+Run from the repository root:
+    python -m benchmarks.bench_delimited_reader 1000000
+"""
+import csv
+import os
+import sys
+import tempfile
+import timeit
+import typing
+
+from delimited_reader import iter_delimited_rows
+
+DEFAULT_SIZES = [1_000_000]
+# A bad line every this many lines in the dirty file
+BAD_LINE_INTERVAL = 1000
+
+
+def text_rows(file_path: str) -> typing.List[typing.List[str]]:
+    rows = []
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f, delimiter='\t')
+        while True:
+            try:
+                rows.append(next(reader))
+            except UnicodeDecodeError:
+                continue
+            except StopIteration:
+                return rows
+
+
+def mapped_rows(file_path: str) -> typing.List[typing.List[str]]:
+    return list(iter_delimited_rows(file_path))
+
+
+def write_report(file_path: str, size: int, dirty: bool):
+    with open(file_path, 'wb') as f:
+        f.write(b'SKU\tMARKETPLACE_ID\tCOST\tBUY_BOX_PRICE\n')
+        for i in range(size):
+            sku = b'sku-\xff%d' % i if dirty and i % BAD_LINE_INTERVAL == 0 else b'sku-%d' % i
+            f.write(sku + b'\t1\t%d.50\t%d.99\n' % (i % 100, i % 200))
+
+
+def bench(function: typing.Callable[[str], list], file_path: str) -> typing.Tuple[float, int]:
+    seconds = min(timeit.repeat(lambda: function(file_path), number=1, repeat=3))
+    return seconds, len(function(file_path))
+
+
+def main(sizes: typing.List[int]):
+    print(f'{"lines":>10} {"file":>6} {"text (s)":>9} {"rows":>9} {"mmap (s)":>9} {"rows":>9}')
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            for dirty in (False, True):
+                file_path = os.path.join(directory, 'informed_csv.txt')
+                write_report(file_path, size, dirty)
+                text_seconds, text_count = bench(text_rows, file_path)
+                mapped_seconds, mapped_count = bench(mapped_rows, file_path)
+                print(f'{size:>10} {"dirty" if dirty else "clean":>6} {text_seconds:>9.3f} {text_count:>9} '
+                      f'{mapped_seconds:>9.3f} {mapped_count:>9}')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,51 @@
+"""
+Compares the per-row cost of reading mapped fields with the old get_cell, which normalized every key of the row on
+every call, against the compiled column plan.
+
+Run from the repository root:
+    python -m benchmarks.bench_get_cell 100000
+"""
+import sys
+import time
+import typing
+
+from cell_mapping import OUTPUT_MAPPED_CELLS
+from processors import get_cell
+from utils import generate_mapped_cell_dict, lower_clean_cell_value
+
+DEFAULT_ROWS = 100_000
+
+
+def legacy_get_cell(row: dict, column_name: str) -> typing.Optional[str]:
+    """get_cell as it was before the column plan"""
+    for cell in row:
+        if lower_clean_cell_value(cell) == lower_clean_cell_value(column_name):
+            return row[cell]
+
+
+def read_row(row: dict, read_cell: typing.Callable[[dict, str], typing.Optional[str]]):
+    """Reads every field validate_row and the processors read for one output row"""
+    for cell in OUTPUT_MAPPED_CELLS:
+        if cell.get('validator'):
+            read_cell(row, cell['column_name'])
+    for column_name in ('Total Units', 'Units Sold Last 30 Days', 'BUY_BOX_PRICE', 'MIN_PRICE', 'MAX_PRICE'):
+        read_cell(row, column_name)
+
+
+def bench(rows: typing.List[dict], read_cell: typing.Callable[[dict, str], typing.Optional[str]]) -> float:
+    start = time.perf_counter()
+    for row in rows:
+        read_row(row, read_cell)
+    return time.perf_counter() - start
+
+
+def main(row_count: int):
+    template = generate_mapped_cell_dict()
+    rows = [dict(template, **{'Merchant SKU': f'SKU-{i}', 'Total Units': str(i)}) for i in range(row_count)]
+    for name, read_cell in (('legacy get_cell', legacy_get_cell), ('column plan', get_cell)):
+        seconds = bench(rows, read_cell)
+        print(f'{name:>16}: {seconds:.3f}s total, {seconds / row_count * 1e6:.2f}us/row')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS)
@@ -0,0 +1,86 @@
+"""
+Compares the per-row cost of mapping, validating and processing output rows by searching OUTPUT_MAPPED_CELLS, the
+way processors used to, against the compiled MappingPlan.
+
+Run from the repository root:
+    python -m benchmarks.bench_mapping_plan 100000
+"""
+import contextlib
+import sys
+import time
+import typing
+
+from openpyxl import Workbook
+from openpyxl.cell import Cell
+
+from cell_mapping import OUTPUT_MAPPED_CELLS
+from mapping_plan import get_mapping_plan
+from processors import get_cell
+
+DEFAULT_ROWS = 100_000
+FILE_ROW_KEYS = {'restock_report': 'restock_row', 'inventory_file': 'inventory_row', 'informed_csv': 'informed_row'}
+
+
+def legacy_run_row(row_data: dict, cells: typing.List[Cell]):
+    """map_row, validate_row and process_row as they were before the mapping plan"""
+    mapped_row = {cell['column_name']: '' for cell in OUTPUT_MAPPED_CELLS}
+    for cell in OUTPUT_MAPPED_CELLS:
+        file_name = cell.get('file_name')
+        if file_name is None:
+            continue
+        with contextlib.suppress(KeyError):
+            mapped_row[cell['column_name']] = row_data[FILE_ROW_KEYS[file_name]][cell['original_column_name']]
+    for cell in OUTPUT_MAPPED_CELLS:
+        if validator := cell.get('validator'):
+            if value := get_cell(mapped_row, cell['column_name']):
+                validator(value)
+    headers = list(mapped_row)
+    for position, output_cell in enumerate(cells):
+        for mapped_cell in [mapped_cell for mapped_cell in OUTPUT_MAPPED_CELLS if
+                            mapped_cell['column_name'] == headers[position]]:
+            if processor := mapped_cell.get('processor'):
+                processor(mapped_row, output_cell)
+                break
+
+
+def plan_run_row(row_data: dict, cells: typing.List[Cell]):
+    plan = get_mapping_plan()
+    mapped_row = plan.map_row(row_data)
+    plan.validate_row(mapped_row)
+    plan.process_cells(mapped_row, cells)
+
+
+def generate_row_data(row_count: int) -> typing.List[dict]:
+    return [
+        {
+            'restock_row': {'Merchant SKU': f'SKU-{i}', 'ASIN': f'B{i:09d}', 'Product Name': 'Product',
+                            'Units Sold Last 30 Days': str(i % 30), 'Total Units': str(i % 90)},
+            'inventory_row': {'Part Number': f'P{i}', 'Primary Supplier': 'Supplier', 'Classification': 'A',
+                              'Quantity Available': str(i % 7)},
+            'informed_row': {'CURRENT_VELOCITY': '0.5', 'COST': '1.5', 'MIN_PRICE': '5', 'CURRENT_PRICE': '7',
+                             'BUY_BOX_PRICE': str(4 + i % 6), 'MAX_PRICE': '8'},
+        }
+        for i in range(row_count)
+    ]
+
+
+def bench(rows: typing.List[dict], run_row: typing.Callable) -> float:
+    column_count = len(get_mapping_plan().column_names)
+    # Real cells of a write-only sheet, the processors style them in its workbook
+    worksheet = Workbook(write_only=True).create_sheet()
+    start = time.perf_counter()
+    for row_idx, row_data in enumerate(rows, start=1):
+        cells = [Cell(worksheet, row=row_idx, column=col_idx, value='') for col_idx in range(1, column_count + 1)]
+        run_row(row_data, cells)
+    return time.perf_counter() - start
+
+
+def main(row_count: int):
+    rows = generate_row_data(row_count)
+    for name, run_row in (('legacy search', legacy_run_row), ('mapping plan', plan_run_row)):
+        seconds = bench(rows, run_row)
+        print(f'{name:>14}: {seconds:.3f}s total, {seconds / row_count * 1e6:.2f}us/row')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS)
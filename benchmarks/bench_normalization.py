@@ -0,0 +1,37 @@
+"""
+Compares normalizing SKUs through the chained sanitize_names, clean_value and lower calls against the fused
+normalize_sku, and normalizing the same header names with and without memoization.
+
+Run from the repository root:
+    python -m benchmarks.bench_normalization 1000000
+"""
+import sys
+import timeit
+import typing
+
+from normalization import normalize_key, normalize_sku, sanitize_cell_value
+
+DEFAULT_SIZES = [1_000_000]
+HEADERS = ['\xa0Merchant SKU', 'Total\xa0Units', 'Units Sold Last 30 Days\xa0', 'MARKETPLACE_ID', 'COST', 'MIN_PRICE']
+
+
+def chained(value: typing.Any) -> str:
+    return sanitize_cell_value(value).lower()
+
+
+def bench(function: typing.Callable[[typing.Any], str], values: typing.List[typing.Any]) -> float:
+    return min(timeit.repeat(lambda: [function(value) for value in values], number=1, repeat=3))
+
+
+def main(sizes: typing.List[int]):
+    print(f'{"values":>10} {"chained sku (s)":>16} {"fused sku (s)":>14} {"chained key (s)":>16} {"memo key (s)":>13}')
+    for size in sizes:
+        skus = [f'SKU-{i}' if i % 17 else f' sku-{i}\xa0' for i in range(size)]
+        headers = [HEADERS[i % len(HEADERS)] for i in range(size)]
+        assert [normalize_sku(sku) for sku in skus] == [chained(sku) for sku in skus]
+        print(f'{size:>10} {bench(chained, skus):>16.3f} {bench(normalize_sku, skus):>14.3f} '
+              f'{bench(chained, headers):>16.3f} {bench(normalize_key, headers):>13.3f}')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,190 @@
+"""
+Times every stage of a whole run, from reading the reports to saving the output workbook, on synthetic reports and
+keeps the results in a history file so slower stages stand out against the previous run of the same size.
+
+Every size runs in its own process in a temporary directory, so the peak memory of one size does not carry over to the
+next. The stages are the ones instrumentation records for main.py's run report.
+
+Run from the repository root:
+    python -m benchmarks.bench_pipeline 10000 100000 --format xlsx tsv --marketplaces 3
+    python -m benchmarks.bench_pipeline 1000000 --format tsv --stream --fail-on-regression
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+from datetime import datetime
+
+import instrumentation
+from benchmarks.synthetic_reports import FILE_FORMATS, generate_reports
+
+DEFAULT_SIZES = [10_000, 100_000]
+# Ignored by git, give --history or set BENCH_HISTORY_FILE to keep the results somewhere else
+DEFAULT_HISTORY_FILE = os.environ.get('BENCH_HISTORY_FILE') or \
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.jsonl')
+# A stage is reported as a regression once it is this much slower than the previous run of the same benchmark
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+# Stages faster than this are too noisy to compare
+MIN_COMPARED_SECONDS = 0.05
+
+
+class Benchmark(typing.NamedTuple):
+    """One size and shape of the synthetic reports"""
+    sku_count: int
+    file_format: str
+    marketplaces: int
+    stream: bool
+
+    @property
+    def key(self) -> str:
+        mode = 'stream' if self.stream else 'batch'
+        return f'{self.sku_count}-{self.file_format}-{self.marketplaces}mp-{mode}'
+
+
+def _git_commit() -> typing.Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(benchmark: Benchmark) -> dict:
+    """
+    Generates the reports of a benchmark and runs them through the pipeline main.py runs
+    :param benchmark: The benchmark
+    :return: The run report of the recorder, with the seconds it took to generate the reports
+    """
+    # Imported here so the workers of the process pool import the tree they time
+    from common import read_files, find_skus, process_rows, create_output_workbook, run_streaming_pipeline
+
+    market_place_ids = [str(i + 1) for i in range(benchmark.marketplaces)]
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        generate_reports(directory, benchmark.sku_count, file_format=benchmark.file_format,
+                         marketplaces=market_place_ids)
+        generate_seconds = time.perf_counter() - start
+        # The reports are read from ./files and the output is saved to the working directory
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            recorder = instrumentation.RunRecorder()
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()), \
+                    instrumentation.recording(recorder):
+                if benchmark.stream:
+                    run_streaming_pipeline(market_place_id=market_place_ids[0])
+                else:
+                    files = read_files()
+                    matched_row_data = find_skus(*files, market_place_id=market_place_ids[0])
+                    output_mapping = process_rows(matched_row_data, workers=os.cpu_count() or 1)
+                    create_output_workbook(output_mapping, streaming=True)
+        finally:
+            os.chdir(cwd)
+    run_report = recorder.as_dict()
+    run_report['generate_seconds'] = round(generate_seconds, 6)
+    return run_report
+
+
+def load_history(file_path: str) -> typing.List[dict]:
+    """
+    Loads the results of the previous benchmark runs
+    :param file_path: The path of the history file
+    :return: The results, oldest first
+    """
+    if not os.path.exists(file_path):
+        return []
+    with open(file_path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(file_path: str, result: dict) -> typing.NoReturn:
+    """
+    Appends a result to the history file, one JSON object per line
+    :param file_path: The path of the history file
+    :param result: The result to append
+    :return: None
+    """
+    with open(file_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(result) + '\n')
+
+
+def previous_result(history: typing.List[dict], benchmark: Benchmark) -> typing.Optional[dict]:
+    for result in reversed(history):
+        if result['benchmark'] == benchmark.key:
+            return result
+    return None
+
+
+def compare(result: dict, previous: typing.Optional[dict],
+            threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> typing.List[str]:
+    """
+    Prints the stages of a result next to the previous run of the same benchmark
+    :param result: The result of this run
+    :param previous: The result of the previous run, None when this is the first
+    :param threshold: How much slower a stage can get before it is a regression
+    :return: The names of the stages that regressed
+    """
+    previous_stages = {stage['name']: stage for stage in previous['stages']} if previous else {}
+    regressions = []
+    print(f'  {"stage":<32} {"seconds":>9} {"rows/s":>11} {"previous":>9} {"change":>8}')
+    for stage in result['stages']:
+        line = f'  {stage["name"]:<32} {stage["seconds"]:>9.3f} {stage["rows_per_second"] or 0:>11.0f}'
+        before = previous_stages.get(stage['name'])
+        if before is not None and before['seconds'] > 0:
+            change = stage['seconds'] / before['seconds'] - 1
+            line += f' {before["seconds"]:>9.3f} {change:>+7.0%}'
+            if change > threshold and stage['seconds'] >= MIN_COMPARED_SECONDS:
+                regressions.append(stage['name'])
+                line += '  REGRESSION'
+        print(line)
+    return regressions
+
+
+def main(benchmarks: typing.List[Benchmark], history_file: str, threshold: float) -> int:
+    history = load_history(history_file)
+    commit = _git_commit()
+    regressions = []
+    for benchmark in benchmarks:
+        print(f'{benchmark.key}')
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            run_report = executor.submit(run_benchmark, benchmark).result()
+        result = {
+            'benchmark': benchmark.key,
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'commit': commit,
+            'python': platform.python_version(),
+            **benchmark._asdict(),
+            **run_report,
+        }
+        print(f'  generated in {result["generate_seconds"]:.1f}s, ran in {result["seconds"]:.3f}s, '
+              f'peak RSS {(result["peak_rss_bytes"] or 0) / 2 ** 20:.0f} MiB')
+        regressions += [f'{benchmark.key} {name}' for name in
+                        compare(result, previous_result(history, benchmark), threshold)]
+        append_history(history_file, result)
+    if regressions:
+        print('Regressions:\n  ' + '\n  '.join(regressions))
+    return len(regressions)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('sizes', type=int, nargs='*', default=DEFAULT_SIZES, help='Numbers of SKUs')
+    parser.add_argument('--format', choices=FILE_FORMATS, nargs='+', default=['xlsx'], dest='file_formats')
+    parser.add_argument('--marketplaces', type=int, default=2)
+    parser.add_argument('--stream', action='store_true', help='Time the streaming pipeline instead')
+    parser.add_argument('--history', default=DEFAULT_HISTORY_FILE, help='The JSON lines file results are kept in')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with 1 when a stage regressed')
+    args = parser.parse_args()
+    regressed = main([Benchmark(size, file_format, args.marketplaces, args.stream)
+                      for size in args.sizes for file_format in args.file_formats],
+                     args.history, args.threshold)
+    sys.exit(1 if regressed and args.fail_on_regression else 0)
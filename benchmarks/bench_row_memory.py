@@ -0,0 +1,53 @@
+"""
+Compares the memory used by a report read as a list of row dictionaries against a ReportTable.
+
+Run from the repository root:
+    python -m benchmarks.bench_row_memory 500000 40
+"""
+import sys
+import tracemalloc
+import typing
+
+from report_table import ReportTable
+
+DEFAULT_ROWS = 500_000
+DEFAULT_COLUMNS = 40
+
+
+def generate_values(row_count: int, column_count: int) -> typing.Iterator[typing.List[str]]:
+    for i in range(row_count):
+        yield [f'{i}-{column}' for column in range(column_count)]
+
+
+def measure(build: typing.Callable[[], typing.Any]) -> int:
+    """
+    Measures the memory held by what build returns
+    :param build: Builds the rows
+    :return: The bytes allocated and still held
+    """
+    tracemalloc.start()
+    rows = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return current
+
+
+def main(row_count: int, column_count: int):
+    header = [f'Column {column}' for column in range(column_count)]
+    builds = (
+        ('dicts', lambda: [dict(zip(header, values)) for values in generate_values(row_count, column_count)]),
+        ('ReportTable', lambda: ReportTable(header, generate_values(row_count, column_count))),
+    )
+    # The value strings are the same for both, leave them out to show what the rows themselves cost
+    value_bytes = sum(sys.getsizeof(value) for values in generate_values(row_count, column_count) for value in values)
+    for name, build in builds:
+        total_bytes = measure(build)
+        row_bytes = total_bytes - value_bytes
+        print(f'{name:>12}: {total_bytes / 2 ** 20:8.1f} MiB total, {row_bytes / row_count:8.1f} bytes/row '
+              'without the values')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS,
+         int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_COLUMNS)
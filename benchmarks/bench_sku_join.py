@@ -0,0 +1,59 @@
+"""
+Times building the SKU indexes and joining them at increasing catalog sizes.
+
+Run from the repository root:
+    python -m benchmarks.bench_sku_join 10000 100000 1000000
+"""
+import gc
+import sys
+import time
+import typing
+
+from sku_index import SkuIndex, join_sku_indexes
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def generate_reports(sku_count: int) -> typing.Tuple[typing.List[dict], typing.List[dict], typing.List[dict]]:
+    """
+    Generates a restock report, inventory file and informed csv sharing sku_count skus
+    :param sku_count: The number of skus in the restock report
+    :return: tuple of the three reports
+    """
+    restock_report = [{'Merchant SKU': f'SKU-{i}', 'FNSKU': f'X{i:09d}', 'Total Units': str(i % 50)}
+                      for i in range(sku_count)]
+    inventory_file = [{'SKU': f'sku-{i}', 'Quantity Available': str(i % 7)} for i in range(0, sku_count, 2)]
+    informed_csv = [{'SKU': f' SKU-{i} ', 'MARKETPLACE_ID': str(i % 3), 'COST': '1.00'} for i in range(sku_count)]
+    return restock_report, inventory_file, informed_csv
+
+
+def bench(sku_count: int) -> typing.Tuple[float, float]:
+    """
+    Times indexing and joining the reports
+    :param sku_count: The number of skus
+    :return: index seconds and join seconds
+    """
+    restock_report, inventory_file, informed_csv = generate_reports(sku_count)
+    skus = [row['Merchant SKU'] for row in restock_report]
+    # Like timeit, keep the cyclic garbage collector from skewing the larger runs
+    gc.disable()
+    start = time.perf_counter()
+    indexes = SkuIndex(restock_report), SkuIndex(inventory_file), SkuIndex(informed_csv)
+    indexed = time.perf_counter()
+    matched_row_data = join_sku_indexes(skus, *indexes, market_place_id='1')
+    joined = time.perf_counter()
+    gc.enable()
+    assert len(matched_row_data) == sku_count
+    return indexed - start, joined - indexed
+
+
+def main(sizes: typing.List[int]):
+    print(f'{"skus":>10} {"index (s)":>10} {"join (s)":>10} {"us/sku":>8}')
+    for sku_count in sizes:
+        index_seconds, join_seconds = bench(sku_count)
+        per_sku = (index_seconds + join_seconds) / sku_count * 1e6
+        print(f'{sku_count:>10} {index_seconds:>10.3f} {join_seconds:>10.3f} {per_sku:>8.2f}')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,66 @@
+"""
+Compares reading a large Seller Central style xlsx export through openpyxl's read-only worksheet against the
+XlsxSheetReader fast path, both into the ReportTable read_files uses.
+
+Run from the repository root:
+    python -m benchmarks.bench_xlsx_reader 100000 250000
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import typing
+import unittest.mock
+
+from openpyxl import Workbook
+
+import utils
+
+DEFAULT_SIZES = [100_000]
+HEADER = ['Country', 'Product Name', 'FNSKU', 'Merchant\xa0SKU', 'ASIN', 'Condition', 'Supplier', 'Price',
+          'Units Sold Last 30 Days', 'Total Units', 'Inbound', 'Available', 'Recommended replenishment qty']
+
+
+def generate_report(file_path: str, row_count: int) -> typing.NoReturn:
+    """
+    Writes a restock report shaped xlsx file
+    :param file_path: The path to write to
+    :param row_count: The number of rows below the header
+    :return: None
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(HEADER)
+    for i in range(row_count):
+        ws.append(['US', f'Product {i % 5000} with a long name', f'X{i:09d}', f'SKU-{i}', f'B{i:09d}', 'New',
+                   f'Supplier {i % 40}', round(5 + i % 300 / 7, 2), i % 30, i % 90, i % 11, i % 13, i % 17])
+    wb.save(file_path)
+
+
+def bench(file_path: str, fast: bool) -> typing.Tuple[float, int]:
+    gc.collect()
+    start = time.perf_counter()
+    with unittest.mock.patch('utils.print', create=True):
+        rows = utils.read_xslx_file(file_path, table=True, fast=fast, read_only=True)
+    return time.perf_counter() - start, len(rows)
+
+
+def main(sizes: typing.List[int]):
+    print(f'{"rows":>10} {"openpyxl (s)":>13} {"fast (s)":>9} {"speedup":>8}')
+    for row_count in sizes:
+        fd, file_path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        try:
+            generate_report(file_path, row_count)
+            openpyxl_seconds, openpyxl_rows = bench(file_path, fast=False)
+            fast_seconds, fast_rows = bench(file_path, fast=True)
+        finally:
+            os.remove(file_path)
+        assert fast_rows == openpyxl_rows == row_count
+        speedup = openpyxl_seconds / fast_seconds
+        print(f'{row_count:>10} {openpyxl_seconds:>13.3f} {fast_seconds:>9.3f} {speedup:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
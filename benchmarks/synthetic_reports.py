@@ -0,0 +1,129 @@
+"""
+Generates synthetic restock reports, inventory files and informed csv exports shaped like the real ones, as xlsx or
+TSV, for benchmarking the whole run at a realistic scale.
+
+Like the real exports, the headers carry non-breaking spaces, the SKUs differ in case and surrounding whitespace between
+the reports, some numbers are not numbers, the inventory file only has part of the catalog and the informed export has
+a row per SKU and marketplace, with some SKUs missing from some marketplaces.
+
+Run from the repository root to write the reports to ./files:
+    python -m benchmarks.synthetic_reports 100000 --format tsv --marketplaces 3
+"""
+import argparse
+import csv
+import os
+import random
+import typing
+
+from openpyxl import Workbook
+
+from my_types import AcceptedFileNames
+
+FILE_FORMATS = ('xlsx', 'tsv')
+DEFAULT_MARKETPLACES = ('1', '2')
+
+RESTOCK_HEADER = ['Country', 'Product Name', 'FNSKU', '\xa0Merchant SKU', 'ASIN', 'Condition', 'Supplier',
+                  'Supplier part no.', 'Currency code', 'Price', 'Sales last 30 days',
+                  'Units Sold Last 30 Days\xa0', 'Total\xa0Units', 'Inbound', 'Available', 'FC transfer',
+                  'FC Processing', 'Customer Order', 'Unfulfillable', 'Fulfilled by',
+                  'Total Days of Supply (including units from open shipments)', '\xa0Alert',
+                  'Recommended replenishment qty', 'Recommended ship date']
+INVENTORY_HEADER = ['SKU', 'Part Number', 'Description', 'Primary\xa0Supplier', 'Classification', 'Quantity On Hand',
+                    'Quantity Available', 'Quantity On Order', 'Reorder Point', 'Location']
+INFORMED_HEADER = ['SKU', 'MARKETPLACE_ID', 'TITLE', 'COST', 'MIN_PRICE', 'CURRENT_PRICE', 'BUY_BOX_PRICE',
+                   'MAX_PRICE', 'CURRENT_VELOCITY', 'STRATEGY_ID', 'LISTING_TYPE']
+
+
+def _restock_rows(sku_count: int, rng: random.Random) -> typing.Iterator[list]:
+    for i in range(sku_count):
+        # Every 17th SKU has the case and stray whitespace the other reports do not
+        sku = f'SKU-{i:07d}' if i % 17 else f' sku-{i:07d}\xa0'
+        units_sold = rng.choice(['0', '1', '5', '12', '40']) if i % 97 else 'n/a'
+        total_units = str(rng.randrange(0, 500)) if i % 89 else ''
+        price = round(rng.uniform(3, 120), 2)
+        yield ['US', f'Product {i % 5000} with a long enough name to look real', f'X{i:09d}', sku, f'B{i:09d}', 'New',
+               f'Supplier {i % 40}', f'SP-{i % 3000}', 'USD', price, round(price * (i % 40), 2), units_sold,
+               total_units, str(i % 11), str(i % 13), str(i % 3), str(i % 5), str(i % 7), str(i % 2),
+               'Amazon', str(rng.randrange(0, 365)), rng.choice(['', 'out_of_stock', 'reorder_now']), str(i % 17),
+               '2026-01-01']
+
+
+def _inventory_rows(sku_count: int, rng: random.Random) -> typing.Iterator[list]:
+    # Only part of the catalog is in the inventory file and the SKUs are lower case
+    for i in range(0, sku_count, 2):
+        on_hand = rng.randrange(0, 200)
+        yield [f'sku-{i:07d}', f'P{i:08d}', f'Part {i % 5000}', f'Supplier {i % 40}', rng.choice('ABC'),
+               str(on_hand), str(on_hand - rng.randrange(0, on_hand + 1)) if i % 101 else 'unknown',
+               str(i % 20), str(i % 9), f'A{i % 30}-{i % 7}']
+
+
+def _informed_rows(sku_count: int, marketplaces: typing.Sequence[str], rng: random.Random) -> typing.Iterator[list]:
+    for i in range(sku_count):
+        for position, market_place_id in enumerate(marketplaces):
+            # Some SKUs are not listed in every marketplace
+            if (i + position) % 11 == 0:
+                continue
+            cost = round(rng.uniform(1, 60), 2)
+            buy_box = rng.choice([f'{cost * 1.4:.2f}', f'{cost * 2.2:.2f}', f'{cost * 3:.2f}', ''])
+            yield [f' SKU-{i:07d} ' if i % 13 == 0 else f'SKU-{i:07d}', market_place_id, f'Title {i % 5000}',
+                   f'{cost:.2f}', f'{cost * 1.5:.2f}', f'{cost * 2:.2f}', buy_box, f'{cost * 2.5:.2f}',
+                   f'{rng.random():.3f}', str(i % 4), 'FBA']
+
+
+def _write_xlsx(file_path: str, header: typing.List[str], rows: typing.Iterable[list]) -> typing.NoReturn:
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    wb.save(file_path)
+
+
+def _write_tsv(file_path: str, header: typing.List[str], rows: typing.Iterable[list]) -> typing.NoReturn:
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def generate_reports(directory: str, sku_count: int, *, file_format: str = 'xlsx',
+                     marketplaces: typing.Sequence[str] = DEFAULT_MARKETPLACES,
+                     seed: int = 0) -> typing.Dict[AcceptedFileNames, str]:
+    """
+    Writes a restock report, inventory file and informed csv to the files directory read_files looks in
+    :param directory: The directory to create the files directory in
+    :param sku_count: The number of SKUs in the restock report
+    :param file_format: xlsx or tsv for the restock report and inventory file, the informed export is always TSV
+    :param marketplaces: The marketplace ids of the informed export
+    :param seed: The seed of the random values, the same seed writes the same reports
+    :return: The path of every report by its file name
+    """
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f'Unknown file format {file_format}, expected one of {", ".join(FILE_FORMATS)}')
+    rng = random.Random(seed)
+    files_directory = os.path.join(directory, 'files')
+    os.makedirs(files_directory, exist_ok=True)
+    write = _write_xlsx if file_format == 'xlsx' else _write_tsv
+    file_paths: typing.Dict[AcceptedFileNames, str] = {
+        'restock_report': os.path.join(files_directory, f'restock_report.{file_format}'),
+        'inventory_file': os.path.join(files_directory, f'inventory_file.{file_format}'),
+        'informed_csv': os.path.join(files_directory, 'informed_csv.txt'),
+    }
+    write(file_paths['restock_report'], RESTOCK_HEADER, _restock_rows(sku_count, rng))
+    write(file_paths['inventory_file'], INVENTORY_HEADER, _inventory_rows(sku_count, rng))
+    _write_tsv(file_paths['informed_csv'], INFORMED_HEADER, _informed_rows(sku_count, marketplaces, rng))
+    return file_paths
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('sku_count', type=int)
+    parser.add_argument('--format', choices=FILE_FORMATS, default='xlsx', dest='file_format')
+    parser.add_argument('--marketplaces', type=int, default=len(DEFAULT_MARKETPLACES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--directory', default='.')
+    args = parser.parse_args()
+    for path in generate_reports(args.directory, args.sku_count, file_format=args.file_format,
+                                 marketplaces=[str(i + 1) for i in range(args.marketplaces)],
+                                 seed=args.seed).values():
+        print(path)
@@ -0,0 +1,85 @@
+import typing
+
+from my_types import Row
+from normalization import normalize_key
+
+# Header tuple -> plan, a run only ever sees a handful of distinct headers
+_PLANS: typing.Dict[typing.Tuple[str, ...], 'ColumnPlan'] = {}
+_MAX_PLANS = 64
+
+
+class ColumnPlan:
+    """
+    Resolves column names against a file's headers.
+
+    Every header is normalized once when the plan is built and every column name the first time it is looked up,
+    so reading a field afterwards is a couple of dictionary lookups instead of normalizing every key of the row.
+    """
+
+    def __init__(self, headers: typing.Iterable[str]):
+        self.headers: typing.Tuple[str, ...] = tuple(headers)
+        self._keys: typing.Dict[str, str] = {}
+        self._indexes: typing.Dict[str, int] = {}
+        for position, header in enumerate(self.headers):
+            normalized_header = normalize_key(header)
+            if normalized_header not in self._keys:
+                self._keys[normalized_header] = header
+                self._indexes[normalized_header] = position
+        self._resolved: typing.Dict[str, typing.Optional[str]] = {}
+
+    def resolve(self, column_name: str) -> typing.Optional[str]:
+        """
+        Finds the header matching a column name
+        :param column_name: The name of the column to find
+        :return: The header or None if the column is not found
+        """
+        try:
+            return self._resolved[column_name]
+        except KeyError:
+            key = self._resolved[column_name] = self._keys.get(normalize_key(column_name))
+            return key
+
+    def index(self, column_name: str) -> typing.Optional[int]:
+        """
+        Finds the position of the header matching a column name
+        :param column_name: The name of the column to find
+        :return: The position of the header or None if the column is not found
+        """
+        return self._indexes.get(normalize_key(column_name))
+
+    def get(self, row: Row, column_name: str) -> typing.Optional[str]:
+        """
+        Reads a column from a row with these headers
+        :param row: A row
+        :param column_name: The name of the column to read
+        :return: The value of the cell in the column or None if the column is not found
+        """
+        key = self.resolve(column_name)
+        return None if key is None else row.get(key)
+
+
+def column_plan_for(row: Row) -> ColumnPlan:
+    """
+    Returns the cached plan for the headers of a row, compiling it the first time the headers are seen
+    :param row: A row
+    :return: The plan for the row's headers
+    """
+    headers = tuple(row)
+    plan = _PLANS.get(headers)
+    if plan is None:
+        if len(_PLANS) >= _MAX_PLANS:
+            _PLANS.clear()
+        plan = _PLANS[headers] = ColumnPlan(headers)
+    return plan
+
+
+def compile_output_plan() -> ColumnPlan:
+    """
+    Compiles the plan for the mapped rows built from OUTPUT_MAPPED_CELLS with every column name resolved
+    :return: The plan for the mapped rows
+    """
+    from cell_mapping import OUTPUT_MAPPED_CELLS
+    plan = column_plan_for({cell['column_name']: '' for cell in OUTPUT_MAPPED_CELLS})
+    for cell in OUTPUT_MAPPED_CELLS:
+        plan.resolve(cell['column_name'])
+    return plan
@@ -0,0 +1,58 @@
+import typing
+
+from normalization import clean_value
+
+
+class InvalidNumber(str):
+    """
+    The text of a cell in a number column that is not a number.
+
+    It is still the original text, so it is reported and written like it, but it marks the cell invalid without
+    parsing it again.
+    """
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return f'InvalidNumber({str.__repr__(self)})'
+
+
+def parse_number(value: typing.Any) -> typing.Any:
+    """
+    Converts the text of a cell in a number column to a float once, when the report is read
+    :param value: The cleaned value of the cell
+    :return: A float for number text, an InvalidNumber for other text, and empty text or any value that is not text
+        as it is
+    """
+    if value.__class__ is not str or not value:
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        return InvalidNumber(value)
+
+
+def clean_number(value: typing.Any) -> typing.Any:
+    """
+    Cleans the value of a cell in a number column like clean_value and converts it with parse_number
+    :param value: The raw value of the cell
+    :return: The typed value
+    """
+    return parse_number(clean_value(value))
+
+
+def to_number(value: typing.Any) -> float:
+    """
+    The float of a value, a typed value is returned as it is and text is parsed like float does
+    :param value: The value
+    :return: The float
+    """
+    return value if value.__class__ is float else float(value)
+
+
+def is_empty(value: typing.Any) -> bool:
+    """
+    Checks if a cell is empty, a number column is empty where it was empty text, a zero is not empty
+    :param value: The value of the cell, None when the row has no such column
+    :return: True for None and empty text
+    """
+    return value is None or value == ''
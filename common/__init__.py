@@ -1,26 +1,99 @@
-import collections
+import concurrent.futures
+import contextlib
+import functools
+import itertools
+import os
+import tempfile
+import time
 import typing
 from datetime import datetime
 
 import progressbar
+from openpyxl.cell import Cell
 from openpyxl.workbook import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
 
-from my_types import MatchedRow
-from processors import find_restock_skus, find_all_rows_with_matching_skus, map_row, process_row, validate_row
-from utils import read_report, generate_row_data_dict, generate_mapped_cell_dict
+import instrumentation
+from mapping_plan import get_mapping_plan
+from my_types import MatchedRow, AcceptedFileNames
+from partitioned_join import PartitionedReports, SpilledReport, estimate_working_set, partition_count_for
+from processors import find_restock_skus
+from report_cache import ReportCache
+from report_store import ReportStore, RESTOCK_SKU_COLUMN
+from run_state import RunState, StateEntry, fingerprint_row_data
+from sku_index import SkuIndex, join_sku_indexes, join_streamed_reports
+from utils import read_report, find_file, iter_report_rows
+from validation import ValidationReport
 
 
-def read_files() -> typing.Tuple[typing.List[dict], typing.List[dict], typing.List[dict]]:
+REPORT_FILE_NAMES: typing.Tuple[AcceptedFileNames, ...] = ('restock_report', 'inventory_file', 'informed_csv')
+# Reading in a process pool only pays for the worker start up once the reports are bigger than this in total
+PARALLEL_READ_MIN_BYTES = 16 * 1024 * 1024
+# Number of matched rows mapped and validated by a worker at a time
+PROCESS_ROWS_CHUNK_SIZE = 10_000
+# Number of output rows processed together by the batch processors before they are written
+OUTPUT_BATCH_SIZE = 1_000
+
+
+def read_report_timed(file_name: AcceptedFileNames, cache: typing.Optional[ReportCache] = None,
+                      project: bool = False, compact: bool = False, *,
+                      file_path: typing.Optional[str] = None) -> typing.Tuple[typing.List[dict], float]:
+    """
+    Reads a report and measures how long it took
+    :param file_name: The name of the file to read
+    :param cache: A cache of parsed reports
+    :param project: Only read the columns OUTPUT_MAPPED_CELLS uses
+    :param compact: Read the report into a ReportTable instead of a list of dictionaries
+    :param file_path: The path of the report, found by its name when not given
+    :return: The rows of the report and the wall time in seconds
+    """
+    start = time.perf_counter()
+    columns = get_mapping_plan().projection(file_name) if project else None
+    rows = read_report(file_name, file_path=file_path, cache=cache, columns=columns, table=compact, read_only=True)
+    return rows, time.perf_counter() - start
+
+
+def _cache_variant(file_name: AcceptedFileNames, project: bool) -> str:
+    return get_mapping_plan().projection(file_name).key if project else ''
+
+
+def read_files(*, parallel: bool = True, min_parallel_bytes: int = PARALLEL_READ_MIN_BYTES,
+               cache: typing.Optional[ReportCache] = None, project: bool = True, compact: bool = True,
+               file_paths: typing.Optional[typing.Dict[AcceptedFileNames, str]] = None) -> \
+        typing.Tuple[typing.List[dict], typing.List[dict], typing.List[dict]]:
     """
     Reads all files and returns them as a tuple
 
+    :param parallel: Parse the reports in a process pool, small inputs are still read one after another
+    :param min_parallel_bytes: The total size of the reports below which they are read one after another
+    :param cache: A cache of parsed reports, unchanged reports are loaded from it instead of being parsed
+    :param project: Only read the columns OUTPUT_MAPPED_CELLS uses and the SKU and marketplace columns
+    :param compact: Read the reports into ReportTables, which behave like lists of dictionaries but store one
+        header per report and a tuple per row
+    :param file_paths: The paths of the reports by file name, the reports without a path are found by their name
     :return: tuple of all files
     """
     # Read files
-    restock_report = read_report('restock_report', read_only=True)
-    inventory_file = read_report('inventory_file', read_only=True)
-    informed_csv = read_report('informed_csv', read_only=True)
+    read = functools.partial(read_report_timed, cache=cache, project=project, compact=compact)
+    file_paths = {file_name: (file_paths or {}).get(file_name) or find_file(file_name)
+                  for file_name in REPORT_FILE_NAMES}
+    # Cached reports load faster here than they could be sent back from a worker
+    pending = [file_name for file_name, file_path in file_paths.items() if file_path and not (
+        cache is not None and cache.contains(file_path, _cache_variant(file_name, project)))]
+    pending_bytes = sum(os.path.getsize(file_paths[file_name]) for file_name in pending)
+    results = {}
+    if parallel and len(pending) > 1 and pending_bytes >= min_parallel_bytes:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=len(pending)) as executor:
+            futures = {file_name: executor.submit(read, file_name, file_path=file_paths[file_name])
+                       for file_name in pending}
+            results.update((file_name, future.result()) for file_name, future in futures.items())
+    for file_name in REPORT_FILE_NAMES:
+        if file_name not in results:
+            results[file_name] = read(file_name, file_path=file_paths[file_name])
+        rows, seconds = results[file_name]
+        instrumentation.record(f'read_report:{file_name}', seconds, len(rows) if rows is not None else None)
+        print(f'Read {file_name} in {seconds:.2f}s')
+    restock_report, inventory_file, informed_csv = (results[file_name][0] for file_name in REPORT_FILE_NAMES)
     return restock_report, inventory_file, informed_csv
 
 
@@ -34,79 +107,538 @@ def find_skus(restock_report: typing.List[dict], inventory_file, informed_csv, *
     :param market_place_id:  marketplace id
     :return:  Dict of matched rows
     """
+    # Index every report once and join them on the restock skus
+    with instrumentation.stage('find_skus') as stage:
+        indexes = index_reports(restock_report, inventory_file, informed_csv)
+        if indexes is None:
+            return {}
+        matched_row_data = indexes.join(market_place_id)
+        stage.rows = len(matched_row_data)
+
+    return matched_row_data
+
+
+class ReportIndexes(typing.NamedTuple):
+    """The restock skus and the SKU index of every report, every marketplace is joined from the same indexes"""
+    skus: typing.List[str]
+    restock_index: SkuIndex
+    inventory_index: SkuIndex
+    informed_index: SkuIndex
+
+    def join(self, market_place_id: typing.Optional[str] = None) -> typing.Dict[str, MatchedRow]:
+        """
+        Joins the indexes on the restock skus
+        :param market_place_id: marketplace id
+        :return: Dict of matched rows, the same find_skus returns
+        """
+        return join_sku_indexes(self.skus, self.restock_index, self.inventory_index, self.informed_index,
+                                market_place_id=market_place_id)
+
+
+def index_reports(restock_report: typing.List[dict], inventory_file, informed_csv) -> typing.Optional[ReportIndexes]:
+    """
+    Indexes the reports on their skus
+    :param restock_report: Restock report
+    :param inventory_file: Inventory file
+    :param informed_csv: Informed csv
+    :return: The indexes or None when the restock report has no skus
+    """
     # Find SKUs
+    try:
+        skus = find_restock_skus(restock_report)
+    except KeyError:
+        print("No SKUs found in restock report")
+        return None
+    return ReportIndexes(skus, SkuIndex(restock_report), SkuIndex(inventory_file), SkuIndex(informed_csv))
+
+
+def stream_skus(*, market_place_id: typing.Optional[str] = None, cache: typing.Optional[ReportCache] = None,
+                project: bool = True) -> typing.Dict[str, MatchedRow]:
+    """
+    Reads the restock report into an index and streams the inventory file and informed csv through the join, so only
+    the index and the matched rows are ever held instead of every report
+    :param market_place_id: marketplace id
+    :param cache: A cache of parsed reports, only the indexed restock report is loaded from it
+    :param project: Only read the columns OUTPUT_MAPPED_CELLS uses and the SKU and marketplace columns
+    :return: Dict of matched rows, the same find_skus returns for the same reports
+    """
+    restock_report, seconds = read_report_timed('restock_report', cache=cache, project=project, compact=True)
+    instrumentation.record('read_report:restock_report', seconds, len(restock_report))
+    print(f'Read restock_report in {seconds:.2f}s')
     try:
         skus = find_restock_skus(restock_report)
     except KeyError:
         print("No SKUs found in restock report")
         return {}
-    # Find matching rows
-    matched_row_data: typing.Dict[str, MatchedRow] = collections.defaultdict(generate_row_data_dict)
-    matched_restock_rows = find_all_rows_with_matching_skus(skus, restock_report)
-    matched_inventory_rows = find_all_rows_with_matching_skus(skus, inventory_file)
-    matched_informed_rows = find_all_rows_with_matching_skus(skus, informed_csv,
-                                                             market_place_id=market_place_id, )
-
-    # Store data
-    # Restock file
-    for matched_restock_row_sku, matched_restock_row in matched_restock_rows.items():
-        matched_row_data[matched_restock_row_sku]['restock_row'] = matched_restock_row
-    # Inventory file
-    for matched_inventory_row_sku, matched_inventory_row in matched_inventory_rows.items():
-        matched_row_data[matched_inventory_row_sku]['inventory_row'] = matched_inventory_row
-    # Informed file
-    for matched_informed_row_sku, matched_informed_row in matched_informed_rows.items():
-        matched_row_data[matched_informed_row_sku]['informed_row'] = matched_informed_row
+    restock_index = SkuIndex(restock_report)
+    streamed_rows = []
+    for file_name in ('inventory_file', 'informed_csv'):
+        file_path = find_file(file_name)
+        if not file_path:
+            raise FileNotFoundError(f"Could not find file {file_name}")
+        print(f'Streaming {file_path}')
+        columns = get_mapping_plan().projection(file_name) if project else None
+        streamed_rows.append(iter_report_rows(file_path, columns=columns, read_only=True))
+    start = time.perf_counter()
+    with instrumentation.stage('find_skus') as stage:
+        matched_row_data = join_streamed_reports(skus, restock_index, *streamed_rows,
+                                                 market_place_id=market_place_id)
+        stage.rows = len(matched_row_data)
+    print(f'Joined inventory_file and informed_csv in {time.perf_counter() - start:.2f}s')
+    return matched_row_data
+
+
+def _report_file_path(file_name: AcceptedFileNames,
+                      file_paths: typing.Optional[typing.Dict[AcceptedFileNames, str]] = None) -> str:
+    file_path = (file_paths or {}).get(file_name) or find_file(file_name)
+    if not file_path:
+        raise FileNotFoundError(f"Could not find file {file_name}")
+    return file_path
+
+
+def _collect_restock_skus(rows: typing.Iterable[dict], skus: typing.List[str]) -> typing.Iterator[dict]:
+    # Reads the skus find_restock_skus would while the rows stream by
+    for row in rows:
+        skus.append(row[RESTOCK_SKU_COLUMN])
+        yield row
+
+
+def spill_reports(directory: str, partition_count: int, *, project: bool = True,
+                  file_paths: typing.Optional[typing.Dict[AcceptedFileNames, str]] = None) -> \
+        typing.Optional[PartitionedReports]:
+    """
+    Streams the reports into files hash-partitioned by normalized sku, so they can be joined a partition at a time
+    :param directory: The directory the partitions are written to, they are not removed
+    :param partition_count: The number of partitions
+    :param project: Only keep the columns OUTPUT_MAPPED_CELLS uses and the SKU and marketplace columns
+    :param file_paths: The paths of the reports by file name, the reports without a path are found by their name
+    :return: The spilled reports or None when the restock report has no skus
+    """
+    skus: typing.List[str] = []
+    reports = []
+    for file_name in REPORT_FILE_NAMES:
+        file_path = _report_file_path(file_name, file_paths)
+        start = time.perf_counter()
+        columns = get_mapping_plan().projection(file_name) if project else None
+        rows = iter_report_rows(file_path, columns=columns, read_only=True)
+        if file_name == 'restock_report':
+            rows = _collect_restock_skus(rows, skus)
+        try:
+            report = SpilledReport(directory, file_name, partition_count).spill(rows)
+        except KeyError:
+            print("No SKUs found in restock report")
+            return None
+        seconds = time.perf_counter() - start
+        instrumentation.record(f'read_report:{file_name}', seconds, report.row_count)
+        print(f'Spilled {file_name} into {partition_count} partitions in {seconds:.2f}s')
+        reports.append(report)
+    return PartitionedReports(skus, *reports)
+
+
+def _partition_count(memory_budget: typing.Optional[int],
+                     file_paths: typing.Dict[AcceptedFileNames, str]) -> int:
+    if memory_budget is None:
+        return 1
+    working_set = estimate_working_set(file_paths.values())
+    partition_count = partition_count_for(working_set, memory_budget)
+    if partition_count > 1:
+        print(f'The reports take about {working_set / 2 ** 20:.0f} MiB, over the budget of '
+              f'{memory_budget / 2 ** 20:.0f} MiB, joining them in {partition_count} partitions')
+    return partition_count
+
+
+def find_skus_within_budget(memory_budget: int, *, market_place_id: typing.Optional[str] = None,
+                            cache: typing.Optional[ReportCache] = None, project: bool = True,
+                            file_paths: typing.Optional[typing.Dict[AcceptedFileNames, str]] = None,
+                            spill_directory: typing.Optional[str] = None) -> typing.Dict[str, MatchedRow]:
+    """
+    Joins the reports in memory like read_files and find_skus when they fit a memory budget, and otherwise spills
+    them into hash partitions on disk and joins one partition at a time
+    :param memory_budget: The memory the reports may take once they are read and indexed, in bytes
+    :param market_place_id: marketplace id
+    :param cache: A cache of parsed reports, only used when the reports are joined in memory
+    :param project: Only read the columns OUTPUT_MAPPED_CELLS uses and the SKU and marketplace columns
+    :param file_paths: The paths of the reports by file name, the reports without a path are found by their name
+    :param spill_directory: The directory the temporary partitions are written in, the system temporary directory by
+        default
+    :return: Dict of matched rows, the same find_skus returns for the same reports
+    """
+    file_paths = {file_name: _report_file_path(file_name, file_paths) for file_name in REPORT_FILE_NAMES}
+    partition_count = _partition_count(memory_budget, file_paths)
+    if partition_count == 1:
+        files = read_files(cache=cache, project=project, file_paths=file_paths)
+        return find_skus(*files, market_place_id=market_place_id)
+    with tempfile.TemporaryDirectory(prefix='spill-', dir=spill_directory) as directory:
+        reports = spill_reports(directory, partition_count, project=project, file_paths=file_paths)
+        if reports is None:
+            return {}
+        with instrumentation.stage('find_skus') as stage:
+            matched_row_data = reports.join(market_place_id)
+            stage.rows = len(matched_row_data)
+    return matched_row_data
+
+
+def store_reports(store: ReportStore, *, project: bool = True,
+                  file_paths: typing.Optional[typing.Dict[AcceptedFileNames, str]] = None) -> typing.NoReturn:
+    """
+    Loads the reports into a report store, the reports it already holds unchanged are not read again
+    :param store: The report store
+    :param project: Only load the columns OUTPUT_MAPPED_CELLS uses and the SKU and marketplace columns
+    :param file_paths: The paths of the reports by file name, the reports without a path are found by their name
+    :return: None
+    """
+    for file_name in REPORT_FILE_NAMES:
+        file_path = _report_file_path(file_name, file_paths)
+        start = time.perf_counter()
+        columns = get_mapping_plan().projection(file_name) if project else None
+        loaded = store.load(file_name, file_path, columns)
+        seconds = time.perf_counter() - start
+        instrumentation.record(f'read_report:{file_name}', seconds, store.row_count(file_name))
+        print(f'Loaded {file_name} into the report store in {seconds:.2f}s' if loaded
+              else f'Read {file_name} from the report store')
+
 
+def find_stored_skus(store: ReportStore, *, market_place_id: typing.Optional[str] = None, project: bool = True) -> \
+        typing.Dict[str, MatchedRow]:
+    """
+    Loads the reports into a report store and joins them there with an indexed query, so only the matched rows are
+    ever held instead of every report
+    :param store: The report store
+    :param market_place_id: marketplace id
+    :param project: Only load the columns OUTPUT_MAPPED_CELLS uses and the SKU and marketplace columns
+    :return: Dict of matched rows, the same find_skus returns for the same reports
+    """
+    store_reports(store, project=project)
+    with instrumentation.stage('find_skus') as stage:
+        matched_row_data = store.join(market_place_id)
+        stage.rows = len(matched_row_data)
     return matched_row_data
 
 
-def process_rows(matched_row_data) -> typing.List[dict]:
+def iter_mapped_rows(matched_row_data: typing.Dict[str, MatchedRow], *, chunk_size: int = PROCESS_ROWS_CHUNK_SIZE,
+                     report: typing.Optional[ValidationReport] = None) -> typing.Iterator[dict]:
+    """
+    Maps and validates matched rows a chunk at a time, removing them from matched_row_data as they are mapped so the
+    rows can go straight into a streaming writer
+    :param matched_row_data: Dict of matched rows, it is emptied
+    :param chunk_size: Number of rows mapped and validated at a time
+    :param report: Collects the invalid cells of the dropped rows
+    :return: A generator of mapped rows in the order of matched_row_data
+    """
+    while matched_row_data:
+        skus = list(itertools.islice(matched_row_data, chunk_size))
+        with instrumentation.stage('process_rows', rows=len(skus)):
+            output_rows = map_and_validate_rows([matched_row_data.pop(sku) for sku in skus], report)
+        yield from output_rows
+
+
+def run_streaming_pipeline(*, market_place_id: typing.Optional[str] = None,
+                           cache: typing.Optional[ReportCache] = None) -> typing.NoReturn:
+    """
+    Reads, joins, maps and writes the reports as one stream, peak memory is bounded by the restock index and the
+    matched rows instead of the size of every report
+    :param market_place_id: marketplace id
+    :param cache: A cache of parsed reports
+    :return: None
+    """
+    matched_row_data = stream_skus(market_place_id=market_place_id, cache=cache)
+    report = ValidationReport()
+    create_output_workbook(iter_mapped_rows(matched_row_data, report=report), streaming=True)
+    report.write()
+
+
+def map_and_validate_rows(rows_data: typing.Sequence[MatchedRow],
+                          report: typing.Optional[ValidationReport] = None) -> typing.List[dict]:
+    """
+    Maps a chunk of matched rows and drops the ones that are not valid
+    :param rows_data: The matched rows
+    :param report: Collects the invalid cells of the dropped rows
+    :return: List of mapped rows in the order of rows_data
+    """
+    plan = get_mapping_plan()
+    mapped_rows = [plan.map_row(row_data) for row_data in rows_data]
+    return list(itertools.compress(mapped_rows, plan.validate_batch(mapped_rows, report)))
+
+
+def _map_and_validate_chunk(rows_data: typing.Sequence[MatchedRow]) -> \
+        typing.Tuple[typing.List[dict], ValidationReport]:
+    report = ValidationReport()
+    return map_and_validate_rows(rows_data, report), report
+
+
+def process_rows(matched_row_data, *, workers: int = 1, chunk_size: int = PROCESS_ROWS_CHUNK_SIZE,
+                 report: typing.Optional[ValidationReport] = None) -> typing.List[dict]:
     """
     Processes all rows in matched_row_data by mapping them and then processing them.
     :param matched_row_data:  Dict of matched rows
-    :return:  List of mapped rows
+    :param workers: Number of worker processes, rows are mapped in this process when it is 1
+    :param chunk_size: Number of rows mapped and validated at a time, fewer rows than this are mapped in this process
+    :param report: Collects the invalid cells of the dropped rows, without one they are written to a rejects file
+        once every row is processed
+    :return:  List of mapped rows in the order of matched_row_data
     """
     # Process rows
     print('Processing rows', end='')
-    output_mapping: list = []
-    for row_data in matched_row_data.values():
-        mapped_row = map_row(row_data)
-        if validate_row(mapped_row) is False:
-            continue
-        output_mapping.append(mapped_row)
+    write_report = report is None
+    if report is None:
+        report = ValidationReport()
+    with instrumentation.stage('process_rows', rows=len(matched_row_data)):
+        rows_data = list(matched_row_data.values())
+        chunks = [rows_data[start:start + chunk_size] for start in range(0, len(rows_data), chunk_size)]
+        if workers > 1 and len(rows_data) > chunk_size:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                # map keeps the chunk order so the output is the same as mapping serially
+                results = list(executor.map(_map_and_validate_chunk, chunks))
+        else:
+            results = [_map_and_validate_chunk(chunk) for chunk in chunks]
+        output_mapping = []
+        for chunk_rows, chunk_report in results:
+            output_mapping.extend(chunk_rows)
+            report.extend(chunk_report)
     print('...Done')
+    if write_report:
+        report.write()
+    return output_mapping
+
+
+def process_rows_incremental(matched_row_data: typing.Dict[str, MatchedRow], state: RunState, *,
+                             chunk_size: int = PROCESS_ROWS_CHUNK_SIZE,
+                             report: typing.Optional[ValidationReport] = None) -> typing.List[dict]:
+    """
+    Processes the rows like process_rows but only maps and validates the skus whose matched rows changed since the
+    previous run saved in state, the mapped rows of the other skus are reused. The state is replaced with this run.
+    :param matched_row_data: Dict of matched rows
+    :param state: The state of the previous run of the marketplace
+    :param chunk_size: Number of changed rows mapped and validated at a time
+    :param report: Collects the invalid cells of the dropped rows, without one they are written to a rejects file
+        once every row is processed
+    :return: List of mapped rows in the order of matched_row_data, the same process_rows returns
+    """
+    print('Processing rows', end='')
+    write_report = report is None
+    if report is None:
+        report = ValidationReport()
+    with instrumentation.stage('process_rows', rows=len(matched_row_data)):
+        plan = get_mapping_plan()
+        previous_entries = state.load(plan)
+        entries: typing.Dict[str, StateEntry] = {}
+        changed: typing.List[typing.Tuple[str, str, MatchedRow]] = []
+        for sku, row_data in matched_row_data.items():
+            fingerprint = fingerprint_row_data(row_data)
+            entry = previous_entries.get(sku)
+            if entry is not None and entry.fingerprint == fingerprint:
+                entries[sku] = entry
+            else:
+                changed.append((sku, fingerprint, row_data))
+        for start in range(0, len(changed), chunk_size):
+            chunk = changed[start:start + chunk_size]
+            mapped_rows = [plan.map_row(row_data) for _, _, row_data in chunk]
+            validity = plan.validate_batch(mapped_rows)
+            for (sku, fingerprint, _), mapped_row, is_valid in zip(chunk, mapped_rows, validity):
+                if is_valid:
+                    entries[sku] = StateEntry(fingerprint, mapped_row)
+                else:
+                    row_report = ValidationReport()
+                    plan.validate_batch([mapped_row], row_report)
+                    entries[sku] = StateEntry(fingerprint, None, tuple(row_report.rejects))
+        output_mapping = []
+        for sku in matched_row_data:
+            entry = entries[sku]
+            if entry.mapped_row is None:
+                report.extend(ValidationReport(entry.rejects, rejected_rows=1))
+            else:
+                output_mapping.append(entry.mapped_row)
+        state.save(plan, entries)
+    print(f'...Done, mapped {len(changed)} changed rows and reused {len(entries) - len(changed)}')
+    if write_report:
+        report.write()
     return output_mapping
 
 
-def create_output_workbook(output_mapping: typing.List[dict]) -> typing.NoReturn:
+def create_output_workbook(output_mapping: typing.Iterable[dict], *, streaming: bool = False,
+                           output_file_name: typing.Optional[str] = None) -> typing.NoReturn:
     """
     Creates the output workbook and saves it to a file.
-    :param output_mapping: List of mapped rows
+    :param output_mapping: List of mapped rows, any iterable of mapped rows when streaming
+    :param streaming: Write each row once through a write-only worksheet so memory stays flat with the row count
+    :param output_file_name: The path to save the workbook to, defaults to a timestamped file in the working directory
     :return: None
     """
     # Create Output Workbook
 
     print('Creating output workbook')
     # Creates the headers
-    headers = list(generate_mapped_cell_dict().keys())
-    # Creates the workbook and worksheet
-    wb = Workbook()
-    ws: Worksheet = wb.active
-    # Appends the headers to the worksheet
-    ws.append(headers)
-    # Appends the rows to the worksheet
-    for row in output_mapping:
-        ws.append(list(row.values()))
-    # Zips the rows with the output mapping
-    zipped_rows = zip(ws.iter_rows(min_row=2), output_mapping)
-    bar = progressbar.progressbar(zipped_rows, max_value=len(output_mapping))
-    # Loop over rows to process them via their processor in OUTPUT_MAPPED_CELLS
-    for ws_row, output_row in bar:
-        for ws_cell, output_cell in zip(ws_row, output_row.keys()):
-            process_row(output_row, ws_cell, headers[ws_cell.col_idx - 1])
+    plan = get_mapping_plan()
+    headers = list(plan.column_names)
+    if streaming:
+        wb = write_output_rows(output_mapping, headers)
+    else:
+        # Creates the workbook and worksheet
+        wb = Workbook()
+        ws: Worksheet = wb.active
+        # Appends the headers to the worksheet
+        ws.append(headers)
+        # Appends the rows to the worksheet
+        with instrumentation.stage('write_rows', rows=len(output_mapping)):
+            for row in output_mapping:
+                ws.append(list(row.values()))
+        # Zips the rows with the output mapping
+        zipped_rows = zip(ws.iter_rows(min_row=2), output_mapping)
+        bar = progressbar.progressbar(zipped_rows, max_value=len(output_mapping))
+        # Loop over rows to process them via their processor in OUTPUT_MAPPED_CELLS
+        with instrumentation.stage('processors', rows=len(output_mapping)):
+            for ws_row, output_row in bar:
+                plan.process_cells(output_row, ws_row)
     # Save the workbook
-    now = datetime.now()
-    output_file_name = f'output_{now.strftime("%Y-%m-%d_%H-%M")}.xlsx'
-    wb.save(output_file_name)
+    if output_file_name is None:
+        output_file_name = f'output_{datetime.now().strftime("%Y-%m-%d_%H-%M")}.xlsx'
+    with instrumentation.stage('save'):
+        wb.save(output_file_name)
     print(f'Saved output file as {output_file_name}')
+
+
+def write_output_rows(output_mapping: typing.Iterable[dict], headers: typing.List[str], *,
+                      batch_size: int = OUTPUT_BATCH_SIZE) -> Workbook:
+    """
+    Writes mapped rows to a write-only workbook, processing each row's cells before the row is emitted
+    :param output_mapping: Iterable of mapped rows, it is consumed once
+    :param headers: The output headers
+    :param batch_size: Number of rows whose cells are processed together a column at a time by the batch processors,
+        0 processes every row cell by cell
+    :return: The write-only workbook, ready to be saved
+    """
+    plan = get_mapping_plan()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(headers)
+    max_value = len(output_mapping) if isinstance(output_mapping, typing.Sized) else progressbar.UnknownLength
+    bar = progressbar.progressbar(output_mapping, max_value=max_value)
+    rows = enumerate(bar, start=2)
+    while batch := list(itertools.islice(rows, batch_size or 1)):
+        output_rows = [output_row for _, output_row in batch]
+        cells_rows = [
+            [Cell(ws, row=row_idx, column=col_idx, value=value)
+             for col_idx, value in enumerate(output_row.values(), start=1)]
+            for row_idx, output_row in batch
+        ]
+        with instrumentation.stage('processors', rows=len(batch)):
+            if batch_size:
+                plan.process_batch(output_rows, cells_rows)
+            else:
+                plan.process_cells(output_rows[0], cells_rows[0])
+        with instrumentation.stage('write_rows', rows=len(batch)):
+            for cells in cells_rows:
+                ws.append(cells)
+    return wb
+
+
+class MarketplaceOutput(typing.NamedTuple):
+    """The files written for a marketplace by run_marketplaces"""
+    market_place_id: str
+    output_file: str
+    rows: int
+    rejects_file: typing.Optional[str]
+
+
+# Anything that joins the reports of a marketplace like ReportIndexes.join
+JoinableReports: typing.TypeAlias = typing.Union[ReportIndexes, ReportStore, PartitionedReports]
+
+
+def write_marketplace(indexes: JoinableReports, market_place_id: str, output_directory: str, *,
+                      state_directory: typing.Optional[str] = None) -> MarketplaceOutput:
+    """
+    Joins, maps and writes the output workbook and rejects of one marketplace
+    :param indexes: The indexed reports, the report store holding them or the spilled reports
+    :param market_place_id: marketplace id
+    :param output_directory: The directory the output workbook and rejects file are saved in
+    :param state_directory: Only map the rows that changed since the previous run saved in this directory, every row
+        is mapped when it is None
+    :return: The files written for the marketplace
+    """
+    matched_row_data = indexes.join(market_place_id)
+    report = ValidationReport()
+    if state_directory is None:
+        output_mapping = process_rows(matched_row_data, report=report)
+    else:
+        output_mapping = process_rows_incremental(matched_row_data, RunState(state_directory, market_place_id),
+                                                  report=report)
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
+    output_file = os.path.join(output_directory, f'output_{market_place_id}_{timestamp}.xlsx')
+    create_output_workbook(output_mapping, streaming=True, output_file_name=output_file)
+    rejects_file = report.write(os.path.join(output_directory, f'rejects_{market_place_id}_{timestamp}.csv'))
+    return MarketplaceOutput(market_place_id, output_file, len(output_mapping), rejects_file)
+
+
+# The indexes shared with the workers of run_marketplaces, set once per worker by its initializer
+_SHARED_INDEXES: typing.Optional[JoinableReports] = None
+
+
+def _share_indexes(indexes: JoinableReports) -> typing.NoReturn:
+    global _SHARED_INDEXES
+    _SHARED_INDEXES = indexes
+
+
+def _write_shared_marketplace(market_place_id: str, output_directory: str,
+                              state_directory: typing.Optional[str]) -> MarketplaceOutput:
+    return write_marketplace(_SHARED_INDEXES, market_place_id, output_directory, state_directory=state_directory)
+
+
+def run_marketplaces(market_place_ids: typing.Sequence[str], *, output_directory: str = '.',
+                     file_paths: typing.Optional[typing.Dict[AcceptedFileNames, str]] = None,
+                     cache: typing.Optional[ReportCache] = None, workers: int = 1,
+                     state_directory: typing.Optional[str] = None,
+                     store: typing.Optional[ReportStore] = None,
+                     memory_budget: typing.Optional[int] = None) -> typing.List[MarketplaceOutput]:
+    """
+    Reads and indexes the reports once and writes an output workbook for every marketplace from the same indexes
+    :param market_place_ids: The marketplace ids
+    :param output_directory: The directory the output workbooks and rejects files are saved in, created if needed
+    :param file_paths: The paths of the reports by file name, the reports without a path are found by their name
+    :param cache: A cache of parsed reports
+    :param workers: Number of worker processes writing marketplaces, each worker receives the indexes once
+    :param state_directory: Only map the rows that changed since the previous run of each marketplace
+    :param store: Load the reports into this report store and join every marketplace there instead of indexing them
+        in memory, the cache is not used then
+    :param memory_budget: The memory the reports may take once they are read and indexed, in bytes, over it they are
+        spilled into hash partitions on disk that every marketplace is joined from a partition at a time
+    :return: The files written for every marketplace in the order of market_place_ids
+    """
+    market_place_ids = list(dict.fromkeys(str(market_place_id) for market_place_id in market_place_ids))
+    os.makedirs(output_directory, exist_ok=True)
+    partition_count = 1
+    if store is None and memory_budget is not None:
+        file_paths = {file_name: _report_file_path(file_name, file_paths) for file_name in REPORT_FILE_NAMES}
+        partition_count = _partition_count(memory_budget, file_paths)
+    with contextlib.ExitStack() as stack:
+        if store is not None:
+            store_reports(store, file_paths=file_paths)
+            if RESTOCK_SKU_COLUMN not in (store.header('restock_report') or ()):
+                print("No SKUs found in restock report")
+                return []
+            indexes = store
+        elif partition_count > 1:
+            directory = stack.enter_context(tempfile.TemporaryDirectory(prefix='spill-'))
+            indexes = spill_reports(directory, partition_count, file_paths=file_paths)
+            if indexes is None:
+                return []
+        else:
+            files = read_files(cache=cache, file_paths=file_paths)
+            with instrumentation.stage('index_reports') as stage:
+                indexes = index_reports(*files)
+                if indexes is None:
+                    return []
+                stage.rows = len(indexes.skus)
+        workers = min(workers, len(market_place_ids))
+        with instrumentation.stage('write_marketplaces') as stage:
+            if workers > 1:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_share_indexes,
+                                                            initargs=(indexes,)) as executor:
+                    outputs = list(executor.map(_write_shared_marketplace, market_place_ids,
+                                                itertools.repeat(output_directory),
+                                                itertools.repeat(state_directory)))
+            else:
+                outputs = [write_marketplace(indexes, market_place_id, output_directory,
+                                             state_directory=state_directory)
+                           for market_place_id in market_place_ids]
+            stage.rows = sum(output.rows for output in outputs)
+    return outputs
@@ -0,0 +1,196 @@
+import codecs
+import csv
+import io
+import itertools
+import mmap
+import os
+import re
+import threading
+import typing
+
+DEFAULT_ENCODING = 'utf-8'
+# Skip lines that do not decode, any other value is a codecs error handler like 'replace' or 'strict'
+SKIP_BAD_LINES = 'skip'
+DEFAULT_DECODE_ERRORS = SKIP_BAD_LINES
+# Lines are decoded this many bytes at a time, a block that decodes cleanly is decoded and split in one go
+BLOCK_SIZE = 1 << 20
+# Number of bad line numbers kept for the summary
+MAX_REPORTED_LINES = 10
+
+_LINE_ENDING = re.compile(rb'\r\n|\r|\n')
+# The codecs error handler that records where the bytes that do not decode are, kept per thread so files read at the
+# same time do not share it
+_MARK_BAD_BYTES = 'delimited_reader.mark_bad_bytes'
+_bad_bytes = threading.local()
+
+
+class BadLines:
+    """Counts the lines of a file that did not decode and keeps the numbers of the first few"""
+
+    def __init__(self):
+        self.count = 0
+        self.line_numbers: typing.List[int] = []
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, line_number: int) -> typing.NoReturn:
+        """
+        Records a line that did not decode
+        :param line_number: The line number, counting from 1
+        :return: None
+        """
+        self.count += 1
+        if len(self.line_numbers) < MAX_REPORTED_LINES:
+            self.line_numbers.append(line_number)
+
+    def summary(self, file_path: str, errors: str = DEFAULT_DECODE_ERRORS) -> str:
+        """
+        Describes the bad lines of a file
+        :param file_path: The path of the file
+        :param errors: The error policy the file was read with
+        :return: A one line summary
+        """
+        action = 'Skipped' if errors == SKIP_BAD_LINES else f'Decoded with {errors!r}'
+        line_numbers = ', '.join(str(line_number) for line_number in self.line_numbers)
+        more = ', ...' if self.count > len(self.line_numbers) else ''
+        return f'{action} {self.count} lines of {file_path} that are not valid text (lines {line_numbers}{more})'
+
+
+def _blocks(buffer: typing.Union[mmap.mmap, bytes], block_size: int) -> typing.Iterator[bytes]:
+    """
+    Cuts a buffer into blocks that end after a newline, so no line is split between two blocks
+    :param buffer: The bytes of the file
+    :param block_size: The size a block grows to before it is cut at the next newline
+    :return: A generator of blocks
+    """
+    start = 0
+    size = len(buffer)
+    while start < size:
+        end = buffer.find(b'\n', min(start + block_size, size) - 1) + 1 or size
+        yield buffer[start:end]
+        start = end
+
+
+def _count_lines(text: str) -> int:
+    """
+    Counts the lines of text the way io.StringIO with newline='' splits them
+    :param text: The text
+    :return: The number of lines, a last line without a line ending included
+    """
+    count = text.count('\n') + text.count('\r') - text.count('\r\n')
+    return count + 1 if text and text[-1] not in '\r\n' else count
+
+
+def _mark_bad_bytes(error: UnicodeDecodeError) -> typing.Tuple[str, int]:
+    _bad_bytes.positions.append(error.start)
+    return '', error.end
+
+
+codecs.register_error(_MARK_BAD_BYTES, _mark_bad_bytes)
+
+
+def _bad_byte_positions(block: bytes, encoding: str) -> typing.List[int]:
+    """
+    Finds where the bytes that do not decode start, in a single decode of the block
+    :param block: The bytes of the block
+    :param encoding: The encoding of the file
+    :return: The positions in the block, in order
+    """
+    _bad_bytes.positions = positions = []
+    block.decode(encoding, _MARK_BAD_BYTES)
+    return positions
+
+
+def _split_bad_lines(block: bytes, first_line_number: int, encoding: str, errors: str,
+                     bad_lines: BadLines) -> typing.List[typing.Iterable[str]]:
+    """
+    Decodes a block that did not decode as a whole, the bytes between the bad lines are still decoded in one go
+    :param block: The bytes of the block
+    :param first_line_number: The line number of the first line of the block
+    :param encoding: The encoding of the file
+    :param errors: 'skip' drops the lines that do not decode, any codecs error handler decodes them with it instead
+    :param bad_lines: Counts the lines that did not decode
+    :return: The decoded lines, in runs
+    """
+    runs = []
+    line_number = first_line_number
+    start = 0
+    for position in _bad_byte_positions(block, encoding):
+        if position < start:
+            # Another bad byte of a line already handled
+            continue
+        # The bad line starts after the last line ending before the bad byte and ends with the next one
+        line_start = max(block.rfind(b'\n', start, position), block.rfind(b'\r', start, position), start - 1) + 1
+        line_end = _LINE_ENDING.search(block, position)
+        line_end = line_end.end() if line_end else len(block)
+        text = block[start:line_start].decode(encoding)
+        runs.append(io.StringIO(text, newline=''))
+        line_number += _count_lines(text)
+        bad_lines.add(line_number)
+        if errors != SKIP_BAD_LINES:
+            runs.append((block[line_start:line_end].decode(encoding, errors),))
+        line_number += 1
+        start = line_end
+    runs.append(io.StringIO(block[start:].decode(encoding), newline=''))
+    return runs
+
+
+def _iter_line_runs(file_path: str, encoding: str, errors: str, bad_lines: BadLines,
+                    block_size: int) -> typing.Iterator[typing.Iterable[str]]:
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # An empty file cannot be mapped
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if hasattr(buffer, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                buffer.madvise(mmap.MADV_SEQUENTIAL)
+            line_number = 1
+            for block in _blocks(buffer, block_size):
+                try:
+                    text = block.decode(encoding)
+                except UnicodeDecodeError:
+                    yield from _split_bad_lines(block, line_number, encoding, errors, bad_lines)
+                    # Blocks end with a line ending and bad bytes are never line endings, so the bytes count the lines
+                    line_number += block.count(b'\n') + block.count(b'\r') - block.count(b'\r\n')
+                    continue
+                # Split by StringIO rather than str.splitlines, which also splits at \x1c, \x85 and the like
+                yield io.StringIO(text, newline='')
+                line_number += _count_lines(text)
+
+
+def iter_decoded_lines(file_path: str, *, encoding: str = DEFAULT_ENCODING, errors: str = DEFAULT_DECODE_ERRORS,
+                       bad_lines: typing.Optional[BadLines] = None,
+                       block_size: int = BLOCK_SIZE) -> typing.Iterator[str]:
+    """
+    Reads the lines of a file through a memory map, decoding a block of lines at a time and only falling back to
+    finding the line at fault when a block does not decode, so a line that does not decode only costs that line
+
+    Lines end at \\n, \\r or \\r\\n like a file opened with newline='', and keep their line ending so csv.reader can
+    read quoted fields spanning lines. The encoding has to be ASCII compatible, like utf-8 or cp1252.
+    :param file_path: The path of the file
+    :param encoding: The encoding of the file
+    :param errors: 'skip' drops the lines that do not decode, any codecs error handler decodes them with it instead
+    :param bad_lines: Counts the lines that did not decode
+    :param block_size: The number of bytes decoded at a time
+    :return: A generator of decoded lines
+    """
+    if bad_lines is None:
+        bad_lines = BadLines()
+    return itertools.chain.from_iterable(_iter_line_runs(file_path, encoding, errors, bad_lines, block_size))
+
+
+def iter_delimited_rows(file_path: str, delimiter: str = '\t', *, encoding: str = DEFAULT_ENCODING,
+                        errors: str = DEFAULT_DECODE_ERRORS,
+                        bad_lines: typing.Optional[BadLines] = None) -> typing.Iterator[typing.List[str]]:
+    """
+    Reads the rows of a delimited file with csv.reader from iter_decoded_lines
+    :param file_path: The path of the file
+    :param delimiter: The delimiter used in the file
+    :param encoding: The encoding of the file
+    :param errors: 'skip' drops the lines that do not decode, any codecs error handler decodes them with it instead
+    :param bad_lines: Counts the lines that did not decode
+    :return: A generator of the values of every row, the header first
+    """
+    return csv.reader(iter_decoded_lines(file_path, encoding=encoding, errors=errors, bad_lines=bad_lines),
+                      delimiter=delimiter)
@@ -0,0 +1,183 @@
+import difflib
+import fnmatch
+import os
+import re
+import typing
+
+from my_types import AcceptedFileNames
+
+DEFAULT_DIRECTORY = './files'
+# The extensions read_report_file can read
+REPORT_EXTENSIONS = ('.xlsx', '.xls', '.csv', '.txt', '.tsv')
+
+FilePattern: typing.TypeAlias = typing.Union[str, typing.Pattern[str]]
+
+# Glob patterns, matched case-insensitively against the file name, or compiled regular expressions, searched in it
+FILE_PATTERNS: typing.Dict[AcceptedFileNames, typing.Tuple[FilePattern, ...]] = {
+    'restock_report': ('*restock*',),
+    'inventory_file': ('*inventory*',),
+    'informed_csv': ('*informed*',),
+}
+
+
+def compile_pattern(pattern: FilePattern) -> typing.Pattern[str]:
+    """
+    Compiles a file name pattern
+    :param pattern: A glob pattern or a compiled regular expression
+    :return: A regular expression, a glob matches the whole name ignoring case
+    """
+    if isinstance(pattern, str):
+        return re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+    return pattern
+
+
+def is_report_file(name: str) -> bool:
+    """
+    Checks if a file could be a report, hidden files and the lock files Excel leaves next to open workbooks are not
+    :param name: The name of the file
+    :return: True if the file has a report extension
+    """
+    return not name.startswith(('.', '~$')) and name.lower().endswith(REPORT_EXTENSIONS)
+
+
+class FileManifest:
+    """
+    The report files of a directory tree by report type, listed in a single scan.
+
+    Every file name is matched against the patterns of every report type once, so finding a report is a lookup of the
+    newest match. A report type without a match falls back to the closest file name like find_file always did.
+    The manifest is stale once a file is added to or removed from any of the scanned directories.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY,
+                 patterns: typing.Optional[typing.Mapping[str, typing.Iterable[FilePattern]]] = None):
+        self.directory = directory
+        self.patterns: typing.Dict[str, typing.List[typing.Pattern[str]]] = {
+            file_name: [compile_pattern(pattern) for pattern in file_patterns]
+            for file_name, file_patterns in (FILE_PATTERNS if patterns is None else patterns).items()
+        }
+        # directory -> modification time when it was scanned
+        self._directory_mtimes: typing.Dict[str, int] = {}
+        # (directory, file names) in os.walk order, for the fuzzy fallback
+        self._listing: typing.List[typing.Tuple[str, typing.List[str]]] = []
+        # report type -> (modification time, path) of the newest match
+        self._newest: typing.Dict[str, typing.Tuple[int, str]] = {}
+        self.scan()
+
+    def scan(self) -> typing.NoReturn:
+        """
+        Lists the directory tree and matches every report file against the patterns
+        :return: None
+        """
+        self._directory_mtimes.clear()
+        self._listing.clear()
+        self._newest.clear()
+        # Walked top down like os.walk, but with the directory entries so Windows does not stat every file again
+        pending = [self.directory]
+        while pending:
+            root = pending.pop()
+            try:
+                self._directory_mtimes[root] = os.stat(root).st_mtime_ns
+                with os.scandir(root) as scanned:
+                    entries = list(scanned)
+            except OSError:
+                continue
+            files = []
+            dirs = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dirs.append(entry.path)
+                else:
+                    files.append(entry.name)
+                    self._match(entry)
+            self._listing.append((root, files))
+            pending.extend(reversed(dirs))
+
+    def _match(self, entry: os.DirEntry) -> typing.NoReturn:
+        if not is_report_file(entry.name):
+            return
+        for file_name, patterns in self.patterns.items():
+            if not any(pattern.search(entry.name) for pattern in patterns):
+                continue
+            try:
+                mtime = entry.stat().st_mtime_ns
+            except OSError:
+                return
+            newest = self._newest.get(file_name)
+            # The first file found wins a tie, like the first directory did for the fuzzy match
+            if newest is None or mtime > newest[0]:
+                self._newest[file_name] = (mtime, entry.path)
+
+    @property
+    def is_stale(self) -> bool:
+        """True once a file was added to or removed from a scanned directory, or the directory itself was created"""
+        if not self._directory_mtimes:
+            return os.path.isdir(self.directory)
+        for directory, mtime in self._directory_mtimes.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def matches(self, file_name: str) -> typing.Optional[str]:
+        """
+        Finds the newest file matching the patterns of a report type
+        :param file_name: The report type
+        :return: The path of the file or None when no file matches
+        """
+        newest = self._newest.get(file_name)
+        return newest[1] if newest else None
+
+    def closest(self, file_name: str) -> typing.Optional[str]:
+        """
+        Finds the file whose name is closest to a report type, in the first directory that has a close enough name
+        :param file_name: The report type
+        :return: The path of the file or None when no name is close enough
+        """
+        for root, files in self._listing:
+            if closest_match := difflib.get_close_matches(file_name, files, n=1):
+                return os.path.join(root, closest_match[0])
+        return None
+
+    def find(self, file_name: str) -> typing.Optional[str]:
+        """
+        Finds a report, the newest file matching its patterns or else the closest file name
+        :param file_name: The report type
+        :return: The path of the file or None
+        """
+        return self.matches(file_name) or self.closest(file_name)
+
+
+# directory -> the manifest find_report_file keeps for it
+_MANIFESTS: typing.Dict[str, FileManifest] = {}
+
+
+def get_manifest(directory: str = DEFAULT_DIRECTORY) -> FileManifest:
+    """
+    The manifest of a directory, scanned again once it is stale
+    :param directory: The directory
+    :return: The manifest
+    """
+    key = os.path.abspath(directory)
+    manifest = _MANIFESTS.get(key)
+    if manifest is None:
+        manifest = _MANIFESTS[key] = FileManifest(directory)
+    elif manifest.is_stale:
+        manifest.scan()
+    return manifest
+
+
+def find_report_file(file_name: str, directory: str = DEFAULT_DIRECTORY) -> typing.Optional[str]:
+    """
+    Finds a report in a directory tree
+    :param file_name: The report type
+    :param directory: The directory
+    :return: The path of the newest file matching the report type's patterns, else the closest file name, else None
+    """
+    return get_manifest(directory).find(file_name)
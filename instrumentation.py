@@ -0,0 +1,261 @@
+import contextlib
+import cProfile
+import json
+import os
+import re
+import sys
+import time
+import typing
+import warnings
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+if sys.platform == 'win32':
+    import ctypes
+    from ctypes import wintypes
+
+    class _ProcessMemoryCounters(ctypes.Structure):
+        # PROCESS_MEMORY_COUNTERS of psapi.h
+        _fields_ = [
+            ('cb', wintypes.DWORD),
+            ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t),
+            ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t),
+            ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+    _get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+    _get_current_process.restype = wintypes.HANDLE
+    _get_process_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+    _get_process_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(_ProcessMemoryCounters), wintypes.DWORD]
+    _get_process_memory_info.restype = wintypes.BOOL
+
+
+def _peak_working_set_bytes() -> typing.Optional[int]:
+    counters = _ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    if not _get_process_memory_info(_get_current_process(), ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize
+
+
+def peak_rss_bytes() -> typing.Optional[int]:
+    """
+    The peak resident set size of this process so far, the peak working set on Windows
+    :return: The peak RSS in bytes or None where the platform does not report it
+    """
+    if sys.platform == 'win32':
+        return _peak_working_set_bytes()
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StageRecord:
+    """
+    The wall time and row count of a stage, summed over every time it ran.
+
+    ru_maxrss only ever grows, so the peak RSS of a stage is the peak of the process when the stage last ended, and
+    the memory the stage itself took shows as how far it raised that peak.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows: typing.Optional[int] = None
+        self.cumulative_peak_rss_bytes: typing.Optional[int] = None
+        self.peak_rss_growth_bytes: typing.Optional[int] = None
+
+    @property
+    def rows_per_second(self) -> typing.Optional[float]:
+        if self.rows is None or self.seconds <= 0:
+            return None
+        return self.rows / self.seconds
+
+    def as_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'calls': self.calls,
+            'seconds': round(self.seconds, 6),
+            'rows': self.rows,
+            'rows_per_second': round(self.rows_per_second, 1) if self.rows_per_second is not None else None,
+            'cumulative_peak_rss_bytes': self.cumulative_peak_rss_bytes,
+            'peak_rss_growth_bytes': self.peak_rss_growth_bytes,
+        }
+
+
+class Stage:
+    """A running stage, the code it wraps sets rows once it knows how many it handled"""
+    __slots__ = ('rows',)
+
+    def __init__(self, rows: typing.Optional[int] = None):
+        self.rows = rows
+
+
+class RunRecorder:
+    """
+    Records the stages of a run and writes them as a JSON run report.
+
+    Stages are recorded while the recorder is active, see recording. A stage that runs more than once, like the
+    processors of every output batch, is summed into one record. Stages named in profile run under cProfile and their
+    stats are dumped to a .prof file when the stage ends. Only one profiler can be enabled at a time, so a profiled
+    stage that starts inside another one is not profiled on its own and shows in the stats of the outer stage.
+    """
+
+    def __init__(self, profile: typing.Iterable[str] = (), profile_directory: str = '.'):
+        self.profile = set(profile)
+        self.profile_directory = profile_directory
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.records: typing.Dict[str, StageRecord] = {}
+        self.profile_files: typing.List[str] = []
+        self._profilers: typing.Dict[str, cProfile.Profile] = {}
+        # The name of the profiled stage whose profiler is enabled
+        self._profiling: typing.Optional[str] = None
+
+    def record(self, name: str, seconds: float, rows: typing.Optional[int] = None,
+               peak_rss_before: typing.Optional[int] = None) -> StageRecord:
+        """
+        Adds a run of a stage that was timed elsewhere, like in a worker process
+        :param name: The name of the stage
+        :param seconds: The wall time of the run
+        :param rows: The number of rows the run handled
+        :param peak_rss_before: The peak RSS of this process when the run started, the growth of the peak is only
+            recorded when it is given
+        :return: The record of the stage
+        """
+        stage_record = self.records.get(name)
+        if stage_record is None:
+            stage_record = self.records[name] = StageRecord(name)
+        stage_record.calls += 1
+        stage_record.seconds += seconds
+        if rows is not None:
+            stage_record.rows = (stage_record.rows or 0) + rows
+        stage_record.cumulative_peak_rss_bytes = peak_rss_bytes()
+        if peak_rss_before is not None and stage_record.cumulative_peak_rss_bytes is not None:
+            growth = stage_record.cumulative_peak_rss_bytes - peak_rss_before
+            stage_record.peak_rss_growth_bytes = max(growth, stage_record.peak_rss_growth_bytes or 0)
+        return stage_record
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows: typing.Optional[int] = None) -> typing.Iterator[Stage]:
+        """
+        Times the code run in the with block as a stage
+        :param name: The name of the stage
+        :param rows: The number of rows the stage handles if it is known up front
+        :return: The running stage
+        """
+        running = Stage(rows)
+        profiler = None
+        if name in self.profile and self._profiling is not None:
+            # Enabling a second profiler replaces the first one before Python 3.12 and raises from 3.12 on
+            warnings.warn(f'Stage {name} is not profiled on its own, it runs inside the profiled stage '
+                          f'{self._profiling}', stacklevel=3)
+        elif name in self.profile:
+            # One profiler per stage, so the stats of a stage that runs more than once add up
+            profiler = self._profilers.get(name)
+            if profiler is None:
+                profiler = self._profilers[name] = cProfile.Profile()
+        peak_rss_before = peak_rss_bytes()
+        start = time.perf_counter()
+        if profiler is not None:
+            self._profiling = name
+            profiler.enable()
+        try:
+            yield running
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = None
+            self.record(name, time.perf_counter() - start, running.rows, peak_rss_before)
+            if profiler is not None:
+                self._dump_profile(name, profiler)
+
+    def _dump_profile(self, name: str, profiler: cProfile.Profile) -> typing.NoReturn:
+        safe_name = re.sub(r'[^\w.-]', '_', name)
+        file_path = os.path.join(self.profile_directory,
+                                 f'profile_{safe_name}_{self.started_at.strftime("%Y-%m-%d_%H-%M")}.prof')
+        profiler.dump_stats(file_path)
+        if file_path not in self.profile_files:
+            self.profile_files.append(file_path)
+
+    def as_dict(self) -> dict:
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'seconds': round(time.perf_counter() - self._start, 6),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'stages': [stage_record.as_dict() for stage_record in self.records.values()],
+            'profiles': self.profile_files,
+        }
+
+    def write(self, file_path: typing.Optional[str] = None) -> str:
+        """
+        Writes the run report as JSON
+        :param file_path: The path of the report, defaults to a timestamped file in the working directory
+        :return: The path of the written report
+        """
+        if file_path is None:
+            file_path = f'run_report_{self.started_at.strftime("%Y-%m-%d_%H-%M")}.json'
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
+        print(f'Saved run report as {file_path}')
+        return file_path
+
+
+# The recorder stages are recorded to, None when nothing is recorded
+_ACTIVE_RECORDER: typing.Optional[RunRecorder] = None
+
+
+@contextlib.contextmanager
+def recording(recorder: RunRecorder) -> typing.Iterator[RunRecorder]:
+    """
+    Makes a recorder the one stages are recorded to while the with block runs
+    :param recorder: The recorder
+    :return: The recorder
+    """
+    global _ACTIVE_RECORDER
+    previous, _ACTIVE_RECORDER = _ACTIVE_RECORDER, recorder
+    try:
+        yield recorder
+    finally:
+        _ACTIVE_RECORDER = previous
+
+
+def active_recorder() -> typing.Optional[RunRecorder]:
+    return _ACTIVE_RECORDER
+
+
+def stage(name: str, rows: typing.Optional[int] = None) -> typing.ContextManager[Stage]:
+    """
+    Times a stage on the active recorder, does nothing but hand out a Stage when no recorder is active
+    :param name: The name of the stage
+    :param rows: The number of rows the stage handles if it is known up front
+    :return: A context manager of the running stage
+    """
+    if _ACTIVE_RECORDER is None:
+        return contextlib.nullcontext(Stage(rows))
+    return _ACTIVE_RECORDER.stage(name, rows)
+
+
+def record(name: str, seconds: float, rows: typing.Optional[int] = None) -> typing.NoReturn:
+    """
+    Adds a stage timed elsewhere to the active recorder, if there is one
+    :param name: The name of the stage
+    :param seconds: The wall time of the run
+    :param rows: The number of rows the run handled
+    :return: None
+    """
+    if _ACTIVE_RECORDER is not None:
+        _ACTIVE_RECORDER.record(name, seconds, rows)
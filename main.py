@@ -1,18 +1,106 @@
+import argparse
+import multiprocessing
+import os
+import sys
 import traceback
 
-from common import read_files, find_skus, process_rows, create_output_workbook
+import instrumentation
+from common import read_files, find_skus, process_rows, process_rows_incremental, create_output_workbook, \
+    run_streaming_pipeline, run_marketplaces, find_stored_skus, find_skus_within_budget
+from report_cache import ReportCache
+from report_store import ReportStore, DEFAULT_STORE_PATH
+from run_state import RunState, DEFAULT_STATE_DIRECTORY
 from utils import pick_marketplace
 
 if __name__ == '__main__':
     """
     Main function
     """
+    # Needed for the process pool in the frozen executable
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser()
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--stream', action='store_true',
+                      help='Index the restock report and stream the other reports through the join and into the '
+                           'output, for reports too big to hold in memory')
+    mode.add_argument('--incremental', action='store_true',
+                      help='Only map the SKUs whose rows changed since the previous incremental run of the marketplace')
+    parser.add_argument('--store', action='store_true',
+                        help=f'Load the reports into a SQLite database at {DEFAULT_STORE_PATH} and join them there, '
+                             f'unchanged reports are not read again')
+    parser.add_argument('--memory-budget', type=int, metavar='MIB',
+                        help='Join the reports a hash partition at a time, spilled to temporary files, when they would '
+                             'take more than this many MiB in memory')
+    parser.add_argument('--run-report', action='store_true',
+                        help='Save the wall time, rows per second and peak memory of every stage as a JSON run report')
+    parser.add_argument('--profile', action='append', default=[], metavar='STAGE',
+                        help='Run a stage like read_report:restock_report, find_skus, process_rows, processors or '
+                             'save under cProfile and save its stats, can be given more than once')
+    headless = parser.add_argument_group(
+        'headless', 'Run without prompting: read and index the reports once and save an output workbook for every '
+                    'marketplace given')
+    headless.add_argument('--marketplaces', nargs='+', metavar='ID',
+                          help='The marketplace IDs to save an output workbook for')
+    headless.add_argument('--restock-report', metavar='PATH', help='Defaults to the closest match in ./files')
+    headless.add_argument('--inventory-file', metavar='PATH', help='Defaults to the closest match in ./files')
+    headless.add_argument('--informed-csv', metavar='PATH', help='Defaults to the closest match in ./files')
+    headless.add_argument('--output', metavar='DIRECTORY',
+                          help='The directory the output workbooks and rejects are saved in, defaults to .')
+    headless.add_argument('--workers', type=int,
+                          help='Number of marketplaces written at the same time, defaults to the number of CPUs')
+    args = parser.parse_args()
+    if args.store and args.stream:
+        parser.error('--store cannot be used with --stream')
+    if args.memory_budget is not None and (args.store or args.stream):
+        parser.error('--memory-budget cannot be used with --store or --stream')
+    memory_budget = args.memory_budget * 2 ** 20 if args.memory_budget is not None else None
+    if args.marketplaces is None:
+        if headless_only := [f'--{name.replace("_", "-")}' for name in (
+                'restock_report', 'inventory_file', 'informed_csv', 'output', 'workers')
+                if getattr(args, name) is not None]:
+            parser.error(f'{", ".join(headless_only)} can only be used with --marketplaces')
+    if args.marketplaces is not None:
+        if args.stream:
+            parser.error('--stream cannot be used with --marketplaces')
+        if invalid := [market_place_id for market_place_id in args.marketplaces if not market_place_id.isdigit()]:
+            parser.error(f'invalid marketplace IDs: {", ".join(invalid)}')
+        recorder = instrumentation.RunRecorder(profile=args.profile)
+        with instrumentation.recording(recorder):
+            outputs = run_marketplaces(
+                args.marketplaces, output_directory=args.output or '.', cache=ReportCache(),
+                workers=args.workers or os.cpu_count() or 1,
+                file_paths={'restock_report': args.restock_report, 'inventory_file': args.inventory_file,
+                            'informed_csv': args.informed_csv},
+                state_directory=DEFAULT_STATE_DIRECTORY if args.incremental else None,
+                store=ReportStore() if args.store else None, memory_budget=memory_budget)
+        for output in outputs:
+            print(f'Marketplace {output.market_place_id}: saved {output.rows} rows as {output.output_file}')
+        if args.run_report:
+            recorder.write()
+        sys.exit(0 if outputs else 1)
     try:
         market_place_id = pick_marketplace()
-        files = read_files()
-        matched_row_data = find_skus(*files, market_place_id=market_place_id)
-        output_mapping = process_rows(matched_row_data)
-        create_output_workbook(output_mapping)
+        recorder = instrumentation.RunRecorder(profile=args.profile)
+        with instrumentation.recording(recorder):
+            if args.stream:
+                run_streaming_pipeline(market_place_id=market_place_id, cache=ReportCache())
+            else:
+                if args.store:
+                    matched_row_data = find_stored_skus(ReportStore(), market_place_id=market_place_id)
+                elif memory_budget is not None:
+                    matched_row_data = find_skus_within_budget(memory_budget, market_place_id=market_place_id,
+                                                               cache=ReportCache())
+                else:
+                    files = read_files(cache=ReportCache())
+                    matched_row_data = find_skus(*files, market_place_id=market_place_id)
+                if args.incremental:
+                    output_mapping = process_rows_incremental(matched_row_data,
+                                                              RunState(market_place_id=market_place_id))
+                else:
+                    output_mapping = process_rows(matched_row_data, workers=os.cpu_count() or 1)
+                create_output_workbook(output_mapping, streaming=True)
+        if args.run_report:
+            recorder.write()
     except Exception as error:
         traceback.print_tb(error.__traceback__)
         input("Press enter to exit...")
@@ -0,0 +1,232 @@
+import collections
+import functools
+import typing
+
+from openpyxl.cell import Cell
+
+from column_plan import compile_output_plan
+from my_types import MappedCell, MatchedRow, Processor, Row, Validator
+from processors import BATCH_PROCESSORS, BATCH_VALIDATORS, KEEP_VALUE, NUMBER_VALIDATORS
+from styles import apply_style_to_cells
+from utils import ColumnProjection
+from validation import ValidationReport
+
+# file_name in OUTPUT_MAPPED_CELLS -> key of the matched row data holding that file's row
+ROW_DATA_KEYS = {
+    'restock_report': 'restock_row',
+    'inventory_file': 'inventory_row',
+    'informed_csv': 'informed_row',
+}
+
+
+class MappingPlan:
+    """
+    OUTPUT_MAPPED_CELLS compiled once into flat per-column arrays.
+
+    Every output column has its position, source file, source key, processor and validator resolved up front, so
+    mapping, validating and processing a row never searches the mapping list.
+    """
+
+    def __init__(self, mapped_cells: typing.Sequence[MappedCell]):
+        self.column_names: typing.Tuple[str, ...] = tuple(dict.fromkeys(cell['column_name'] for cell in mapped_cells))
+        positions = {column_name: position for position, column_name in enumerate(self.column_names)}
+        file_names: typing.List[typing.Optional[str]] = [None] * len(self.column_names)
+        source_keys: typing.List[typing.Optional[str]] = [None] * len(self.column_names)
+        processors: typing.List[Processor] = [None] * len(self.column_names)
+        validators: typing.List[Validator] = [None] * len(self.column_names)
+        # (column name, row data key, source key) in mapping order, a later mapping of a column wins
+        self._sources: typing.List[typing.Tuple[str, str, str]] = []
+        # (column name, row key, validator) for every mapping with a validator
+        self._validated: typing.List[typing.Tuple[str, typing.Optional[str], typing.Callable]] = []
+        output_plan = compile_output_plan()
+        for cell in mapped_cells:
+            column_name = cell['column_name']
+            position = positions[column_name]
+            if (file_name := cell.get('file_name')) is not None:
+                source_key = cell['original_column_name']
+                if source_key is None:
+                    source_key = column_name
+                file_names[position] = file_name
+                source_keys[position] = source_key
+                self._sources.append((column_name, ROW_DATA_KEYS[file_name], source_key))
+            if (processor := cell.get('processor')) and processors[position] is None:
+                # Only the first processor of a column ever ran
+                processors[position] = processor
+            if validator := cell.get('validator'):
+                validators[position] = validator
+                self._validated.append((column_name, output_plan.resolve(column_name), validator))
+        self.file_names: typing.Tuple[typing.Optional[str], ...] = tuple(file_names)
+        self.source_keys: typing.Tuple[typing.Optional[str], ...] = tuple(source_keys)
+        self.processors: typing.Tuple[Processor, ...] = tuple(processors)
+        self.validators: typing.Tuple[Validator, ...] = tuple(validators)
+        self._processed_positions = [position for position, processor in enumerate(processors) if processor]
+        self.batch_processors = tuple(BATCH_PROCESSORS.get(processor) for processor in processors)
+        self._template = dict.fromkeys(self.column_names, '')
+
+    def projection(self, file_name: str) -> ColumnProjection:
+        """
+        The columns of a report the plan reads, plus its SKU and marketplace columns
+        The columns mapped to an output column with a number validator are read as numbers.
+        :param file_name: The report, a file_name of OUTPUT_MAPPED_CELLS
+        :return: The projection to read the report with
+        """
+        sources = [(source_key, validator) for source_file_name, source_key, validator
+                   in zip(self.file_names, self.source_keys, self.validators) if source_file_name == file_name]
+        return ColumnProjection(
+            (source_key for source_key, _ in sources),
+            numeric=(source_key for source_key, validator in sources if validator in NUMBER_VALIDATORS),
+        )
+
+    def new_row(self) -> dict:
+        """
+        Creates an empty output row
+        :return: A dictionary with the column names as keys and empty strings as values
+        """
+        return self._template.copy()
+
+    def map_row(self, row_data: MatchedRow) -> dict:
+        """
+        Maps a row to the output format
+        :param row_data: The row to map
+        :return: A dictionary of the mapped row
+        """
+        output_row_data = self._template.copy()
+        for column_name, row_data_key, source_key in self._sources:
+            source_row = row_data[row_data_key]
+            if source_key in source_row:
+                output_row_data[column_name] = source_row[source_key]
+        return output_row_data
+
+    def validate_row(self, row: Row) -> bool:
+        """
+        Validates a mapped row
+        :param row: The row to validate
+        :return: bool indicating if the row is valid meaning all cells in the row are valid
+        """
+        is_row_valid = True
+        for column_name, key, validator in self._validated:
+            cell = row.get(key) if key is not None else None
+            try:
+                is_valid = validator(cell) if cell is not None else False
+                if not is_valid and cell:
+                    print(f'Invalid cell {column_name} with value: {cell} skipping...')
+                    is_row_valid = False
+            except Exception as error:
+                print(f'Error validating {column_name} with error: {error}')
+                is_row_valid = False
+        return is_row_valid
+
+    def validate_batch(self, rows: typing.Sequence[Row],
+                       report: typing.Optional[ValidationReport] = None) -> typing.List[bool]:
+        """
+        Validates mapped rows a column at a time, keeping and dropping the same rows as validate_row
+        :param rows: The rows to validate
+        :param report: Collects the invalid cells of the dropped rows instead of printing them
+        :return: bool for every row indicating if all cells in the row are valid
+        """
+        valid_rows = [True] * len(rows)
+        sku_key = self.column_names[0] if self.column_names else None
+        for column_name, key, validator in self._validated:
+            values = [row.get(key) for row in rows] if key is not None else [None] * len(rows)
+            errors: typing.Dict[int, Exception] = {}
+            try:
+                batch_validator = BATCH_VALIDATORS.get(validator)
+                results = batch_validator(values) if batch_validator is not None else None
+            except Exception:
+                # Let the validator report the value it fails on
+                results = None
+            if results is None:
+                results = []
+                for index, value in enumerate(values):
+                    try:
+                        results.append(validator(value) if value is not None else False)
+                    except Exception as error:
+                        results.append(False)
+                        errors[index] = error
+            for index, is_valid in enumerate(results):
+                if is_valid:
+                    continue
+                value = values[index]
+                if index in errors:
+                    reason = f'error: {errors[index]}'
+                elif value:
+                    reason = f'failed {getattr(validator, "__name__", "validation")}'
+                else:
+                    # An empty cell is not validated
+                    continue
+                valid_rows[index] = False
+                if report is not None:
+                    report.add(rows[index].get(sku_key), column_name, value, reason)
+        if report is not None:
+            report.rejected_rows += valid_rows.count(False)
+        return valid_rows
+
+    def process_cell(self, mapped_row: dict, cell: Cell, position: int) -> typing.Optional[bool]:
+        """
+        Runs the processor of a column on a cell
+        :param mapped_row: the Mapped but unprocessed row
+        :param cell: the cell to process
+        :param position: the position of the column in column_names
+        :return: True if processed, False if the processor failed and None if the column has no processor
+        """
+        processor = self.processors[position]
+        if processor is None:
+            return None
+        try:
+            processor(mapped_row, cell)
+            return True
+        except Exception as error:
+            print(
+                f'Error processing cell {self.column_names[position]} with value {cell.value} '
+                f'(coordinates: {cell.coordinate}) with error: {error} Skipping...')
+            return False
+
+    def process_cells(self, mapped_row: dict, cells: typing.Sequence[Cell]) -> typing.NoReturn:
+        """
+        Runs every column processor on a row of cells in column_names order
+        :param mapped_row: the Mapped but unprocessed row
+        :param cells: the cells of the row
+        :return: None
+        """
+        for position in self._processed_positions:
+            if position < len(cells):
+                self.process_cell(mapped_row, cells[position], position)
+
+    def process_batch(self, mapped_rows: typing.Sequence[dict],
+                      cells_rows: typing.Sequence[typing.Sequence[Cell]]) -> typing.NoReturn:
+        """
+        Runs every column processor on a batch of rows a column at a time, using the batch processor of a column
+        when it has one and its per-cell processor otherwise
+        :param mapped_rows: the Mapped but unprocessed rows
+        :param cells_rows: the cells of every row
+        :return: None
+        """
+        for position in self._processed_positions:
+            batch_processor = self.batch_processors[position]
+            cells = [row_cells[position] for row_cells in cells_rows if position < len(row_cells)]
+            if batch_processor is None or len(cells) != len(mapped_rows):
+                for mapped_row, cell in zip(mapped_rows, cells):
+                    self.process_cell(mapped_row, cell, position)
+                continue
+            cells_by_style: typing.Dict[str, typing.List[Cell]] = collections.defaultdict(list)
+            for cell, processed_cell in zip(cells, batch_processor(mapped_rows, [cell.value for cell in cells])):
+                if processed_cell.style is not None:
+                    cells_by_style[processed_cell.style].append(cell)
+                if processed_cell.error is not None:
+                    print(
+                        f'Error processing cell {self.column_names[position]} with value {cell.value} '
+                        f'(coordinates: {cell.coordinate}) with error: {processed_cell.error} Skipping...')
+                elif processed_cell.value is not KEEP_VALUE:
+                    cell.value = processed_cell.value
+            for style, styled_cells in cells_by_style.items():
+                apply_style_to_cells(styled_cells, style)
+
+
+@functools.lru_cache(maxsize=None)
+def get_mapping_plan() -> MappingPlan:
+    """
+    Compiles OUTPUT_MAPPED_CELLS the first time it is called
+    :return: The mapping plan for this run
+    """
+    from cell_mapping import OUTPUT_MAPPED_CELLS
+    return MappingPlan(OUTPUT_MAPPED_CELLS)
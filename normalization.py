@@ -0,0 +1,84 @@
+import functools
+import typing
+
+# Distinct header and column names a run normalizes, a few reports with a few dozen columns each
+NORMALIZED_KEY_CACHE_SIZE = 4096
+
+
+def sanitize_names(name: typing.Any) -> str:
+    """
+    Sanitizes a name by removing all spaces around and special characters.
+    :param name: The name to sanitize will be cast to a string
+    :return:  The sanitized name
+    """
+    name = name or ''
+    sanitized_name = str(name)
+
+    if not sanitized_name:
+        return ''
+    if sanitized_name[0] == '\xa0':
+        sanitized_name = sanitized_name.lstrip("\xa0")
+    if sanitized_name[-1] == '\xa0':
+        sanitized_name = sanitized_name.rstrip('\xa0')
+    if "\xa0" in sanitized_name:
+        sanitized_name = sanitized_name.replace("\xa0", " ")
+    if sanitized_name[0] == " ":
+        sanitized_name = sanitized_name.lstrip(" ")
+    return sanitized_name
+
+
+def clean_value(value: typing.Optional[str]) -> str:
+    """
+    Remove all spaces and newlines from the value.
+    :param value: The value to clean
+    :return: The cleaned value
+    """
+    if value is None:
+        return ''
+    return value.strip().replace("\n", "") if isinstance(value, str) else value
+
+
+def sanitize_cell_value(value: typing.Optional[str]) -> str:
+    """
+    Sanitizes a cell value by removing all spaces and newlines
+    :param value: The value to sanitize
+    :return: The sanitized value
+    """
+    return clean_value(sanitize_names(value))
+
+
+def normalize_sku(value: typing.Any) -> str:
+    """
+    Normalizes a SKU the way the reports are joined on, lower cased without the spaces, non-breaking spaces and
+    newlines around it
+
+    Gives the same result as chaining sanitize_names, clean_value and lower, but a string that does not start with a
+    non-breaking space is normalized in one pass: the non-breaking spaces become spaces, which strip removes around the
+    value like it removes them after sanitize_names. Anything else takes the chained path, including its errors.
+    :param value: The SKU
+    :return: The normalized SKU
+    """
+    if value.__class__ is str and value and value[0] != '\xa0':
+        return value.replace('\xa0', ' ').strip().replace('\n', '').lower()
+    return sanitize_cell_value(value).lower()
+
+
+def lower_clean_cell_value(value: typing.Optional[str]) -> str:
+    """
+    Sanitizes a cell value by removing all spaces and newlines and lower casing the value
+
+    :param value: The value to sanitize
+    :return:  The sanitized value
+    """
+    return normalize_sku(value)
+
+
+@functools.lru_cache(maxsize=NORMALIZED_KEY_CACHE_SIZE)
+def normalize_key(name: typing.Hashable) -> str:
+    """
+    Normalizes a header or column name like lower_clean_cell_value, remembering the most recent names
+    A run only sees a few distinct names but compares them over and over, so most calls are a cache hit.
+    :param name: The header or column name
+    :return: The normalized name
+    """
+    return normalize_sku(name)
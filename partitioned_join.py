@@ -0,0 +1,160 @@
+import contextlib
+import math
+import os
+import pickle
+import typing
+import zlib
+
+from my_types import MatchedRow, Row
+from normalization import normalize_sku
+from report_table import ReportTable
+from sku_index import SkuIndex, join_sku_indexes
+from utils import is_sku_column
+
+# Bytes a report takes in memory, read with a column projection and indexed, per byte of its file. Workbooks are
+# zipped so they grow more than delimited files.
+WORKING_SET_FACTORS = {'.xlsx': 10, '.xls': 10}
+DEFAULT_WORKING_SET_FACTOR = 8
+# A partition is sized to half the budget, the matched rows of the partitions joined before it are held too
+PARTITION_HEADROOM = 2
+MAX_PARTITIONS = 256
+# Number of rows buffered per partition before they are written to its file
+SPILL_BATCH_SIZE = 1_000
+
+
+def estimate_working_set(file_paths: typing.Iterable[str]) -> int:
+    """
+    Estimates the memory the reports take once they are read and indexed
+    :param file_paths: The paths of the reports
+    :return: The estimate in bytes
+    """
+    return sum(os.path.getsize(file_path) * WORKING_SET_FACTORS.get(os.path.splitext(file_path)[1].lower(),
+                                                                    DEFAULT_WORKING_SET_FACTOR)
+               for file_path in file_paths)
+
+
+def partition_count_for(working_set: int, memory_budget: int) -> int:
+    """
+    The number of partitions that keeps every partition of the reports within a memory budget
+    :param working_set: The estimated memory of the reports in bytes
+    :param memory_budget: The memory budget in bytes
+    :return: The number of partitions, 1 when the reports fit the budget
+    """
+    if working_set <= memory_budget:
+        return 1
+    return min(MAX_PARTITIONS, math.ceil(working_set * PARTITION_HEADROOM / max(memory_budget, 1)))
+
+
+def partition_of(sku: str, partition_count: int) -> int:
+    """
+    The partition of a normalized sku, the same in every process unlike hash
+    :param sku: The normalized sku
+    :param partition_count: The number of partitions
+    :return: The partition
+    """
+    return zlib.crc32(sku.encode('utf-8')) % partition_count
+
+
+class SpilledReport:
+    """
+    The rows of a report hash-partitioned by normalized sku into files, so a partition can be read and indexed on its
+    own.
+
+    A row is written to the partition of every sku it holds, once per partition, and keeps its order within it. Every
+    row of a sku is in the same partition, so the index of a partition finds the same first row the index of the
+    whole report does.
+    """
+
+    def __init__(self, directory: str, name: str, partition_count: int):
+        self.partition_count = partition_count
+        self.paths = [os.path.join(directory, f'{name}-{partition}.pickle') for partition in range(partition_count)]
+        self.header: typing.Tuple[str, ...] = ()
+        self.row_count = 0
+
+    def spill(self, rows: typing.Iterable[Row]) -> 'SpilledReport':
+        """
+        Writes the rows of the report to the files of their partitions, only a batch of rows per partition is held
+        :param rows: The rows of the report, TableRows or dictionaries with the same keys, iterated once
+        :return: The report
+        """
+        batches: typing.List[typing.List[tuple]] = [[] for _ in range(self.partition_count)]
+        sku_columns: typing.Optional[typing.List[str]] = None
+        with contextlib.ExitStack() as stack:
+            files = [stack.enter_context(open(path, 'wb')) for path in self.paths]
+            for row in rows:
+                if sku_columns is None:
+                    self.header = getattr(row, 'header', None) or tuple(row.keys())
+                    sku_columns = [key for key in row.keys() if is_sku_column(key)]
+                values = row.values_tuple if hasattr(row, 'values_tuple') else tuple(row.values())
+                for partition in {partition_of(normalize_sku(row[sku_column]), self.partition_count)
+                                  for sku_column in sku_columns}:
+                    batch = batches[partition]
+                    batch.append(values)
+                    if len(batch) >= SPILL_BATCH_SIZE:
+                        pickle.dump(batch, files[partition], protocol=pickle.HIGHEST_PROTOCOL)
+                        batch.clear()
+                self.row_count += 1
+            for file, batch in zip(files, batches):
+                if batch:
+                    pickle.dump(batch, file, protocol=pickle.HIGHEST_PROTOCOL)
+        return self
+
+    def partition(self, partition: int) -> ReportTable:
+        """
+        Reads the rows of a partition
+        :param partition: The partition
+        :return: The rows in report order
+        """
+        table = ReportTable(self.header)
+        with open(self.paths[partition], 'rb') as f:
+            while True:
+                try:
+                    batch = pickle.load(f)
+                except EOFError:
+                    return table
+                for values in batch:
+                    table.append(values)
+
+
+class PartitionedReports(typing.NamedTuple):
+    """The restock skus and the spilled reports, every marketplace is joined from the same partitions"""
+    skus: typing.List[str]
+    restock_report: SpilledReport
+    inventory_file: SpilledReport
+    informed_csv: SpilledReport
+
+    def join(self, market_place_id: typing.Optional[str] = None) -> typing.Dict[str, MatchedRow]:
+        """
+        Joins the reports one partition at a time, only the indexes of one partition are held at a time
+        :param market_place_id: marketplace id
+        :return: Dict of matched rows, the same join_sku_indexes returns for the whole reports
+        """
+        return join_partitions(self.skus, self.restock_report, self.inventory_file, self.informed_csv,
+                               market_place_id=market_place_id)
+
+
+def join_partitions(skus: typing.Iterable[str], restock_report: SpilledReport, inventory_file: SpilledReport,
+                    informed_csv: SpilledReport, *,
+                    market_place_id: typing.Optional[str] = None) -> typing.Dict[str, MatchedRow]:
+    """
+    Joins three spilled reports on the restock skus, indexing and joining them one partition at a time
+    :param skus: The restock skus
+    :param restock_report: The restock report
+    :param inventory_file: The inventory file
+    :param informed_csv: The informed csv, the only one filtered by marketplace
+    :param market_place_id: marketplace id
+    :return: Dict of matched rows in restock sku order, a report without a row for a sku leaves it empty
+    """
+    wanted = dict.fromkeys(normalize_sku(sku) for sku in skus)
+    partition_count = restock_report.partition_count
+    partition_skus: typing.List[typing.List[str]] = [[] for _ in range(partition_count)]
+    for sku in wanted:
+        partition_skus[partition_of(sku, partition_count)].append(sku)
+    found_rows: typing.Dict[str, MatchedRow] = {}
+    for partition, skus_of_partition in enumerate(partition_skus):
+        if skus_of_partition:
+            found_rows.update(join_sku_indexes(
+                skus_of_partition, SkuIndex(restock_report.partition(partition)),
+                SkuIndex(inventory_file.partition(partition)), SkuIndex(informed_csv.partition(partition)),
+                market_place_id=market_place_id))
+    return {sku: found_rows[sku] for sku in wanted if sku in found_rows}
@@ -1,11 +1,17 @@
-import contextlib
 import typing
 
 from openpyxl.cell import Cell
-from openpyxl.styles import PatternFill
 
-from my_types import Row, GREEN_COLOR, RED_COLOR, ORANGE_COLOR, MatchedRow
-from utils import lower_clean_cell_value, generate_mapped_cell_dict
+from column_plan import column_plan_for, compile_output_plan
+from column_types import InvalidNumber, is_empty, to_number
+from my_types import Row, MatchedRow
+from sku_index import SkuIndex
+from styles import apply_style, NUMBER_STYLE, GREEN_STYLE, RED_STYLE, ORANGE_STYLE
+
+# Marks a batch processor result that leaves the mapped value in the cell
+KEEP_VALUE = object()
+# Column name -> key of the column in the rows map_row builds, resolved once through the output plan
+_OUTPUT_KEYS: typing.Dict[str, typing.Optional[str]] = {}
 
 
 def find_all_rows_with_matching_skus(skus: typing.List[str], rows: typing.Iterable[Row], *,
@@ -16,28 +22,9 @@ def find_all_rows_with_matching_skus(skus: typing.List[str], rows: typing.Iterab
     :param skus: A list of skus
     :param rows: A list of rows
     :param market_place_id: A marketplace id to filter results to
-    :return:
-    """
-    unfounded_skus = {
-        lower_clean_cell_value(sku): True for sku in skus
-    }
-    rows = list(rows)
-    cols = []
-    found_rows = {}
-    for row in rows:
-        if market_place_id:
-            row_market_place_id = get_cell(row, 'MARKETPLACE_ID')
-            if row_market_place_id and row_market_place_id != market_place_id:
-                continue
-        if not cols:
-            cols = [key for key in row.keys() if 'sku' in key.lower()]
-        for sku_cell in cols:
-            cell_value = lower_clean_cell_value(row[sku_cell])
-            if cell_value in unfounded_skus:
-                unfounded_skus.pop(cell_value)
-                found_rows[cell_value] = row
-
-    return found_rows
+    :return: A dictionary of normalized sku to the first row containing it
+    """
+    return SkuIndex(rows).match(skus, market_place_id=market_place_id)
 
 
 def find_restock_skus(rows: typing.Iterable[Row]) -> typing.List[str]:
@@ -59,17 +46,27 @@ def find_all_columns_headers(headers: typing.List[str], column_name: str) -> typ
     return [key for key in headers if column_name.lower() in key.lower()]
 
 
+def _output_key(column_name: str) -> typing.Optional[str]:
+    try:
+        return _OUTPUT_KEYS[column_name]
+    except KeyError:
+        key = _OUTPUT_KEYS[column_name] = compile_output_plan().resolve(column_name)
+        return key
+
+
 def get_cell(row: Row, column_name: str) -> typing.Optional[str]:
     """
     Takes a Row and finds the column with the
     value column_name and returns the value of the cell in that column.
+    A row built by map_row is read by the key the output plan resolved, other rows through the plan of their headers.
     :param row: A row
     :param column_name: The name of the column to find
     :return: The value of the cell in the column or None if the column is not found
     """
-    for cell in row:
-        if lower_clean_cell_value(cell) == lower_clean_cell_value(column_name):
-            return row[cell]
+    key = _output_key(column_name)
+    if key is not None and key in row:
+        return row[key]
+    return column_plan_for(row).get(row, column_name)
 
 
 def calculate_days_on_hand(row: Row, cell: Cell) -> typing.NoReturn:
@@ -81,12 +78,12 @@ def calculate_days_on_hand(row: Row, cell: Cell) -> typing.NoReturn:
     """
     total_units = get_cell(row, 'Total Units')
     units_sold = get_cell(row, 'Units Sold Last 30 Days')
-    cell.number_format = '0.00'
+    apply_style(cell, NUMBER_STYLE)
     if total_units is None or units_sold is None:
         cell.value = ''
         return
-    total_units = float(total_units)
-    units_sold = float(units_sold)
+    total_units = to_number(total_units)
+    units_sold = to_number(units_sold)
 
     if total_units == 0 and units_sold == 0:
         cell.value = 1
@@ -109,22 +106,21 @@ def calculate_buy_box_color(row: Row, cell: Cell) -> typing.NoReturn:
     buy_box_price_cell = get_cell(row, 'BUY_BOX_PRICE')
     min_price = get_cell(row, 'MIN_PRICE')
     max_price = get_cell(row, 'MAX_PRICE')
-    if not min_price or not max_price or not buy_box_price_cell:
+    if is_empty(min_price) or is_empty(max_price) or is_empty(buy_box_price_cell):
         return
-    buy_box_price = float(buy_box_price_cell)
-    min_price = float(min_price)
-    max_price = float(max_price)
+    buy_box_price = to_number(buy_box_price_cell)
+    min_price = to_number(min_price)
+    max_price = to_number(max_price)
     # if min_price < buy_box_price < max_price colour green
     if min_price < buy_box_price < max_price:
-        color = GREEN_COLOR
+        style = GREEN_STYLE
     # if min_price >= buy_box_price colour red
     elif min_price >= buy_box_price:
-        color = RED_COLOR
+        style = RED_STYLE
     # else color orange
     else:
-        color = ORANGE_COLOR
-    cell.fill = PatternFill(start_color=color, end_color=color, fill_type='solid')
-    cell.number_format = '0.00'
+        style = ORANGE_STYLE
+    apply_style(cell, style)
 
 
 def apply_number_style(_: Row, cell: Cell) -> typing.NoReturn:
@@ -134,17 +130,137 @@ def apply_number_style(_: Row, cell: Cell) -> typing.NoReturn:
     :param cell: The cell to apply the style to
     :return: None
     """
-    cell.number_format = '0.00'
-    if cell.value:
+    apply_style(cell, NUMBER_STYLE)
+    if cell.value and cell.value.__class__ is not float:
         cell.value = float(cell.value)
 
 
+class ProcessedCell(typing.NamedTuple):
+    """The result of a batch processor for one cell"""
+    value: typing.Any = KEEP_VALUE  # KEEP_VALUE leaves the mapped value in the cell
+    style: typing.Optional[str] = None  # A style name from styles.CELL_STYLES
+    error: typing.Optional[Exception] = None  # The error the per-cell processor would have raised
+
+
+def calculate_days_on_hand_batch(total_units: typing.Sequence[typing.Any],
+                                 units_sold: typing.Sequence[typing.Any]) -> typing.List[ProcessedCell]:
+    """
+    Calculates the days on hand for whole columns in one pass, with the same results as calculate_days_on_hand
+    :param total_units: The Total Units column, None where the row has no such column
+    :param units_sold: The Units Sold Last 30 Days column, None where the row has no such column
+    :return: The processed cells
+    """
+    results = []
+    append = results.append
+    for total, sold in zip(total_units, units_sold):
+        if total is None or sold is None:
+            append(ProcessedCell('', NUMBER_STYLE))
+            continue
+        try:
+            total = to_number(total)
+            sold = to_number(sold)
+        except (TypeError, ValueError) as error:
+            append(ProcessedCell(style=NUMBER_STYLE, error=error))
+            continue
+        if sold == 0:
+            append(ProcessedCell(1 if total == 0 else "Infinity", NUMBER_STYLE))
+        else:
+            append(ProcessedCell((total / sold) * 30, NUMBER_STYLE))
+    return results
+
+
+def calculate_buy_box_color_batch(buy_box_prices: typing.Sequence[typing.Any],
+                                  min_prices: typing.Sequence[typing.Any],
+                                  max_prices: typing.Sequence[typing.Any]) -> typing.List[ProcessedCell]:
+    """
+    Classifies whole columns of buy box prices in one pass, with the same results as calculate_buy_box_color
+    :param buy_box_prices: The BUY_BOX_PRICE column
+    :param min_prices: The MIN_PRICE column
+    :param max_prices: The MAX_PRICE column
+    :return: The processed cells
+    """
+    results = []
+    append = results.append
+    unchanged = ProcessedCell()
+    for buy_box_price, min_price, max_price in zip(buy_box_prices, min_prices, max_prices):
+        if is_empty(min_price) or is_empty(max_price) or is_empty(buy_box_price):
+            append(unchanged)
+            continue
+        try:
+            buy_box_price = to_number(buy_box_price)
+            min_price = to_number(min_price)
+            max_price = to_number(max_price)
+        except (TypeError, ValueError) as error:
+            append(ProcessedCell(error=error))
+            continue
+        if min_price < buy_box_price < max_price:
+            append(ProcessedCell(style=GREEN_STYLE))
+        elif min_price >= buy_box_price:
+            append(ProcessedCell(style=RED_STYLE))
+        else:
+            append(ProcessedCell(style=ORANGE_STYLE))
+    return results
+
+
+def apply_number_style_batch(values: typing.Sequence[typing.Any]) -> typing.List[ProcessedCell]:
+    """
+    Converts a whole column to numbers in one pass, with the same results as apply_number_style
+    :param values: The values of the column
+    :return: The processed cells
+    """
+    results = []
+    append = results.append
+    for value in values:
+        if not value:
+            append(ProcessedCell(style=NUMBER_STYLE))
+            continue
+        if value.__class__ is float:
+            # Number columns are read as floats
+            append(ProcessedCell(value, NUMBER_STYLE))
+            continue
+        try:
+            append(ProcessedCell(float(value), NUMBER_STYLE))
+        except (TypeError, ValueError) as error:
+            append(ProcessedCell(style=NUMBER_STYLE, error=error))
+    return results
+
+
+def get_column(rows: typing.Sequence[Row], column_name: str) -> typing.List[typing.Optional[str]]:
+    """
+    Reads a column from every row
+    :param rows: The rows
+    :param column_name: The name of the column to read
+    :return: The value of the column for every row, None for rows without the column
+    """
+    key = _output_key(column_name)
+    if key is None:
+        return [column_plan_for(row).get(row, column_name) for row in rows]
+    return [row[key] if key in row else column_plan_for(row).get(row, column_name) for row in rows]
+
+
+# Batch version of each per-cell processor, called with the mapped rows and the values of the processed column.
+# Processors without one run cell by cell.
+BATCH_PROCESSORS: typing.Dict[typing.Callable, typing.Callable[[typing.Sequence[Row], typing.Sequence[typing.Any]],
+                                                               typing.List[ProcessedCell]]] = {
+    calculate_days_on_hand: lambda rows, _: calculate_days_on_hand_batch(
+        get_column(rows, 'Total Units'), get_column(rows, 'Units Sold Last 30 Days')),
+    calculate_buy_box_color: lambda rows, _: calculate_buy_box_color_batch(
+        get_column(rows, 'BUY_BOX_PRICE'), get_column(rows, 'MIN_PRICE'), get_column(rows, 'MAX_PRICE')),
+    apply_number_style: lambda _, values: apply_number_style_batch(values),
+}
+
+
 def validate_number(value: typing.Any) -> bool:
     """
     Validates that a value is a number
     :param value: The value to validate
     :return: True if the value is a number, False otherwise
     """
+    # Number columns are parsed when they are read
+    if value.__class__ is float:
+        return True
+    if isinstance(value, InvalidNumber):
+        return False
     try:
         float(value)
         return True
@@ -152,26 +268,47 @@ def validate_number(value: typing.Any) -> bool:
         return False
 
 
-def process_row(mapped_row: dict, cell: Cell, column_name: str) -> typing.NoReturn:
+def validate_number_batch(values: typing.Sequence[typing.Any]) -> typing.List[bool]:
+    """
+    Validates a column of values like validate_number, checking every distinct value once
+    :param values: The values to validate, None is not a number
+    :return: True for every value that is a number, False otherwise
+    """
+    seen: typing.Dict[typing.Any, bool] = {None: False}
+    results = []
+    for value in values:
+        if value.__class__ is float:
+            results.append(True)
+            continue
+        is_valid = seen.get(value)
+        if is_valid is None:
+            is_valid = seen[value] = validate_number(value)
+        results.append(is_valid)
+    return results
+
+
+# validator -> validator of a whole column of values
+BATCH_VALIDATORS: typing.Dict[typing.Callable, typing.Callable[[typing.Sequence[typing.Any]], typing.List[bool]]] = {
+    validate_number: validate_number_batch,
+}
+
+# The columns validated with these are read as numbers, see ColumnProjection
+NUMBER_VALIDATORS: typing.FrozenSet[typing.Callable] = frozenset({validate_number})
+
+
+def process_row(mapped_row: dict, cell: Cell, column_name: str) -> typing.Optional[bool]:
     """
     Processes a row
     :param mapped_row: the Mapped but unprocessed row
     :param cell: the cell to process
     :param column_name: the name of the column to process
-    :return: None
+    :return: True if processed, False if the processor failed and None if the column has no processor
     """
-    from cell_mapping import OUTPUT_MAPPED_CELLS
-    for mapped_cell in [mapped_cell for mapped_cell in OUTPUT_MAPPED_CELLS if
-                        mapped_cell['column_name'] == column_name]:
-        if processor := mapped_cell.get('processor'):
-            try:
-                processor(mapped_row, cell)
-                return True
-            except Exception as error:
-                print(
-                    f'Error processing cell {column_name} with value {cell.value} (coordinates: {cell.coordinate})'
-                    f' with error: {error} Skipping...')
-                return False
+    from mapping_plan import get_mapping_plan
+    plan = get_mapping_plan()
+    if column_name not in plan.column_names:
+        return None
+    return plan.process_cell(mapped_row, cell, plan.column_names.index(column_name))
 
 
 def validate_row(row: Row) -> bool:
@@ -180,13 +317,24 @@ def validate_row(row: Row) -> bool:
     :param row: The row to validate
     :return: bool indicating if the row is valid meaning all cells in the row are valid
     """
+    from mapping_plan import get_mapping_plan
+    plan = get_mapping_plan()
+    if tuple(row) != plan.column_names:
+        # Not a row built by map_row, resolve its columns through its own headers
+        return _validate_unmapped_row(row)
+    return plan.validate_row(row)
+
+
+def _validate_unmapped_row(row: Row) -> bool:
+    """Validates a row that was not built by map_row by resolving each mapped column through its headers"""
     from cell_mapping import OUTPUT_MAPPED_CELLS
+    plan = column_plan_for(row)
     valid_cells = []
     for mapped_cell in OUTPUT_MAPPED_CELLS:
         column_name = mapped_cell['column_name']
         if validator := mapped_cell.get('validator'):
             try:
-                is_valid = validator(cell) if (cell := get_cell(row, column_name)) is not None else False
+                is_valid = validator(cell) if (cell := plan.get(row, column_name)) is not None else False
                 if not is_valid and cell:
                     print(f'Invalid cell {column_name} with value: {cell} skipping...')
                     valid_cells.append(False)
@@ -206,25 +354,5 @@ def map_row(
     :param row_data: The row to map
     :return: A dictionary of the mapped row
     """
-    from cell_mapping import OUTPUT_MAPPED_CELLS
-    output_row_data = generate_mapped_cell_dict()
-    restock_row = row_data['restock_row']
-    inventory_row = row_data['inventory_row']
-    informed_row = row_data['informed_row']
-    mapping = {
-        'restock_report': restock_row,
-        'inventory_file': inventory_row,
-        'informed_csv': informed_row
-    }
-
-    for cell in OUTPUT_MAPPED_CELLS:
-        file_name = cell.get('file_name')
-        if file_name is None:
-            continue
-        original_column_name = cell['original_column_name']
-        if original_column_name is None:
-            original_column_name = cell['column_name']
-        with contextlib.suppress(KeyError):
-            output_row_data[cell['column_name']] = mapping[file_name][original_column_name]
-    # We have to wait for the row to be completely mapped so that we can process it
-    return output_row_data
+    from mapping_plan import get_mapping_plan
+    return get_mapping_plan().map_row(row_data)
@@ -0,0 +1,177 @@
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+import typing
+
+from report_table import ReportTable
+
+# Bump when the parsed rows a reader produces change so old entries are not reused
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIRECTORY = os.path.join('.', '.report_cache')
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """
+    Hashes the content of a file
+    :param file_path: The path to the file
+    :return: The hex digest of the content
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ReportCache:
+    """
+    An on-disk cache of parsed report rows.
+
+    Entries are pickled as one header tuple and a list of value tuples and named by the content hash of the source
+    file. A small link file named after the path, size and mtime of the source points at its entry, so an unchanged
+    file is found without reading it and a file that only has a new mtime is found after hashing it. Entries are
+    evicted least recently used first once they take more than max_bytes.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Stat key -> content hash of the files load missed, so store does not hash them again
+        self._missed_hashes: typing.Dict[str, str] = {}
+
+    def _stat_key(self, file_path: str, variant: str) -> str:
+        stat = os.stat(file_path)
+        key = f'{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}|{CACHE_VERSION}|{variant}'
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=20).hexdigest()
+
+    def _entry_path(self, content_hash: str, variant: str) -> str:
+        variant_hash = hashlib.blake2b(variant.encode('utf-8'), digest_size=8).hexdigest()
+        return os.path.join(self.directory, f'{content_hash}-{variant_hash}-v{CACHE_VERSION}.pickle')
+
+    def _link_path(self, stat_key: str) -> str:
+        return os.path.join(self.directory, f'{stat_key}.link')
+
+    def _write_atomic(self, path: str, data: bytes) -> typing.NoReturn:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            raise
+
+    def _load_entry(self, entry_path: str) -> typing.Optional[ReportTable]:
+        try:
+            with open(entry_path, 'rb') as f:
+                header, values = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        # Mark the entry as recently used
+        with contextlib.suppress(OSError):
+            os.utime(entry_path)
+        return ReportTable(header, values)
+
+    def contains(self, file_path: str, variant: str = '') -> bool:
+        """
+        Checks if an unchanged file is cached without reading the file
+        :param file_path: The path to the source file
+        :param variant: Separates entries of the same file read differently, like with a column projection
+        :return: True if the path, size and mtime of the file have an entry
+        """
+        try:
+            with open(self._link_path(self._stat_key(file_path, variant)), 'r', encoding='utf-8') as f:
+                return os.path.exists(self._entry_path(f.read().strip(), variant))
+        except OSError:
+            return False
+
+    def load(self, file_path: str, variant: str = '') -> typing.Optional[ReportTable]:
+        """
+        Loads the cached rows of a file
+        :param file_path: The path to the source file
+        :param variant: Separates entries of the same file read differently, like with a column projection
+        :return: The rows as a ReportTable or None if the file is not cached
+        """
+        stat_key = self._stat_key(file_path, variant)
+        link_path = self._link_path(stat_key)
+        try:
+            with open(link_path, 'r', encoding='utf-8') as f:
+                content_hash = f.read().strip()
+        except OSError:
+            content_hash = hash_file(file_path)
+        rows = self._load_entry(self._entry_path(content_hash, variant))
+        if rows is None:
+            self._missed_hashes[stat_key] = content_hash
+        elif not os.path.exists(link_path):
+            self._write_atomic(link_path, content_hash.encode('utf-8'))
+        return rows
+
+    def store(self, file_path: str, rows: typing.Sequence[typing.Mapping], variant: str = '') -> typing.NoReturn:
+        """
+        Stores the parsed rows of a file and evicts old entries if the cache is over max_bytes
+        :param file_path: The path to the source file
+        :param rows: The parsed rows, every row has the same keys
+        :param variant: Separates entries of the same file read differently, like with a column projection
+        :return: None
+        """
+        stat_key = self._stat_key(file_path, variant)
+        # A file load just missed was hashed there, a changed file has another stat key and is hashed again
+        content_hash = self._missed_hashes.pop(stat_key, None) or hash_file(file_path)
+        if isinstance(rows, ReportTable):
+            header, values = rows.header, list(rows.values())
+        else:
+            header = tuple(rows[0]) if rows else ()
+            values = [tuple(row.values()) for row in rows]
+        self._write_atomic(self._entry_path(content_hash, variant),
+                           pickle.dumps((header, values), protocol=pickle.HIGHEST_PROTOCOL))
+        self._write_atomic(self._link_path(stat_key), content_hash.encode('utf-8'))
+        self.evict()
+
+    def evict(self) -> typing.NoReturn:
+        """
+        Removes the least recently used entries until the cache takes at most max_bytes, and the links left without an
+        entry to point at
+        :return: None
+        """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        entries = []
+        for name in names:
+            if not name.endswith('.pickle'):
+                continue
+            with contextlib.suppress(OSError):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total_bytes = sum(size for _, size, _ in entries)
+        evicted = set()
+        for _, size, name in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(self.directory, name))
+                evicted.add(name)
+            total_bytes -= size
+        # Entries are named after the content hash their links hold
+        content_hashes = {name.split('-', 1)[0] for _, _, name in entries if name not in evicted}
+        for name in names:
+            if name.endswith('.link'):
+                self._remove_orphaned_link(os.path.join(self.directory, name), content_hashes)
+
+    @staticmethod
+    def _remove_orphaned_link(link_path: str, content_hashes: typing.AbstractSet[str]) -> typing.NoReturn:
+        try:
+            with open(link_path, 'r', encoding='utf-8') as f:
+                content_hash = f.read().strip()
+        except OSError:
+            return
+        if content_hash not in content_hashes:
+            with contextlib.suppress(OSError):
+                os.remove(link_path)
@@ -0,0 +1,240 @@
+import os
+import pickle
+import sqlite3
+import typing
+
+from column_plan import ColumnPlan
+from my_types import AcceptedFileNames, MatchedRow
+from normalization import normalize_sku
+from report_table import ReportTable, TableRow
+from utils import ColumnProjection, generate_row_data_dict, is_sku_column, iter_report_rows, MARKETPLACE_COLUMN
+
+# Bump when the rows or keys a report is loaded into change so older databases are loaded again
+STORE_VERSION = 1
+DEFAULT_STORE_PATH = os.path.join('.', '.report_store', 'reports.sqlite')
+# Number of rows inserted at a time while a report is loaded
+LOAD_BATCH_SIZE = 10_000
+# The column of the restock report the output skus are read from, like find_restock_skus
+RESTOCK_SKU_COLUMN = 'Merchant SKU'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS reports (
+    file_name TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    header BLOB NOT NULL,
+    row_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rows (
+    file_name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    row_values BLOB NOT NULL,
+    PRIMARY KEY (file_name, position)
+) WITHOUT ROWID;
+-- The first row of every normalized sku and marketplace, rows without a marketplace id are under ''
+CREATE TABLE IF NOT EXISTS skus (
+    file_name TEXT NOT NULL,
+    sku TEXT NOT NULL,
+    market_place_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (file_name, sku, market_place_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS skus_by_marketplace ON skus (file_name, market_place_id);
+'''
+
+# The first row of a sku in a report, in any marketplace or in the marketplace of the last parameter and ''
+_FIRST_ROW = '''
+(SELECT row_values FROM rows WHERE file_name = ? AND position = (
+    SELECT position FROM skus WHERE file_name = ? AND sku = wanted.sku {marketplace} ORDER BY position LIMIT 1))
+'''
+_JOIN = f'''
+SELECT wanted.sku, {_FIRST_ROW.format(marketplace='')}, {_FIRST_ROW.format(marketplace='')},
+    {_FIRST_ROW.format(marketplace="AND (? IS NULL OR market_place_id IN ('', ?))")}
+FROM wanted ORDER BY wanted.ordinal
+'''
+
+
+def _source_key(file_path: str, variant: str) -> str:
+    stat = os.stat(file_path)
+    return f'{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}|{variant}'
+
+
+class ReportStore:
+    """
+    The reports of a run bulk-loaded into a SQLite database and joined there.
+
+    Every row is stored once as its pickled value tuple, and the first row of every normalized sku and marketplace is
+    keyed by the primary key of the skus table, so find_skus is an indexed join that only reads the matched rows back
+    into memory. The database persists between runs and a report whose path, size, mtime and column projection did not
+    change is not loaded again. The join gives the same rows join_sku_indexes gives for the same reports.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._connection: typing.Optional[sqlite3.Connection] = None
+        self._tables: typing.Dict[AcceptedFileNames, ReportTable] = {}
+
+    def __getstate__(self) -> dict:
+        # A worker process opens its own connection
+        return {'path': self.path}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state['path'])
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            if connection.execute('PRAGMA user_version').fetchone()[0] != STORE_VERSION:
+                with connection:
+                    for table in ('skus', 'rows', 'reports'):
+                        connection.execute(f'DROP TABLE IF EXISTS {table}')
+                    connection.execute(f'PRAGMA user_version = {STORE_VERSION}')
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def close(self) -> typing.NoReturn:
+        """
+        Closes the connection, it is opened again when the store is used
+        :return: None
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def header(self, file_name: AcceptedFileNames) -> typing.Optional[typing.Tuple[str, ...]]:
+        """
+        The header of a loaded report
+        :param file_name: The name of the report
+        :return: The header or None when the report is not loaded
+        """
+        table = self._table(file_name)
+        return table.header if table is not None else None
+
+    def row_count(self, file_name: AcceptedFileNames) -> typing.Optional[int]:
+        """
+        The number of rows of a loaded report
+        :param file_name: The name of the report
+        :return: The number of rows or None when the report is not loaded
+        """
+        result = self.connection.execute('SELECT row_count FROM reports WHERE file_name = ?', (file_name,)).fetchone()
+        return result[0] if result else None
+
+    def _table(self, file_name: AcceptedFileNames) -> typing.Optional[ReportTable]:
+        # The matched rows of a report share the header of an empty table like the rows of a ReportTable do
+        table = self._tables.get(file_name)
+        if table is None:
+            result = self.connection.execute('SELECT header FROM reports WHERE file_name = ?', (file_name,)).fetchone()
+            if result is None:
+                return None
+            table = self._tables[file_name] = ReportTable(pickle.loads(result[0]))
+        return table
+
+    def contains(self, file_name: AcceptedFileNames, file_path: str,
+                 columns: typing.Optional[ColumnProjection] = None) -> bool:
+        """
+        Checks if a report is loaded from an unchanged file with the same columns
+        :param file_name: The name of the report
+        :param file_path: The path to the file
+        :param columns: The columns the report is read with
+        :return: True if the path, size, mtime and columns of the loaded report are the same
+        """
+        result = self.connection.execute('SELECT source FROM reports WHERE file_name = ?', (file_name,)).fetchone()
+        return result is not None and result[0] == _source_key(file_path, columns.key if columns is not None else '')
+
+    def load(self, file_name: AcceptedFileNames, file_path: str,
+             columns: typing.Optional[ColumnProjection] = None) -> bool:
+        """
+        Loads a report into the store in one transaction, replacing the rows of the previous file of the same name.
+        The file is streamed through iter_report_rows, so only a batch of rows is held at a time.
+        :param file_name: The name of the report
+        :param file_path: The path to the file
+        :param columns: Only load these columns
+        :return: True if the report was loaded, False if the same file was already loaded
+        """
+        if self.contains(file_name, file_path, columns):
+            return False
+        source = _source_key(file_path, columns.key if columns is not None else '')
+        connection = self.connection
+        self._tables.pop(file_name, None)
+        with connection:
+            connection.execute('DELETE FROM skus WHERE file_name = ?', (file_name,))
+            connection.execute('DELETE FROM rows WHERE file_name = ?', (file_name,))
+            header: typing.Tuple[str, ...] = ()
+            row_count = 0
+            sku_columns: typing.Optional[typing.List[str]] = None
+            marketplace_column: typing.Optional[str] = None
+            row_batch = []
+            sku_batch = []
+            for position, row in enumerate(iter_report_rows(file_path, columns=columns, read_only=True)):
+                if sku_columns is None:
+                    header = row.header
+                    sku_columns = [key for key in row.keys() if is_sku_column(key)]
+                    marketplace_column = ColumnPlan(row).resolve(MARKETPLACE_COLUMN)
+                market_place_id = str(row.get(marketplace_column) or '') if marketplace_column else ''
+                row_batch.append((file_name, position, pickle.dumps(row.values_tuple, pickle.HIGHEST_PROTOCOL)))
+                for sku_column in sku_columns:
+                    sku_batch.append((file_name, normalize_sku(row[sku_column]), market_place_id, position))
+                if len(row_batch) >= LOAD_BATCH_SIZE:
+                    self._insert(row_batch, sku_batch)
+                row_count = position + 1
+            self._insert(row_batch, sku_batch)
+            connection.execute('INSERT OR REPLACE INTO reports (file_name, source, header, row_count) '
+                               'VALUES (?, ?, ?, ?)', (file_name, source, pickle.dumps(header), row_count))
+        return True
+
+    def _insert(self, row_batch: typing.List[tuple], sku_batch: typing.List[tuple]) -> typing.NoReturn:
+        self.connection.executemany('INSERT INTO rows (file_name, position, row_values) VALUES (?, ?, ?)', row_batch)
+        # Rows are inserted in order, so the first row of a sku and marketplace is the one kept
+        self.connection.executemany('INSERT OR IGNORE INTO skus (file_name, sku, market_place_id, position) '
+                                    'VALUES (?, ?, ?, ?)', sku_batch)
+        row_batch.clear()
+        sku_batch.clear()
+
+    def _restock_skus(self) -> typing.Iterator[typing.Tuple[str]]:
+        position = self._table('restock_report').positions[RESTOCK_SKU_COLUMN]
+        cursor = self.connection.execute('SELECT row_values FROM rows WHERE file_name = ? ORDER BY position',
+                                         ('restock_report',))
+        for (row_values,) in cursor:
+            yield normalize_sku(pickle.loads(row_values)[position]),
+
+    def join(self, market_place_id: typing.Optional[str] = None) -> typing.Dict[str, MatchedRow]:
+        """
+        Joins the loaded reports on the restock skus
+        :param market_place_id: marketplace id, only the informed csv is filtered by it
+        :return: Dict of matched rows in restock sku order, the same join_sku_indexes returns for the same reports
+        """
+        header = self.header('restock_report')
+        if header is None or RESTOCK_SKU_COLUMN not in header:
+            print("No SKUs found in restock report")
+            return {}
+        connection = self.connection
+        connection.execute('CREATE TEMP TABLE IF NOT EXISTS wanted (ordinal INTEGER PRIMARY KEY, sku TEXT UNIQUE)')
+        connection.execute('DELETE FROM wanted')
+        # The first occurrence of a sku keeps its ordinal
+        connection.executemany('INSERT OR IGNORE INTO wanted (sku) VALUES (?)', self._restock_skus())
+        market_place_id = str(market_place_id) if market_place_id else None
+        tables = [(row_key, self._table(file_name)) for row_key, file_name in (
+            ('restock_row', 'restock_report'), ('inventory_row', 'inventory_file'), ('informed_row', 'informed_csv'))]
+        matched_row_data: typing.Dict[str, MatchedRow] = {}
+        parameters = ('restock_report',) * 2 + ('inventory_file',) * 2 + ('informed_csv',) * 2 + (market_place_id,) * 2
+        for sku, *rows_values in connection.execute(_JOIN, parameters):
+            row_data = None
+            for (row_key, table), row_values in zip(tables, rows_values):
+                if row_values is not None:
+                    if row_data is None:
+                        row_data = matched_row_data[sku] = generate_row_data_dict()
+                    row_data[row_key] = TableRow(table, pickle.loads(row_values))
+        connection.execute('DELETE FROM wanted')
+        return matched_row_data
+
+    def __enter__(self) -> 'ReportStore':
+        return self
+
+    def __exit__(self, *_) -> typing.NoReturn:
+        self.close()
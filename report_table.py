@@ -0,0 +1,135 @@
+import collections.abc
+import typing
+
+# Header -> table holding its positions, so rows unpickled on their own share one
+_TABLES_BY_HEADER: typing.Dict[typing.Tuple[str, ...], 'ReportTable'] = {}
+_MAX_TABLES_BY_HEADER = 64
+
+
+class TableRow(collections.abc.Mapping):
+    """
+    A read-only row of a ReportTable.
+
+    The row only holds its values as a tuple and looks the positions of its columns up in the table, so it costs a
+    fraction of a dict that repeats every header. It behaves like the dict the readers used to return.
+    """
+    __slots__ = ('_table', '_values')
+
+    def __init__(self, table: 'ReportTable', values: typing.Tuple):
+        self._table = table
+        self._values = values
+
+    def __getitem__(self, key: str) -> typing.Any:
+        return self._values[self._table.positions[key]]
+
+    def __contains__(self, key: typing.Any) -> bool:
+        return key in self._table.positions
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._table.positions)
+
+    def __len__(self) -> int:
+        return len(self._table.positions)
+
+    def __repr__(self) -> str:
+        return f'TableRow({dict(self)!r})'
+
+    def __reduce__(self):
+        # A row sent to another process takes its header along instead of its whole table
+        return _unpickle_table_row, (self._table.header, self._values)
+
+    def get(self, key: str, default: typing.Any = None) -> typing.Any:
+        position = self._table.positions.get(key)
+        return default if position is None else self._values[position]
+
+    @property
+    def values_tuple(self) -> typing.Tuple:
+        """The values of the row in header order"""
+        return self._values
+
+    @property
+    def header(self) -> typing.Tuple[str, ...]:
+        """The header of the table of the row, repeated names included"""
+        return self._table.header
+
+
+class ReportTable(collections.abc.Sequence):
+    """
+    The rows of a report stored as one header tuple and one value tuple per row.
+
+    It is a sequence of TableRow and can be used wherever a list of row dictionaries was. Only the value tuples are
+    kept, a TableRow is created when a row is read, so a row that is not held on to costs no more than its tuple.
+    """
+
+    def __init__(self, header: typing.Iterable[str], rows: typing.Iterable[typing.Iterable] = ()):
+        self.header: typing.Tuple[str, ...] = tuple(header)
+        # Like dict(zip(header, values)) the first position of a repeated header keeps its order but the last wins
+        self.positions: typing.Dict[str, int] = {}
+        for position, name in enumerate(self.header):
+            self.positions[name] = position
+        self._rows: typing.List[typing.Tuple] = [tuple(values) for values in rows]
+
+    @classmethod
+    def from_dicts(cls, rows: typing.Iterable[typing.Mapping]) -> 'ReportTable':
+        """
+        Builds a table from row dictionaries that all have the same keys
+        :param rows: The rows
+        :return: The table
+        """
+        rows = iter(rows)
+        first_row = next(rows, None)
+        if first_row is None:
+            return cls(())
+        table = cls(first_row.keys())
+        table.append(first_row.values())
+        for row in rows:
+            table.append(row.values())
+        return table
+
+    def append(self, values: typing.Iterable) -> TableRow:
+        """
+        Appends a row
+        :param values: The values of the row in header order
+        :return: The new row
+        """
+        values = tuple(values)
+        self._rows.append(values)
+        return TableRow(self, values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TableRow(self, values) for values in self._rows[index]]
+        return TableRow(self, self._rows[index])
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> typing.Iterator[TableRow]:
+        return (TableRow(self, values) for values in self._rows)
+
+    def __eq__(self, other: typing.Any) -> bool:
+        if not isinstance(other, collections.abc.Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(row == other_row for row, other_row in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f'ReportTable(header={self.header!r}, rows={len(self)})'
+
+    def __reduce__(self):
+        return ReportTable, (self.header, self._rows)
+
+    def values(self) -> typing.Iterator[typing.Tuple]:
+        """
+        The value tuples of every row
+        :return: An iterator of value tuples in header order
+        """
+        return iter(self._rows)
+
+
+def _unpickle_table_row(header: typing.Tuple[str, ...], values: typing.Tuple) -> TableRow:
+    table = _TABLES_BY_HEADER.get(header)
+    if table is None:
+        if len(_TABLES_BY_HEADER) >= _MAX_TABLES_BY_HEADER:
+            _TABLES_BY_HEADER.clear()
+        table = _TABLES_BY_HEADER[header] = ReportTable(header)
+    return TableRow(table, values)
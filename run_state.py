@@ -0,0 +1,104 @@
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+import typing
+
+from mapping_plan import MappingPlan, ROW_DATA_KEYS
+from my_types import MatchedRow
+from validation import Reject
+
+# Bump when mapping or validating a row changes so rows of older runs are mapped again
+STATE_VERSION = 2
+DEFAULT_STATE_DIRECTORY = os.path.join('.', '.run_state')
+
+
+class StateEntry(typing.NamedTuple):
+    """What a run made of the matched rows of one SKU"""
+    fingerprint: str
+    mapped_row: typing.Optional[dict]  # None when the row was dropped by validation
+    rejects: typing.Tuple[Reject, ...] = ()
+
+
+def fingerprint_row_data(row_data: MatchedRow) -> str:
+    """
+    Fingerprints the rows matched to a SKU
+    :param row_data: The matched rows
+    :return: A digest that changes when any value of any of the rows changes
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for row_key in ROW_DATA_KEYS.values():
+        digest.update(repr(tuple(row_data[row_key].items())).encode('utf-8'))
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+def plan_signature(plan: MappingPlan) -> str:
+    """
+    Describes a mapping plan, rows mapped with a different plan are never reused
+    :param plan: The mapping plan
+    :return: A digest of the columns, sources, processors and validators of the plan
+    """
+    description = repr((
+        STATE_VERSION,
+        plan.column_names,
+        plan.file_names,
+        plan.source_keys,
+        [getattr(function, '__qualname__', None) for function in plan.processors],
+        [getattr(function, '__qualname__', None) for function in plan.validators],
+    ))
+    return hashlib.blake2b(description.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class RunState:
+    """
+    The per-SKU fingerprints and mapped rows of the previous run for a marketplace.
+
+    A run only maps and validates the SKUs whose matched rows changed since the previous run and reuses the mapped rows
+    of the others. Every marketplace has its own state file, and a state saved with a different mapping plan is
+    ignored.
+    """
+
+    def __init__(self, directory: str = DEFAULT_STATE_DIRECTORY, market_place_id: typing.Optional[str] = None):
+        self.directory = directory
+        self.market_place_id = str(market_place_id or '')
+
+    @property
+    def file_path(self) -> str:
+        name = hashlib.blake2b(self.market_place_id.encode('utf-8'), digest_size=8).hexdigest()
+        return os.path.join(self.directory, f'run-{name}-v{STATE_VERSION}.pickle')
+
+    def load(self, plan: MappingPlan) -> typing.Dict[str, StateEntry]:
+        """
+        Loads the entries of the previous run
+        :param plan: The mapping plan of this run
+        :return: Normalized sku -> entry, empty when there was no previous run with the same plan
+        """
+        try:
+            with open(self.file_path, 'rb') as f:
+                signature, market_place_id, entries = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return {}
+        if signature != plan_signature(plan) or market_place_id != self.market_place_id:
+            return {}
+        return entries
+
+    def save(self, plan: MappingPlan, entries: typing.Dict[str, StateEntry]) -> typing.NoReturn:
+        """
+        Saves the entries of this run, replacing the previous run
+        :param plan: The mapping plan of this run
+        :param entries: Normalized sku -> entry
+        :return: None
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((plan_signature(plan), self.market_place_id, entries), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.file_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            raise
@@ -0,0 +1,196 @@
+import typing
+from operator import itemgetter
+
+from column_plan import ColumnPlan
+from my_types import Row, MatchedRow
+from normalization import normalize_sku
+from utils import generate_row_data_dict, is_sku_column, MARKETPLACE_COLUMN
+
+
+class SkuIndex:
+    """
+    A hash index over a report that maps a normalized SKU to the first row containing it, split by marketplace.
+
+    The index is built in a single pass over the rows. Every column with 'sku' in its name is indexed, and rows
+    without a marketplace ID are stored under the empty marketplace so they match any marketplace.
+    """
+
+    def __init__(self, rows: typing.Iterable[Row]):
+        # sku -> marketplace id -> (row position, row)
+        self._entries: typing.Dict[str, typing.Dict[str, typing.Tuple[int, Row]]] = {}
+        self.row_count = 0
+        sku_columns: typing.Optional[typing.List[str]] = None
+        marketplace_column: typing.Optional[str] = None
+        for position, row in enumerate(rows):
+            if sku_columns is None:
+                sku_columns = [key for key in row.keys() if is_sku_column(key)]
+                marketplace_column = ColumnPlan(row).resolve(MARKETPLACE_COLUMN)
+            market_place_id = str(row.get(marketplace_column) or '') if marketplace_column else ''
+            for sku_column in sku_columns:
+                sku = normalize_sku(row[sku_column])
+                entries = self._entries.get(sku)
+                if entries is None:
+                    self._entries[sku] = {market_place_id: (position, row)}
+                elif market_place_id not in entries:
+                    entries[market_place_id] = (position, row)
+            self.row_count = position + 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, sku: str) -> bool:
+        return sku in self._entries
+
+    @property
+    def marketplaces(self) -> typing.Set[str]:
+        """
+        All marketplace IDs present in the index, not including the empty marketplace
+        :return: A set of marketplace IDs
+        """
+        return {market_place_id for entries in self._entries.values() for market_place_id in entries} - {''}
+
+    def skus(self, market_place_id: typing.Optional[str] = None) -> typing.AbstractSet[str]:
+        """
+        Returns the normalized skus in the index that have a row for a marketplace
+        :param market_place_id: A marketplace id to filter results to
+        :return: A set of normalized skus
+        """
+        if not market_place_id:
+            return self._entries.keys()
+        market_place_id = str(market_place_id)
+        return {sku for sku, entries in self._entries.items() if '' in entries or market_place_id in entries}
+
+    def get(self, sku: str, market_place_id: typing.Optional[str] = None) -> typing.Optional[Row]:
+        """
+        Finds the first row for a normalized sku
+        :param sku: The normalized sku
+        :param market_place_id: A marketplace id to filter results to, rows without a marketplace id always match
+        :return: The row or None if there is no row for the sku in the marketplace
+        """
+        entries = self._entries.get(sku)
+        if entries is None:
+            return None
+        if market_place_id:
+            unmarked_entry = entries.get('')
+            marketplace_entry = entries.get(str(market_place_id))
+            if unmarked_entry is None or marketplace_entry is None:
+                entry = unmarked_entry or marketplace_entry
+                return entry[1] if entry else None
+            return min(unmarked_entry, marketplace_entry, key=itemgetter(0))[1]
+        if len(entries) == 1:
+            return next(iter(entries.values()))[1]
+        return min(entries.values(), key=itemgetter(0))[1]
+
+    def match(self, skus: typing.Iterable[str], *,
+              market_place_id: typing.Optional[str] = None) -> typing.Dict[str, Row]:
+        """
+        Finds the rows for a list of skus
+        :param skus: A list of skus, they do not need to be normalized
+        :param market_place_id: A marketplace id to filter results to
+        :return: A dictionary of normalized sku to row in the order of skus
+        """
+        found_rows = {}
+        for sku in dict.fromkeys(normalize_sku(sku) for sku in skus):
+            if (row := self.get(sku, market_place_id)) is not None:
+                found_rows[sku] = row
+        return found_rows
+
+
+def join_sku_indexes(skus: typing.Iterable[str], restock_index: SkuIndex, inventory_index: SkuIndex,
+                     informed_index: SkuIndex, *,
+                     market_place_id: typing.Optional[str] = None) -> typing.Dict[str, MatchedRow]:
+    """
+    Joins the three report indexes on the restock skus
+    :param skus: The restock skus
+    :param restock_index: Index of the restock report
+    :param inventory_index: Index of the inventory file
+    :param informed_index: Index of the informed csv, the only one filtered by marketplace
+    :param market_place_id: marketplace id
+    :return: Dict of matched rows in restock sku order, a report without a row for a sku leaves it empty
+    """
+    wanted = dict.fromkeys(normalize_sku(sku) for sku in skus)
+    found_rows = {}
+    for row_key, index, index_market_place_id in (
+            ('restock_row', restock_index, None),
+            ('inventory_row', inventory_index, None),
+            ('informed_row', informed_index, market_place_id),
+    ):
+        found_rows[row_key] = {sku: row for sku in wanted.keys() & index.skus()
+                               if (row := index.get(sku, index_market_place_id)) is not None}
+    return _matched_rows(wanted, found_rows)
+
+
+def match_first_rows(skus: typing.Iterable[str], rows: typing.Iterable[Row], *,
+                     market_place_id: typing.Optional[str] = None) -> typing.Dict[str, Row]:
+    """
+    Finds the first row of every sku while the rows stream by, only the matched rows are kept.
+
+    The rows found are the ones SkuIndex(rows).get(sku, market_place_id) returns, and the rows stop being read once
+    every sku is found.
+    :param skus: The normalized skus to find
+    :param rows: The rows of a report, they are iterated once
+    :param market_place_id: A marketplace id to filter rows to, rows without a marketplace id always match
+    :return: A dictionary of normalized sku to its first row
+    """
+    remaining = set(skus)
+    found_rows: typing.Dict[str, Row] = {}
+    market_place_id = str(market_place_id) if market_place_id else None
+    sku_columns: typing.Optional[typing.List[str]] = None
+    marketplace_column: typing.Optional[str] = None
+    for row in rows:
+        if not remaining:
+            break
+        if sku_columns is None:
+            sku_columns = [key for key in row.keys() if is_sku_column(key)]
+            marketplace_column = ColumnPlan(row).resolve(MARKETPLACE_COLUMN)
+        if market_place_id and marketplace_column:
+            row_market_place_id = str(row.get(marketplace_column) or '')
+            if row_market_place_id and row_market_place_id != market_place_id:
+                continue
+        for sku_column in sku_columns:
+            sku = normalize_sku(row[sku_column])
+            if sku in remaining:
+                remaining.discard(sku)
+                found_rows[sku] = row
+    return found_rows
+
+
+def join_streamed_reports(skus: typing.Iterable[str], restock_index: SkuIndex, inventory_rows: typing.Iterable[Row],
+                          informed_rows: typing.Iterable[Row], *,
+                          market_place_id: typing.Optional[str] = None) -> typing.Dict[str, MatchedRow]:
+    """
+    Joins the restock index with the inventory file and informed csv streaming by, the same way join_sku_indexes
+    joins three indexes, without ever holding the streamed reports
+    :param skus: The restock skus
+    :param restock_index: Index of the restock report
+    :param inventory_rows: The rows of the inventory file
+    :param informed_rows: The rows of the informed csv, the only one filtered by marketplace
+    :param market_place_id: marketplace id
+    :return: Dict of matched rows in restock sku order, a report without a row for a sku leaves it empty
+    """
+    wanted = dict.fromkeys(normalize_sku(sku) for sku in skus)
+    found_rows = {
+        'restock_row': {sku: row for sku in wanted if (row := restock_index.get(sku)) is not None},
+        'inventory_row': match_first_rows(wanted, inventory_rows),
+        'informed_row': match_first_rows(wanted, informed_rows, market_place_id=market_place_id),
+    }
+    return _matched_rows(wanted, found_rows)
+
+
+def _matched_rows(wanted: typing.Iterable[str],
+                  found_rows: typing.Dict[str, typing.Dict[str, Row]]) -> typing.Dict[str, MatchedRow]:
+    """
+    Builds the matched row data of every sku that has a row in at least one report
+    :param wanted: The normalized skus in output order
+    :param found_rows: Row key of the matched row data -> normalized sku -> row
+    :return: Dict of matched rows in the order of wanted
+    """
+    matched_row_data: typing.Dict[str, MatchedRow] = {}
+    for sku in wanted:
+        row_data = None
+        for row_key, rows in found_rows.items():
+            if (row := rows.get(sku)) is not None:
+                if row_data is None:
+                    row_data = matched_row_data[sku] = generate_row_data_dict()
+                row_data[row_key] = row
+    return matched_row_data
@@ -0,0 +1,107 @@
+import typing
+import weakref
+from copy import copy
+
+from openpyxl.cell import Cell
+from openpyxl.styles import PatternFill
+
+from my_types import GREEN_COLOR, RED_COLOR, ORANGE_COLOR
+
+NUMBER_FORMAT = '0.00'
+
+NUMBER_STYLE = 'number'
+GREEN_STYLE = 'green'
+RED_STYLE = 'red'
+ORANGE_STYLE = 'orange'
+
+
+class CellStyle(typing.NamedTuple):
+    """A style applied to output cells"""
+    number_format: str
+    fill: typing.Optional[PatternFill] = None
+
+
+def solid_fill(color: str) -> PatternFill:
+    """
+    Creates a solid fill of a color
+    :param color: The color of the fill
+    :return: The fill
+    """
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+# Every style is created once and shared by every cell that uses it
+CELL_STYLES: typing.Dict[str, CellStyle] = {
+    NUMBER_STYLE: CellStyle(NUMBER_FORMAT),
+    GREEN_STYLE: CellStyle(NUMBER_FORMAT, solid_fill(GREEN_COLOR)),
+    RED_STYLE: CellStyle(NUMBER_FORMAT, solid_fill(RED_COLOR)),
+    ORANGE_STYLE: CellStyle(NUMBER_FORMAT, solid_fill(ORANGE_COLOR)),
+}
+
+# workbook -> style name -> a scratch cell the style is registered with in that workbook
+_REGISTERED_STYLES: 'weakref.WeakKeyDictionary[typing.Any, typing.Dict[str, Cell]]' = weakref.WeakKeyDictionary()
+
+
+def _copy_cell_style(source: Cell, target: Cell) -> typing.NoReturn:
+    """
+    Gives a cell the style of another cell of the same workbook
+    :param source: The cell whose style is copied
+    :param target: The cell the style is applied to
+    :return: None
+    """
+    # openpyxl has no public way to do this without assigning and registering every style attribute again. A cell's
+    # style is the StyleArray _style of indexes into its workbook's style tables, and copying it is what openpyxl's
+    # own WorksheetCopy does. This is the only private openpyxl attribute used, tests/test_styles pins it.
+    target._style = copy(source._style)
+
+
+def _register_style(cell: Cell, name: str) -> Cell:
+    """
+    Registers a style in the workbook of a cell by applying it to a scratch cell
+    :param cell: A cell of the workbook
+    :param name: The name of the style
+    :return: The scratch cell holding the registered style
+    """
+    style = CELL_STYLES[name]
+    scratch = Cell(cell.parent)
+    scratch.number_format = style.number_format
+    if style.fill is not None:
+        scratch.fill = style.fill
+    return scratch
+
+
+def _registered_style(cell: Cell, name: str) -> Cell:
+    workbook = cell.parent.parent
+    try:
+        registered_styles = _REGISTERED_STYLES[workbook]
+    except KeyError:
+        registered_styles = _REGISTERED_STYLES[workbook] = {}
+    styled_cell = registered_styles.get(name)
+    if styled_cell is None:
+        styled_cell = registered_styles[name] = _register_style(cell, name)
+    return styled_cell
+
+
+def apply_style(cell: Cell, name: str) -> typing.NoReturn:
+    """
+    Applies a style from CELL_STYLES to a cell, the style is registered in the cell's workbook the first time
+    Works for normal and write-only worksheets.
+    :param cell: The cell to apply the style to
+    :param name: The name of the style
+    :return: None
+    """
+    _copy_cell_style(_registered_style(cell, name), cell)
+
+
+def apply_style_to_cells(cells: typing.Sequence[Cell], name: str) -> typing.NoReturn:
+    """
+    Applies a style from CELL_STYLES to cells of the same workbook, looking the registered style up once
+    :param cells: The cells to apply the style to
+    :param name: The name of the style
+    :return: None
+    """
+    if not cells:
+        return
+    styled_cell = _registered_style(cells[0], name)
+    for cell in cells:
+        _copy_cell_style(styled_cell, cell)
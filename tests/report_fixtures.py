@@ -0,0 +1,36 @@
+import contextlib
+import io
+import tempfile
+import typing
+import unittest
+
+from benchmarks.synthetic_reports import generate_reports
+
+
+def as_dicts(matched_row_data: dict) -> dict:
+    """
+    Converts matched rows to plain dictionaries, so rows of a ReportTable and of a report store compare equal
+    :param matched_row_data: Dict of matched rows
+    :return: Normalized sku -> row key -> row dictionary
+    """
+    return {sku: {row_key: dict(row) for row_key, row in row_data.items()}
+            for sku, row_data in matched_row_data.items()}
+
+
+class ReportsTestCase(unittest.TestCase):
+    """Generates synthetic reports in a temporary directory and silences the output of the pipeline"""
+    sku_count = 120
+    file_format = 'tsv'
+    marketplaces: typing.Tuple[str, ...] = ('1', '2')
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_paths = generate_reports(self.directory.name, self.sku_count, file_format=self.file_format,
+                                           marketplaces=self.marketplaces)
+        self.quiet = contextlib.ExitStack()
+        self.quiet.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        self.quiet.enter_context(contextlib.redirect_stderr(io.StringIO()))
+
+    def tearDown(self):
+        self.quiet.close()
+        self.directory.cleanup()
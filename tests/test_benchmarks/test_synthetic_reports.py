@@ -0,0 +1,41 @@
+import tempfile
+import unittest
+import unittest.mock
+
+from benchmarks.synthetic_reports import generate_reports
+from common import find_skus
+from utils import read_report_file
+
+
+class TestSyntheticReports(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_reports(self, file_format):
+        file_paths = generate_reports(self.directory.name, 50, file_format=file_format, marketplaces=['1', '2'])
+        with unittest.mock.patch('builtins.print'):
+            return [read_report_file(file_paths[file_name], table=True, read_only=True)
+                    for file_name in ('restock_report', 'inventory_file', 'informed_csv')]
+
+    def test_messy_headers_are_sanitized(self):
+        restock_report, inventory_file, informed_csv = self.read_reports('tsv')
+        self.assertIn('Merchant SKU', restock_report[0])
+        self.assertIn('Total Units', restock_report[0])
+        self.assertIn('Primary Supplier', inventory_file[0])
+        self.assertEqual(len(restock_report), 50)
+
+    def test_xlsx_and_tsv_reports_match_the_same_skus(self):
+        matched = [find_skus(*self.read_reports(file_format), market_place_id='1') for file_format in ('xlsx', 'tsv')]
+        self.assertEqual(len(matched[0]), 50)
+        self.assertEqual(matched[0].keys(), matched[1].keys())
+        # Some SKUs are not listed in the marketplace
+        listed = sum(1 for row_data in matched[0].values() if row_data['informed_row'])
+        self.assertTrue(0 < listed < 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
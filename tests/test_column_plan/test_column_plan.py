@@ -0,0 +1,37 @@
+import unittest
+
+import column_plan
+from cell_mapping import OUTPUT_MAPPED_CELLS
+
+
+class TestColumnPlan(unittest.TestCase):
+
+    def test_column_plan_resolves_normalized_headers(self):
+        plan = column_plan.ColumnPlan(['\xa0Total Units ', 'MARKETPLACE_ID'])
+        self.assertEqual(plan.resolve('total units'), '\xa0Total Units ')
+        self.assertEqual(plan.resolve('marketplace_id'), 'MARKETPLACE_ID')
+        self.assertEqual(plan.index('MARKETPLACE_ID'), 1)
+
+    def test_column_plan_first_matching_header_wins(self):
+        plan = column_plan.ColumnPlan(['SKU', ' sku'])
+        self.assertEqual(plan.resolve('Sku'), 'SKU')
+
+    def test_column_plan_missing_column(self):
+        plan = column_plan.ColumnPlan(['SKU'])
+        self.assertIsNone(plan.resolve('COST'))
+        self.assertIsNone(plan.index('COST'))
+        self.assertIsNone(plan.get({'SKU': 'A'}, 'COST'))
+
+    def test_column_plan_for_is_cached_per_headers(self):
+        plan = column_plan.column_plan_for({'SKU': 'A', 'COST': '1'})
+        self.assertIs(column_plan.column_plan_for({'SKU': 'B', 'COST': '2'}), plan)
+        self.assertIsNot(column_plan.column_plan_for({'COST': '2', 'SKU': 'B'}), plan)
+
+    def test_compile_output_plan_resolves_every_mapped_column(self):
+        plan = column_plan.compile_output_plan()
+        for cell in OUTPUT_MAPPED_CELLS:
+            self.assertEqual(plan.resolve(cell['column_name']), cell['column_name'])
+
+
+if __name__ == '__main__':
+    unittest.main()
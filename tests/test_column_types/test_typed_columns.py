@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest.mock
+
+import utils
+from column_types import InvalidNumber, parse_number
+from mapping_plan import get_mapping_plan
+from processors import calculate_buy_box_color_batch, validate_number, validate_number_batch
+from styles import RED_STYLE
+
+
+class TestParseNumber(unittest.TestCase):
+
+    def test_parse_number(self):
+        self.assertEqual(parse_number('2.50'), 2.5)
+        self.assertEqual(parse_number('1e3'), 1000.0)
+        self.assertEqual(parse_number(''), '')
+        self.assertEqual(parse_number(None), None)
+        self.assertEqual(parse_number(7), 7)
+        invalid = parse_number('abc')
+        self.assertIsInstance(invalid, InvalidNumber)
+        self.assertEqual(invalid, 'abc')
+
+    def test_typed_values_validate_like_text(self):
+        for value in ['2.5', 'abc', '', ' 3 ', 'nan']:
+            with self.subTest(value=value):
+                typed = parse_number(value.strip())
+                self.assertEqual(validate_number(typed) if typed != '' else None,
+                                 validate_number(value.strip()) if value.strip() else None)
+        self.assertEqual(validate_number_batch([1.5, InvalidNumber('abc'), '2', None]), [True, False, True, False])
+
+    def test_a_zero_price_is_compared(self):
+        self.assertEqual(calculate_buy_box_color_batch([0.0], [0.0], [5.0])[0].style, RED_STYLE)
+        self.assertIsNone(calculate_buy_box_color_batch([''], [0.0], [5.0])[0].style)
+
+
+@unittest.mock.patch('utils.print', create=True)
+class TestTypedColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'informed.txt')
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            f.write('SKU\tMARKETPLACE_ID\tCOST\tMIN_PRICE\tCURRENT_VELOCITY\n'
+                    'A\t1\t1.50\tn/a\t0.5\n'
+                    'B\t1\t\t2\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_number_columns_come_from_the_mapping(self, _):
+        projection = get_mapping_plan().projection('informed_csv')
+        self.assertIn('COST', projection.numeric)
+        self.assertNotIn('CURRENT_VELOCITY', projection.numeric)
+        self.assertNotEqual(projection.key, utils.ColumnProjection(projection.columns).key)
+
+    def test_number_columns_are_parsed_when_read(self, _):
+        projection = utils.ColumnProjection(['COST', 'MIN_PRICE', 'CURRENT_VELOCITY'], numeric=['COST', 'MIN_PRICE'])
+        for rows in (list(utils.read_delimited_file(self.file_path, columns=projection)),
+                     list(utils.iter_report_rows(self.file_path, columns=projection))):
+            self.assertEqual(rows[0]['COST'], 1.5)
+            self.assertIsInstance(rows[0]['MIN_PRICE'], InvalidNumber)
+            self.assertEqual(rows[0]['CURRENT_VELOCITY'], '0.5')
+            self.assertEqual(rows[1]['COST'], '')
+            self.assertEqual(rows[1]['MIN_PRICE'], 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
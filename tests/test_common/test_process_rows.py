@@ -0,0 +1,48 @@
+import unittest.mock
+
+import common
+from validation import ValidationReport
+
+
+@unittest.mock.patch('common.print', create=True)
+class TestProcessRows(unittest.TestCase):
+
+    def setUp(self):
+        self.matched_row_data = {
+            f'sku-{i}': {
+                'restock_row': {'Merchant SKU': f'SKU-{i}', 'Total Units': str(i),
+                                'Units Sold Last 30 Days': 'abc' if i % 7 == 0 else str(i % 3)},
+                'inventory_row': {'Quantity Available': str(i % 5)},
+                'informed_row': {},
+            }
+            for i in range(50)
+        }
+
+    def test_process_rows_drops_invalid_rows(self, *_):
+        report = ValidationReport()
+        output_mapping = common.process_rows(self.matched_row_data, report=report)
+        self.assertEqual(len(output_mapping), 50 - 8)
+        self.assertEqual(output_mapping[0]['Merchant SKU'], 'SKU-1')
+        self.assertEqual(report.rejected_rows, 8)
+        self.assertEqual(report.rejects[1], ('SKU-7', 'Units Sold Last 30 Days', 'abc', 'failed validate_number'))
+
+    @unittest.mock.patch('validation.ValidationReport.write')
+    def test_process_rows_writes_rejects_once(self, mock_write: unittest.mock.MagicMock, *_):
+        common.process_rows(self.matched_row_data, chunk_size=7)
+        mock_write.assert_called_once_with()
+
+    def test_process_rows_parallel_matches_serial(self, *_):
+        serial_report, parallel_report = ValidationReport(), ValidationReport()
+        serial = common.process_rows(self.matched_row_data, report=serial_report)
+        parallel = common.process_rows(self.matched_row_data, workers=2, chunk_size=7, report=parallel_report)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(parallel_report.rejects, serial_report.rejects)
+
+    @unittest.mock.patch('common.concurrent.futures.ProcessPoolExecutor')
+    def test_process_rows_small_inputs_are_mapped_serially(self, mock_executor: unittest.mock.MagicMock, *_):
+        common.process_rows(self.matched_row_data, workers=4, report=ValidationReport())
+        mock_executor.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import tempfile
+import unittest.mock
+
+import common
+from mapping_plan import get_mapping_plan
+from run_state import RunState
+from validation import ValidationReport
+
+
+@unittest.mock.patch('common.print', create=True)
+class TestProcessRowsIncremental(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.state = RunState(self.directory.name, '1')
+        self.matched_row_data = {
+            f'sku-{i}': {
+                'restock_row': {'Merchant SKU': f'SKU-{i}', 'Total Units': str(i),
+                                'Units Sold Last 30 Days': 'abc' if i % 7 == 0 else str(i % 3)},
+                'inventory_row': {'Quantity Available': str(i % 5)},
+                'informed_row': {},
+            }
+            for i in range(20)
+        }
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_incremental(self):
+        report = ValidationReport()
+        return common.process_rows_incremental(self.matched_row_data, self.state, report=report), report
+
+    def test_process_rows_incremental_matches_process_rows(self, *_):
+        expected_report = ValidationReport()
+        expected = common.process_rows(self.matched_row_data, report=expected_report)
+        for _ in range(2):
+            output_mapping, report = self.run_incremental()
+            self.assertEqual(output_mapping, expected)
+            self.assertEqual(sorted(report.rejects), sorted(expected_report.rejects))
+            self.assertEqual(report.rejected_rows, expected_report.rejected_rows)
+
+    def test_process_rows_incremental_only_maps_changed_rows(self, *_):
+        self.run_incremental()
+        self.matched_row_data['sku-3']['inventory_row'] = {'Quantity Available': '9'}
+        with unittest.mock.patch.object(get_mapping_plan(), 'map_row', wraps=get_mapping_plan().map_row) as map_row:
+            output_mapping, _ = self.run_incremental()
+        map_row.assert_called_once_with(self.matched_row_data['sku-3'])
+        self.assertEqual(output_mapping[2]['Quantity Available'], '9')
+
+
+if __name__ == '__main__':
+    unittest.main()
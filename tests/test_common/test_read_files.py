@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest.mock
+
+import common
+
+
+@unittest.mock.patch('common.print', create=True)
+@unittest.mock.patch('utils.print', create=True)
+class TestReadFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        os.mkdir('files')
+        for file_name, header in (('restock_report', 'Merchant SKU'), ('inventory_file', 'SKU'),
+                                  ('informed_csv', 'SKU\tMARKETPLACE_ID')):
+            with open(os.path.join('files', f'{file_name}.txt'), 'w', encoding='utf-8') as f:
+                f.write(f'{header}\nA{file_name}\n')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def test_read_files_sequential(self, *_):
+        restock_report, inventory_file, informed_csv = common.read_files(parallel=False)
+        self.assertEqual(restock_report, [{'Merchant SKU': 'Arestock_report'}])
+        self.assertEqual(inventory_file, [{'SKU': 'Ainventory_file'}])
+        self.assertEqual(informed_csv, [{'SKU': 'Ainformed_csv', 'MARKETPLACE_ID': ''}])
+
+    def test_read_files_parallel_matches_sequential(self, *_):
+        self.assertEqual(common.read_files(min_parallel_bytes=0), common.read_files(parallel=False))
+
+    @unittest.mock.patch('common.concurrent.futures.ProcessPoolExecutor')
+    def test_read_files_small_inputs_are_read_sequentially(self, mock_executor: unittest.mock.MagicMock, *_):
+        common.read_files()
+        mock_executor.assert_not_called()
+
+    def test_read_files_reports_wall_time(self, _, mock_print: unittest.mock.MagicMock):
+        common.read_files(parallel=False)
+        printed = [call.args[0] for call in mock_print.call_args_list]
+        for file_name in common.REPORT_FILE_NAMES:
+            self.assertTrue(any(line.startswith(f'Read {file_name} in ') for line in printed))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from openpyxl import load_workbook
+
+import common
+from tests.report_fixtures import ReportsTestCase
+from validation import ValidationReport
+
+
+def workbook_values(file_path):
+    return list(load_workbook(file_path, read_only=True).active.values)
+
+
+class TestRunMarketplaces(ReportsTestCase):
+
+    def run_marketplaces(self, output, workers):
+        return common.run_marketplaces(['1', '2', 1], output_directory=f'{self.directory.name}/{output}',
+                                       file_paths=self.file_paths, workers=workers)
+
+    def test_run_marketplaces_matches_one_run_per_marketplace(self):
+        outputs = self.run_marketplaces('serial', workers=1)
+        self.assertEqual([output.market_place_id for output in outputs], ['1', '2'])
+        files = common.read_files(file_paths=self.file_paths)
+        for output in outputs:
+            expected = common.process_rows(common.find_skus(*files, market_place_id=output.market_place_id),
+                                           report=ValidationReport())
+            self.assertEqual(output.rows, len(expected))
+            self.assertEqual(workbook_values(output.output_file)[1][0], expected[0]['Merchant SKU'])
+            self.assertIsNotNone(output.rejects_file)
+
+    def test_run_marketplaces_parallel_matches_serial(self):
+        serial = self.run_marketplaces('serial', workers=1)
+        parallel = self.run_marketplaces('parallel', workers=2)
+        for serial_output, parallel_output in zip(serial, parallel, strict=True):
+            self.assertEqual(workbook_values(parallel_output.output_file), workbook_values(serial_output.output_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+import openpyxl
+
+import common
+from mapping_plan import get_mapping_plan
+
+
+class TestWriteOutputRows(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.file_path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        self.plan = get_mapping_plan()
+        self.headers = list(self.plan.column_names)
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def mapped_row(self, sku: str) -> dict:
+        return self.plan.map_row({
+            'restock_row': {'Merchant SKU': sku, 'Total Units': '10', 'Units Sold Last 30 Days': '5'},
+            'inventory_row': {},
+            'informed_row': {'MIN_PRICE': '5', 'BUY_BOX_PRICE': '6', 'MAX_PRICE': '8'},
+        })
+
+    def test_write_output_rows_processes_rows_before_writing(self):
+        rows = (self.mapped_row(sku) for sku in ('A', 'B'))
+        common.write_output_rows(rows, self.headers).save(self.file_path)
+        ws = openpyxl.load_workbook(self.file_path).active
+        self.assertEqual([cell.value for cell in ws[1]], self.headers)
+        self.assertEqual(ws.max_row, 3)
+        days_on_hand = ws.cell(row=3, column=self.headers.index('Days on Hand') + 1)
+        self.assertEqual(days_on_hand.value, 60)
+        self.assertEqual(days_on_hand.number_format, '0.00')
+        buy_box_price = ws.cell(row=2, column=self.headers.index('BUY_BOX_PRICE') + 1)
+        self.assertEqual(buy_box_price.fill.fgColor.rgb, '0000FF00')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from delimited_reader import BadLines, iter_decoded_lines, iter_delimited_rows
+
+
+class TestIterDecodedLines(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, content: bytes, name='informed_csv.txt'):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_bad_line_is_skipped_and_counted(self):
+        path = self.write(b'SKU\tPRICE\nsku-1\t1.00\nsku-\xff2\t2.00\nsku-3\t3.00\n')
+        bad_lines = BadLines()
+        rows = list(iter_delimited_rows(path, bad_lines=bad_lines))
+        self.assertEqual(rows, [['SKU', 'PRICE'], ['sku-1', '1.00'], ['sku-3', '3.00']])
+        self.assertEqual(len(bad_lines), 1)
+        self.assertEqual(bad_lines.line_numbers, [3])
+        self.assertIn('Skipped 1 lines', bad_lines.summary(path))
+
+    def test_bad_line_is_decoded_with_an_error_handler(self):
+        path = self.write(b'SKU\nsku-\xff2\n')
+        bad_lines = BadLines()
+        rows = list(iter_delimited_rows(path, errors='replace', bad_lines=bad_lines))
+        self.assertEqual(rows, [['SKU'], ['sku-�2']])
+        self.assertEqual(len(bad_lines), 1)
+
+    def test_strict_errors_raise(self):
+        path = self.write(b'SKU\nsku-\xff2\n')
+        with self.assertRaises(UnicodeDecodeError):
+            list(iter_decoded_lines(path, errors='strict'))
+
+    def test_line_endings_and_quoted_fields(self):
+        path = self.write(b'SKU\tNOTE\r\nsku-1\t"two\r\nlines"\rsku-2\tlast')
+        self.assertEqual(list(iter_delimited_rows(path)),
+                         [['SKU', 'NOTE'], ['sku-1', 'two\r\nlines'], ['sku-2', 'last']])
+
+    def test_empty_file(self):
+        self.assertEqual(list(iter_decoded_lines(self.write(b''))), [])
+
+    def test_small_blocks_read_like_a_text_file(self):
+        content = ''.join(f'sku-{i}\t{i}.00\tcafé\n' for i in range(200)).encode('utf-8')
+        path = self.write(content + b'bad\xfe\n' + content)
+        bad_lines = BadLines()
+        lines = list(iter_decoded_lines(path, bad_lines=bad_lines, block_size=64))
+        expected = content.decode('utf-8').splitlines(keepends=True)
+        self.assertEqual(lines, expected + expected)
+        self.assertEqual(bad_lines.line_numbers, [201])
+        with open(path, encoding='utf-8', errors='ignore', newline='') as f:
+            rows = [row for row in csv.reader(f, delimiter='\t') if row != ['bad']]
+        self.assertEqual(list(csv.reader(lines, delimiter='\t')), rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import re
+import tempfile
+import unittest
+
+from file_discovery import FileManifest, get_manifest
+
+
+class TestFileManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.files = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def touch(self, relative_path, mtime=1_000_000):
+        path = os.path.join(self.files, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w'):
+            pass
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_newest_match_wins(self):
+        self.touch('archive/Restock_Report_2026-01-01.csv', mtime=1_000_000)
+        newest = self.touch('archive/2026/restock_report_2026-02-01.xlsx', mtime=2_000_000)
+        self.touch('Restock_Report_2025-12-01.txt', mtime=500_000)
+        self.assertEqual(FileManifest(self.files).find('restock_report'), newest)
+
+    def test_lock_and_other_files_are_not_reports(self):
+        report = self.touch('inventory_file.xlsx', mtime=1_000_000)
+        self.touch('~$inventory_file.xlsx', mtime=2_000_000)
+        self.touch('inventory notes.docx', mtime=2_000_000)
+        self.assertEqual(FileManifest(self.files).find('inventory_file'), report)
+
+    def test_closest_file_name_is_the_fallback(self):
+        report = self.touch('infrmed_csv.txt')
+        manifest = FileManifest(self.files)
+        self.assertIsNone(manifest.matches('informed_csv'))
+        self.assertEqual(manifest.find('informed_csv'), report)
+        self.assertIsNone(manifest.find('restock_report'))
+
+    def test_regex_patterns(self):
+        report = self.touch('export-4711.tsv')
+        self.touch('export-latest.tsv', mtime=2_000_000)
+        manifest = FileManifest(self.files, {'informed_csv': [re.compile(r'^export-\d+\.tsv$')]})
+        self.assertEqual(manifest.find('informed_csv'), report)
+
+    def test_manifest_is_scanned_again_once_stale(self):
+        self.touch('inventory_file.xlsx', mtime=1_000_000)
+        manifest = get_manifest(self.files)
+        self.assertFalse(manifest.is_stale)
+        newer = self.touch('inventory_file (1).xlsx', mtime=2_000_000)
+        self.assertTrue(manifest.is_stale)
+        self.assertEqual(get_manifest(self.files).find('inventory_file'), newer)
+
+
+if __name__ == '__main__':
+    unittest.main()
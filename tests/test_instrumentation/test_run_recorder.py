@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import unittest
+
+import instrumentation
+from instrumentation import RunRecorder
+
+
+class TestRunRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_repeated_stages_are_summed(self):
+        recorder = RunRecorder()
+        recorder.record('processors', 1.0, 100)
+        recorder.record('processors', 3.0, 300)
+        stage_record = recorder.records['processors']
+        self.assertEqual(stage_record.calls, 2)
+        self.assertEqual(stage_record.seconds, 4.0)
+        self.assertEqual(stage_record.rows, 400)
+        self.assertEqual(stage_record.rows_per_second, 100.0)
+
+    def test_stage_rows_set_inside_the_block(self):
+        recorder = RunRecorder()
+        with instrumentation.recording(recorder):
+            with instrumentation.stage('find_skus') as stage:
+                stage.rows = 5
+        self.assertEqual(recorder.records['find_skus'].rows, 5)
+        self.assertEqual(recorder.records['find_skus'].calls, 1)
+
+    def test_stage_records_the_growth_of_the_peak_rss(self):
+        recorder = RunRecorder()
+        with instrumentation.recording(recorder):
+            with instrumentation.stage('read_files'):
+                pass
+        recorder.record('processors', 1.0)
+        stage_record = recorder.records['read_files']
+        self.assertGreater(instrumentation.peak_rss_bytes(), 0)
+        self.assertGreaterEqual(stage_record.peak_rss_growth_bytes, 0)
+        self.assertLessEqual(stage_record.peak_rss_growth_bytes, stage_record.cumulative_peak_rss_bytes)
+        # A stage timed elsewhere did not run in this process
+        self.assertIsNone(recorder.records['processors'].peak_rss_growth_bytes)
+
+    def test_nothing_is_recorded_without_an_active_recorder(self):
+        recorder = RunRecorder()
+        with instrumentation.stage('save') as stage:
+            stage.rows = 1
+        instrumentation.record('read_report:restock_report', 1.0, 1)
+        self.assertIsNone(instrumentation.active_recorder())
+        self.assertEqual(recorder.records, {})
+
+    def test_write_run_report(self):
+        recorder = RunRecorder()
+        recorder.record('save', 0.5)
+        file_path = recorder.write(os.path.join(self.directory.name, 'run_report.json'))
+        with open(file_path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual([stage['name'] for stage in report['stages']], ['save'])
+        self.assertIsNone(report['stages'][0]['rows_per_second'])
+
+    def test_profiled_stage_dumps_stats(self):
+        recorder = RunRecorder(profile=['process_rows'], profile_directory=self.directory.name)
+        with instrumentation.recording(recorder):
+            with instrumentation.stage('process_rows', rows=1):
+                sum(range(10))
+            with instrumentation.stage('save'):
+                pass
+        self.assertEqual(len(recorder.profile_files), 1)
+        self.assertTrue(os.path.exists(recorder.profile_files[0]))
+        self.assertEqual(os.path.dirname(recorder.profile_files[0]), self.directory.name)
+
+    def test_nested_profiled_stage_is_profiled_by_the_outer_stage(self):
+        recorder = RunRecorder(profile=['process_rows', 'processors'], profile_directory=self.directory.name)
+        with instrumentation.recording(recorder):
+            with instrumentation.stage('process_rows'):
+                with self.assertWarns(UserWarning):
+                    with instrumentation.stage('processors'):
+                        sum(range(10))
+            with instrumentation.stage('processors'):
+                pass
+        self.assertEqual(len(recorder.profile_files), 2)
+        self.assertEqual(recorder.records['processors'].calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
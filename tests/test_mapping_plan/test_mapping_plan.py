@@ -0,0 +1,76 @@
+import unittest.mock
+
+import processors
+from cell_mapping import OUTPUT_MAPPED_CELLS
+from mapping_plan import MappingPlan, get_mapping_plan
+from validation import ValidationReport
+
+
+class TestMappingPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.plan = MappingPlan(OUTPUT_MAPPED_CELLS)
+        self.row_data = {
+            'restock_row': {'Merchant SKU': 'A', 'Total Units': '10', 'Units Sold Last 30 Days': '5'},
+            'inventory_row': {'Quantity Available': '3'},
+            'informed_row': {},
+        }
+
+    def test_mapping_plan_columns_follow_output_mapped_cells(self):
+        self.assertEqual(self.plan.column_names, tuple(cell['column_name'] for cell in OUTPUT_MAPPED_CELLS))
+        position = self.plan.column_names.index('Days on Hand')
+        self.assertIsNone(self.plan.file_names[position])
+        self.assertIs(self.plan.processors[position], processors.calculate_days_on_hand)
+        self.assertIs(self.plan.validators[position], processors.validate_number)
+
+    def test_mapping_plan_map_row(self):
+        mapped_row = self.plan.map_row(self.row_data)
+        self.assertEqual(list(mapped_row), list(self.plan.column_names))
+        self.assertEqual(mapped_row['Merchant SKU'], 'A')
+        self.assertEqual(mapped_row['Quantity Available'], '3')
+        self.assertEqual(mapped_row['COST'], '')
+
+    def test_mapping_plan_new_row_is_a_copy(self):
+        row = self.plan.new_row()
+        row['ASIN'] = 'B0'
+        self.assertEqual(self.plan.new_row()['ASIN'], '')
+
+    @unittest.mock.patch('mapping_plan.print', create=True)
+    def test_mapping_plan_validate_row(self, mock_print: unittest.mock.MagicMock):
+        mapped_row = self.plan.map_row(self.row_data)
+        self.assertTrue(self.plan.validate_row(mapped_row))
+        mapped_row['COST'] = 'abc'
+        self.assertFalse(self.plan.validate_row(mapped_row))
+        mock_print.assert_called_once_with('Invalid cell COST with value: abc skipping...')
+
+    @unittest.mock.patch('mapping_plan.print', create=True)
+    def test_mapping_plan_validate_batch_matches_validate_row(self, *_):
+        rows = []
+        for cost in ('1.5', '', None, 'abc', 0, 'nan', object()):
+            row = self.plan.map_row(self.row_data)
+            row['COST'] = cost
+            rows.append(row)
+        report = ValidationReport()
+        self.assertEqual(self.plan.validate_batch(rows, report), [self.plan.validate_row(row) for row in rows])
+        self.assertEqual(report.rejected_rows, 2)
+        self.assertEqual(report.rejects[0], ('A', 'COST', 'abc', 'failed validate_number'))
+        self.assertTrue(report.rejects[1].reason.startswith('error: '))
+
+    def test_mapping_plan_process_cells(self):
+        mapped_row = self.plan.map_row(self.row_data)
+        cells = [unittest.mock.MagicMock(value=value) for value in mapped_row.values()]
+        self.plan.process_cells(mapped_row, cells)
+        self.assertEqual(cells[self.plan.column_names.index('Days on Hand')].value, 60)
+        self.assertEqual(cells[self.plan.column_names.index('Total Units')].value, 10.0)
+
+    def test_mapping_plan_projection(self):
+        self.assertEqual(self.plan.projection('inventory_file').columns,
+                         {'Part Number', 'Primary Supplier', 'Classification', 'Quantity Available'})
+        self.assertIn('Merchant SKU', self.plan.projection('restock_report').columns)
+
+    def test_get_mapping_plan_is_compiled_once(self):
+        self.assertIs(get_mapping_plan(), get_mapping_plan())
+
+
+if __name__ == '__main__':
+    unittest.main()
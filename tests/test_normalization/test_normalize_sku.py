@@ -0,0 +1,41 @@
+import unittest
+
+import utils
+from normalization import normalize_sku, normalize_key, sanitize_cell_value
+
+EDGE_CASES = ['SKU-1', ' sku-1 ', 'SKU-1\xa0', '\xa0SKU-1', 'S\xa0K\nU', '\xa0 SKU\xa0\n', 'a\xa0\t\xa0', ' \xa0', ' ',
+              '\n', '\t SKU \r\n', 'ÉLAN ', '', None, 0, 12, 1.5, False, True]
+
+
+def chained(value):
+    return sanitize_cell_value(value).lower()
+
+
+class TestNormalizeSku(unittest.TestCase):
+
+    def test_normalize_sku_matches_chained_normalizers(self):
+        for value in EDGE_CASES:
+            with self.subTest(value=value):
+                self.assertEqual(normalize_sku(value), chained(value))
+
+    def test_normalize_sku_raises_like_chained_normalizers(self):
+        for value in ['\xa0', '\xa0\xa0']:
+            with self.subTest(value=value):
+                self.assertRaises(IndexError, chained, value)
+                self.assertRaises(IndexError, normalize_sku, value)
+
+    def test_normalize_key_is_memoized(self):
+        normalize_key.cache_clear()
+        self.assertEqual(normalize_key('\xa0Merchant\xa0SKU'), 'merchant sku')
+        self.assertEqual(normalize_key('\xa0Merchant\xa0SKU'), 'merchant sku')
+        self.assertEqual(normalize_key.cache_info().hits, 1)
+
+    def test_utils_exposes_the_normalizers(self):
+        for value in EDGE_CASES:
+            with self.subTest(value=value):
+                self.assertEqual(utils.lower_clean_cell_value(value), chained(value))
+                self.assertEqual(utils.sanitize_cell_value(value), sanitize_cell_value(value))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+import common
+from partitioned_join import SpilledReport, join_partitions, partition_count_for, partition_of
+from sku_index import SkuIndex, join_sku_indexes
+from tests.report_fixtures import ReportsTestCase, as_dicts
+
+
+class TestJoinPartitions(ReportsTestCase):
+    sku_count = 300
+
+    def spill(self, name, rows, partition_count):
+        return SpilledReport(self.directory.name, name, partition_count).spill(rows)
+
+    def test_rows_with_skus_in_different_partitions(self):
+        restock = [{'Merchant SKU': 'A-1', 'Total Units': '1'}, {'Merchant SKU': 'b-2', 'Total Units': '2'}]
+        # One row holds both skus, a later row of the first sku must not win over it
+        inventory = [{'sku': 'a-1', 'seller-sku': 'B-2 ', 'qty': '5'}, {'sku': 'A-1', 'seller-sku': '', 'qty': '6'}]
+        informed = [{'SKU': 'a-1', 'MARKETPLACE_ID': '2', 'COST': '1'},
+                    {'SKU': 'a-1', 'MARKETPLACE_ID': '', 'COST': '2'},
+                    {'SKU': 'b-2', 'MARKETPLACE_ID': '1', 'COST': '3'}]
+        self.assertNotEqual(partition_of('a-1', 2), partition_of('b-2', 2))
+        skus = [row['Merchant SKU'] for row in restock]
+        for market_place_id in ('1', '2', None):
+            expected = join_sku_indexes(skus, SkuIndex(restock), SkuIndex(inventory), SkuIndex(informed),
+                                        market_place_id=market_place_id)
+            joined = join_partitions(skus, self.spill('restock', restock, 2), self.spill('inventory', inventory, 2),
+                                     self.spill('informed', informed, 2), market_place_id=market_place_id)
+            self.assertEqual(list(joined), list(expected))
+            self.assertEqual(as_dicts(joined), as_dicts(expected))
+
+    def test_find_skus_within_budget_matches_find_skus(self):
+        files = common.read_files(file_paths=self.file_paths)
+        for memory_budget in (2 ** 30, 1):
+            for market_place_id in ('1', '2'):
+                expected = common.find_skus(*files, market_place_id=market_place_id)
+                joined = common.find_skus_within_budget(memory_budget, market_place_id=market_place_id,
+                                                        file_paths=self.file_paths,
+                                                        spill_directory=self.directory.name)
+                self.assertEqual(list(joined), list(expected))
+                self.assertEqual(as_dicts(joined), as_dicts(expected))
+
+    def test_partition_count_for(self):
+        self.assertEqual(partition_count_for(100, 100), 1)
+        self.assertEqual(partition_count_for(101, 100), 3)
+        self.assertEqual(partition_count_for(10 ** 12, 1), 256)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest.mock
+
+import processors
+import styles
+
+
+class TestBatchProcessors(unittest.TestCase):
+
+    def run_per_cell(self, processor, row: dict, value=''):
+        cell = unittest.mock.MagicMock(value=value)
+        with unittest.mock.patch('processors.apply_style') as mock_apply_style:
+            try:
+                processor(row, cell)
+                error = None
+            except Exception as exception:
+                error = exception
+        style = mock_apply_style.call_args.args[1] if mock_apply_style.called else None
+        return cell.value, style, error
+
+    def assert_same_as_per_cell(self, processor, rows, processed_cells, values=None):
+        values = values or [''] * len(rows)
+        for row, value, processed_cell in zip(rows, values, processed_cells):
+            expected_value, expected_style, expected_error = self.run_per_cell(processor, row, value)
+            actual_value = value if processed_cell.value is processors.KEEP_VALUE else processed_cell.value
+            self.assertEqual(actual_value, expected_value, row)
+            self.assertEqual(processed_cell.style, expected_style, row)
+            self.assertEqual(processed_cell.error is None, expected_error is None, row)
+
+    def test_calculate_days_on_hand_batch(self):
+        rows = [
+            {'Total Units': '100', 'Units Sold Last 30 Days': '10'},
+            {'Total Units': '0', 'Units Sold Last 30 Days': '0'},
+            {'Total Units': '1', 'Units Sold Last 30 Days': '0'},
+            {'Total Units': '', 'Units Sold Last 30 Days': '3'},
+            {'Units Sold Last 30 Days': '1'},
+            {},
+        ]
+        processed_cells = processors.calculate_days_on_hand_batch(
+            processors.get_column(rows, 'Total Units'), processors.get_column(rows, 'Units Sold Last 30 Days'))
+        self.assertEqual([cell.value for cell in processed_cells[:3]], [300, 1, 'Infinity'])
+        self.assert_same_as_per_cell(processors.calculate_days_on_hand, rows, processed_cells)
+
+    def test_calculate_buy_box_color_batch(self):
+        rows = [
+            {'BUY_BOX_PRICE': '6', 'MIN_PRICE': '5', 'MAX_PRICE': '8'},
+            {'BUY_BOX_PRICE': '5', 'MIN_PRICE': '5', 'MAX_PRICE': '8'},
+            {'BUY_BOX_PRICE': '9', 'MIN_PRICE': '5', 'MAX_PRICE': '8'},
+            {'BUY_BOX_PRICE': '', 'MIN_PRICE': '5', 'MAX_PRICE': '8'},
+            {'BUY_BOX_PRICE': 'abc', 'MIN_PRICE': '5', 'MAX_PRICE': '8'},
+        ]
+        processed_cells = processors.calculate_buy_box_color_batch(
+            processors.get_column(rows, 'BUY_BOX_PRICE'), processors.get_column(rows, 'MIN_PRICE'),
+            processors.get_column(rows, 'MAX_PRICE'))
+        self.assertEqual([cell.style for cell in processed_cells],
+                         [styles.GREEN_STYLE, styles.RED_STYLE, styles.ORANGE_STYLE, None, None])
+        self.assert_same_as_per_cell(processors.calculate_buy_box_color, rows, processed_cells)
+
+    def test_mapped_rows_are_read_without_a_column_plan(self):
+        from mapping_plan import get_mapping_plan
+        row = get_mapping_plan().new_row()
+        row.update({'Total Units': '100', 'Units Sold Last 30 Days': '10'})
+        with unittest.mock.patch('processors.column_plan_for') as column_plan_for:
+            self.assertEqual(processors.get_cell(row, 'total units'), '100')
+            self.assertEqual(processors.get_column([row, row], 'Units Sold Last 30 Days'), ['10', '10'])
+        column_plan_for.assert_not_called()
+        # Rows that were not mapped are still read through the plan of their headers
+        self.assertEqual(processors.get_cell({' TOTAL UNITS ': '5'}, 'Total Units'), '5')
+        self.assertEqual(processors.get_column([{'total units': '5'}, {}], 'Total Units'), ['5', None])
+
+    def test_apply_number_style_batch(self):
+        values = ['1.5', '', 'abc', 0, '3']
+        processed_cells = processors.apply_number_style_batch(values)
+        self.assertEqual(processed_cells[0].value, 1.5)
+        self.assert_same_as_per_cell(processors.apply_number_style, [{}] * len(values), processed_cells, values)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import report_cache
+from report_cache import ReportCache
+
+
+class TestReportCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ReportCache(os.path.join(self.directory.name, 'cache'))
+        self.file_path = self.write('report.txt', 'SKU\tCOST\nA\t1\n')
+        self.rows = [{'SKU': 'A', 'COST': '1'}, {'SKU': 'B', 'COST': ''}]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name: str, content: str) -> str:
+        file_path = os.path.join(self.directory.name, name)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return file_path
+
+    def test_report_cache_miss(self):
+        self.assertFalse(self.cache.contains(self.file_path))
+        self.assertIsNone(self.cache.load(self.file_path))
+
+    def test_report_cache_round_trip(self):
+        self.cache.store(self.file_path, self.rows)
+        self.assertTrue(self.cache.contains(self.file_path))
+        self.assertEqual(self.cache.load(self.file_path), self.rows)
+
+    def test_report_cache_hashes_a_missed_file_once(self):
+        with unittest.mock.patch('report_cache.hash_file', wraps=report_cache.hash_file) as hash_file:
+            self.assertIsNone(self.cache.load(self.file_path))
+            self.cache.store(self.file_path, self.rows)
+        hash_file.assert_called_once_with(self.file_path)
+        self.assertEqual(self.cache.load(self.file_path), self.rows)
+
+    def test_report_cache_changed_file_is_not_reused(self):
+        self.cache.store(self.file_path, self.rows)
+        self.write('report.txt', 'SKU\tCOST\nA\t2\n')
+        self.assertIsNone(self.cache.load(self.file_path))
+
+    def test_report_cache_same_content_is_found_by_hash(self):
+        self.cache.store(self.file_path, self.rows)
+        copy_path = self.write('copy.txt', 'SKU\tCOST\nA\t1\n')
+        self.assertFalse(self.cache.contains(copy_path))
+        self.assertEqual(self.cache.load(copy_path), self.rows)
+        self.assertTrue(self.cache.contains(copy_path))
+
+    def test_report_cache_evicts_least_recently_used(self):
+        other_path = self.write('other.txt', 'SKU\nB\n')
+        self.cache.store(self.file_path, self.rows)
+        entry_size = sum(os.path.getsize(os.path.join(self.cache.directory, name))
+                         for name in os.listdir(self.cache.directory) if name.endswith('.pickle'))
+        for name in os.listdir(self.cache.directory):
+            os.utime(os.path.join(self.cache.directory, name), (0, 0))
+        self.cache.max_bytes = entry_size
+        self.cache.store(other_path, [{'SKU': 'B'}])
+        self.assertIsNone(self.cache.load(self.file_path))
+        self.assertEqual(self.cache.load(other_path), [{'SKU': 'B'}])
+
+    def test_report_cache_evicts_orphaned_links(self):
+        self.cache.store(self.file_path, self.rows)
+        self.cache.store(self.file_path, self.rows, 'projected')
+        self.assertEqual(len([name for name in os.listdir(self.cache.directory) if name.endswith('.link')]), 2)
+        self.cache.max_bytes = 0
+        self.cache.evict()
+        self.assertEqual(os.listdir(self.cache.directory), [])
+        self.assertFalse(self.cache.contains(self.file_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import unittest
+
+import common
+from mapping_plan import get_mapping_plan
+from report_store import ReportStore
+from tests.report_fixtures import ReportsTestCase, as_dicts
+
+
+class TestReportStore(ReportsTestCase):
+    sku_count = 150
+
+    def setUp(self):
+        super().setUp()
+        self.store = ReportStore(os.path.join(self.directory.name, 'store', 'reports.sqlite'))
+
+    def tearDown(self):
+        self.store.close()
+        super().tearDown()
+
+    def load(self, store=None):
+        store = store or self.store
+        return [store.load(file_name, file_path, get_mapping_plan().projection(file_name))
+                for file_name, file_path in self.file_paths.items()]
+
+    def test_join_matches_find_skus(self):
+        self.load()
+        files = common.read_files(file_paths=self.file_paths)
+        for market_place_id in ('1', '2', None):
+            expected = common.find_skus(*files, market_place_id=market_place_id)
+            joined = self.store.join(market_place_id)
+            self.assertEqual(list(joined), list(expected))
+            self.assertEqual(as_dicts(joined), as_dicts(expected))
+
+    def test_unchanged_reports_are_not_loaded_again(self):
+        self.assertEqual(self.load(), [True, True, True])
+        self.store.close()
+        with ReportStore(self.store.path) as store:
+            self.assertEqual(self.load(store), [False, False, False])
+            informed_csv = self.file_paths['informed_csv']
+            os.utime(informed_csv, ns=(0, os.stat(informed_csv).st_mtime_ns + 1))
+            self.assertEqual(self.load(store), [False, False, True])
+
+    def test_restock_report_without_skus(self):
+        self.assertEqual(self.store.join('1'), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import pickle
+import unittest
+
+from report_table import ReportTable, TableRow
+
+
+class TestReportTable(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [{'SKU': 'A', 'COST': '1'}, {'SKU': 'B', 'COST': ''}]
+        self.table = ReportTable(['SKU', 'COST'], [['A', '1'], ['B', '']])
+
+    def test_report_table_rows_behave_like_dicts(self):
+        row = self.table[0]
+        self.assertIsInstance(row, TableRow)
+        self.assertEqual(row['SKU'], 'A')
+        self.assertEqual(row.get('COST'), '1')
+        self.assertIsNone(row.get('MIN_PRICE'))
+        self.assertIn('SKU', row)
+        self.assertNotIn('MIN_PRICE', row)
+        self.assertEqual(list(row.keys()), ['SKU', 'COST'])
+        self.assertEqual(dict(row), self.rows[0])
+        with self.assertRaises(KeyError):
+            _ = row['MIN_PRICE']
+
+    def test_report_table_equals_list_of_dicts(self):
+        self.assertEqual(self.table, self.rows)
+        self.assertEqual(ReportTable.from_dicts(self.rows), self.table)
+        self.assertEqual(len(self.table), 2)
+
+    def test_report_table_repeated_header_last_value_wins(self):
+        table = ReportTable(['SKU', 'SKU'], [['A', 'B']])
+        self.assertEqual(table[0], dict(zip(['SKU', 'SKU'], ['A', 'B'])))
+
+    def test_report_table_creates_rows_on_access(self):
+        self.assertEqual(list(self.table.values()), [('A', '1'), ('B', '')])
+        self.assertEqual(self.table[-1], self.rows[-1])
+        self.assertEqual(self.table[:1], self.rows[:1])
+        self.assertTrue(all(isinstance(row, TableRow) for row in self.table))
+        self.assertEqual(self.table.append(['C', '3']), {'SKU': 'C', 'COST': '3'})
+        self.assertEqual(len(self.table), 3)
+
+    def test_report_table_pickle(self):
+        self.assertEqual(pickle.loads(pickle.dumps(self.table)), self.rows)
+
+    def test_table_row_pickle_does_not_take_its_table(self):
+        row = pickle.loads(pickle.dumps(self.table[1]))
+        self.assertEqual(row, self.rows[1])
+        self.assertLess(len(pickle.dumps(self.table[1])), len(pickle.dumps(self.table)))
+
+
+if __name__ == '__main__':
+    unittest.main()
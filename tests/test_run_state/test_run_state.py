@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+from cell_mapping import OUTPUT_MAPPED_CELLS
+from mapping_plan import MappingPlan
+from run_state import RunState, StateEntry, fingerprint_row_data
+
+
+class TestRunState(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.plan = MappingPlan(OUTPUT_MAPPED_CELLS)
+        self.entries = {'a': StateEntry('fingerprint', {'Merchant SKU': 'A'})}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_run_state_round_trip(self):
+        RunState(self.directory.name, '1').save(self.plan, self.entries)
+        self.assertEqual(RunState(self.directory.name, 1).load(self.plan), self.entries)
+
+    def test_run_state_without_previous_run(self):
+        self.assertEqual(RunState(os.path.join(self.directory.name, 'missing')).load(self.plan), {})
+
+    def test_run_state_is_kept_per_marketplace(self):
+        RunState(self.directory.name, '1').save(self.plan, self.entries)
+        self.assertEqual(RunState(self.directory.name, '2').load(self.plan), {})
+
+    def test_run_state_of_another_plan_is_ignored(self):
+        RunState(self.directory.name, '1').save(self.plan, self.entries)
+        other_plan = MappingPlan(OUTPUT_MAPPED_CELLS[:-1])
+        self.assertEqual(RunState(self.directory.name, '1').load(other_plan), {})
+
+    def test_fingerprint_row_data_changes_with_any_value(self):
+        row_data = {'restock_row': {'Merchant SKU': 'A'}, 'inventory_row': {}, 'informed_row': {'COST': '1'}}
+        fingerprint = fingerprint_row_data(row_data)
+        self.assertEqual(fingerprint_row_data(dict(row_data)), fingerprint)
+        row_data['informed_row'] = {'COST': '2'}
+        self.assertNotEqual(fingerprint_row_data(row_data), fingerprint)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from sku_index import SkuIndex, join_sku_indexes
+
+
+class TestJoinSkuIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.restock = [{'Merchant SKU': 'B'}, {'Merchant SKU': 'A'}, {'Merchant SKU': 'C'}]
+        self.inventory = [{'SKU': 'a'}, {'SKU': 'c'}]
+        self.informed = [{'SKU': 'A', 'MARKETPLACE_ID': '1'}, {'SKU': 'B', 'MARKETPLACE_ID': '2'}]
+
+    def join(self, market_place_id=None):
+        return join_sku_indexes(
+            [row['Merchant SKU'] for row in self.restock],
+            SkuIndex(self.restock), SkuIndex(self.inventory), SkuIndex(self.informed),
+            market_place_id=market_place_id,
+        )
+
+    def test_join_sku_indexes_keeps_restock_order(self):
+        self.assertEqual(list(self.join()), ['b', 'a', 'c'])
+
+    def test_join_sku_indexes_missing_rows_are_empty(self):
+        matched = self.join(market_place_id='1')
+        self.assertEqual(matched['b']['inventory_row'], {})
+        self.assertEqual(matched['b']['informed_row'], {})
+        self.assertIs(matched['a']['informed_row'], self.informed[0])
+        self.assertIs(matched['c']['inventory_row'], self.inventory[1])
+
+    def test_join_sku_indexes_only_filters_informed_by_marketplace(self):
+        matched = self.join(market_place_id='2')
+        self.assertEqual(matched['a']['informed_row'], {})
+        self.assertIs(matched['a']['inventory_row'], self.inventory[0])
+        self.assertIs(matched['b']['informed_row'], self.informed[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
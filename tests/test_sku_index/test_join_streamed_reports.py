@@ -0,0 +1,42 @@
+import unittest
+
+from sku_index import SkuIndex, join_sku_indexes, join_streamed_reports, match_first_rows
+
+
+class TestJoinStreamedReports(unittest.TestCase):
+
+    def setUp(self):
+        self.restock = [{'Merchant SKU': 'B'}, {'Merchant SKU': 'A'}, {'Merchant SKU': 'C'}, {'Merchant SKU': 'A'},
+                        {'Merchant SKU': 'D'}]
+        self.inventory = [{'SKU': 'a'}, {'SKU': ' C '}, {'SKU': 'c'}]
+        self.informed = [
+            {'SKU': 'A', 'MARKETPLACE_ID': '2'},
+            {'SKU': 'A', 'MARKETPLACE_ID': '1'},
+            {'SKU': 'B', 'MARKETPLACE_ID': ''},
+            {'SKU': 'B', 'MARKETPLACE_ID': '1'},
+            {'SKU': 'C', 'MARKETPLACE_ID': 2},
+        ]
+        self.skus = [row['Merchant SKU'] for row in self.restock]
+
+    def test_join_streamed_reports_matches_join_sku_indexes(self):
+        for market_place_id in (None, '1', 2, '3'):
+            expected = join_sku_indexes(self.skus, SkuIndex(self.restock), SkuIndex(self.inventory),
+                                        SkuIndex(self.informed), market_place_id=market_place_id)
+            streamed = join_streamed_reports(self.skus, SkuIndex(self.restock), iter(self.inventory),
+                                             iter(self.informed), market_place_id=market_place_id)
+            self.assertEqual(list(streamed), list(expected))
+            for sku, row_data in expected.items():
+                for row_key, row in row_data.items():
+                    if row:
+                        self.assertIs(streamed[sku][row_key], row)
+                    else:
+                        self.assertEqual(streamed[sku][row_key], {})
+
+    def test_match_first_rows_stops_once_every_sku_is_found(self):
+        rows = iter([{'SKU': 'A'}, {'SKU': 'B'}, {'SKU': 'C'}])
+        self.assertEqual(list(match_first_rows(['a'], rows)), ['a'])
+        self.assertEqual(next(rows), {'SKU': 'C'})
+
+
+if __name__ == '__main__':
+    unittest.main()
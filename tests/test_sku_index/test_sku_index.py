@@ -0,0 +1,51 @@
+import unittest
+
+from sku_index import SkuIndex
+
+
+class TestSkuIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [
+            {'SKU': ' A1 ', 'MARKETPLACE_ID': '1', 'COST': '1'},
+            {'SKU': 'a1', 'MARKETPLACE_ID': '', 'COST': '2'},
+            {'SKU': 'A1', 'MARKETPLACE_ID': '2', 'COST': '3'},
+            {'SKU': 'B2', 'MARKETPLACE_ID': '2', 'COST': '4'},
+        ]
+        self.index = SkuIndex(self.rows)
+
+    def test_sku_index_normalizes_skus(self):
+        self.assertIn('a1', self.index)
+        self.assertIn('b2', self.index)
+        self.assertEqual(len(self.index), 2)
+
+    def test_sku_index_first_row_wins_without_marketplace(self):
+        self.assertIs(self.index.get('a1'), self.rows[0])
+
+    def test_sku_index_rows_without_marketplace_match_any_marketplace(self):
+        self.assertIs(self.index.get('a1', '2'), self.rows[1])
+        self.assertIs(self.index.get('a1', '3'), self.rows[1])
+
+    def test_sku_index_marketplace_id_can_be_int(self):
+        self.assertIs(self.index.get('a1', 1), self.rows[0])
+        self.assertIs(self.index.get('b2', 2), self.rows[3])
+
+    def test_sku_index_filters_other_marketplaces(self):
+        self.assertIsNone(self.index.get('b2', '1'))
+        self.assertEqual(set(self.index.skus('1')), {'a1'})
+
+    def test_sku_index_marketplaces(self):
+        self.assertEqual(self.index.marketplaces, {'1', '2'})
+
+    def test_sku_index_match_keeps_sku_order(self):
+        matched = self.index.match(['B2', 'missing', 'A1'])
+        self.assertEqual(list(matched), ['b2', 'a1'])
+
+    def test_sku_index_indexes_every_sku_column(self):
+        index = SkuIndex([{'Merchant SKU': 'A', 'FNSKU': 'X'}])
+        self.assertIn('a', index)
+        self.assertIn('x', index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from openpyxl import Workbook
+from openpyxl.cell import Cell
+
+import styles
+from my_types import RED_COLOR
+
+
+class TestApplyStyle(unittest.TestCase):
+
+    def test_apply_style_number(self):
+        cell = Workbook().active['A1']
+        styles.apply_style(cell, styles.NUMBER_STYLE)
+        self.assertEqual(cell.number_format, styles.NUMBER_FORMAT)
+
+    def test_apply_style_fill(self):
+        cell = Workbook().active['A1']
+        styles.apply_style(cell, styles.RED_STYLE)
+        self.assertEqual(cell.fill.fgColor.rgb, f'00{RED_COLOR}')
+        self.assertEqual(cell.fill.fill_type, 'solid')
+        self.assertEqual(cell.number_format, styles.NUMBER_FORMAT)
+
+    def test_apply_style_shares_style_between_cells(self):
+        ws = Workbook().active
+        styles.apply_style(ws['A1'], styles.GREEN_STYLE)
+        styles.apply_style(ws['A2'], styles.GREEN_STYLE)
+        self.assertEqual(ws['A1']._style, ws['A2']._style)
+        self.assertIsNot(ws['A1']._style, ws['A2']._style)
+        self.assertEqual(len(ws.parent._fills), 3)
+
+    def test_apply_style_write_only_cell(self):
+        wb = Workbook(write_only=True)
+        cell = Cell(wb.create_sheet(), row=1, column=1, value=1)
+        styles.apply_style(cell, styles.ORANGE_STYLE)
+        self.assertTrue(cell.has_style)
+        self.assertEqual(cell.number_format, styles.NUMBER_FORMAT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from copy import copy
+
+import openpyxl
+from openpyxl import Workbook
+from openpyxl.cell import Cell
+from openpyxl.styles.cell_style import StyleArray
+
+import styles
+
+
+class TestPrivateStyleApi(unittest.TestCase):
+    """Pins the private openpyxl style attribute styles._copy_cell_style relies on"""
+
+    def test_openpyxl_version(self):
+        # requirements.txt pins openpyxl~=3.0.10, check _copy_cell_style again before moving past it
+        self.assertEqual(openpyxl.__version__.split('.')[:2], ['3', '0'])
+
+    def test_cell_style_is_a_style_array(self):
+        cell = Workbook().active['A1']
+        # An unstyled cell has no array until a style attribute is set
+        self.assertIsNone(cell._style)
+        cell.number_format = styles.NUMBER_FORMAT
+        self.assertIsInstance(cell._style, StyleArray)
+        self.assertIsInstance(copy(cell._style), StyleArray)
+
+    def test_copied_style_array_carries_the_style(self):
+        for workbook in (Workbook(), Workbook(write_only=True)):
+            worksheet = workbook.active if not workbook.write_only else workbook.create_sheet()
+            source = Cell(worksheet, row=1, column=1)
+            source.number_format = styles.NUMBER_FORMAT
+            source.fill = styles.CELL_STYLES[styles.GREEN_STYLE].fill
+            target = Cell(worksheet, row=2, column=1)
+            styles._copy_cell_style(source, target)
+            self.assertEqual(target.number_format, styles.NUMBER_FORMAT)
+            self.assertEqual(target.fill.fgColor.rgb, source.fill.fgColor.rgb)
+            self.assertEqual(target.fill.fill_type, 'solid')
+            self.assertIsNot(target._style, source._style)
+            target.number_format = 'General'
+            self.assertEqual(source.number_format, styles.NUMBER_FORMAT)
+
+
+if __name__ == '__main__':
+    unittest.main()
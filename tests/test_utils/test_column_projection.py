@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest.mock
+
+import openpyxl
+
+import utils
+
+
+@unittest.mock.patch('utils.print', create=True)
+class TestColumnProjection(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.columns = utils.ColumnProjection(['COST'])
+        self.header = ['FNSKU', 'Product Name', 'COST', '\xa0MARKETPLACE_ID', 'Merchant SKU']
+        self.row = ['X1', ' Product ', '1.5', '1', 'A']
+        self.expected = [{'FNSKU': 'X1', 'COST': '1.5', 'MARKETPLACE_ID': '1', 'Merchant SKU': 'A'}]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_column_projection_keeps_sku_and_marketplace_columns(self, _):
+        self.assertEqual(self.columns.indexes([utils.sanitize_names(name) for name in self.header]), [0, 2, 3, 4])
+
+    def test_column_projection_delimited_file(self, _):
+        file_path = os.path.join(self.directory.name, 'report.txt')
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write('\t'.join(self.header) + '\n' + '\t'.join(self.row) + '\n')
+        self.assertEqual(list(utils.read_delimited_file(file_path, columns=self.columns)), self.expected)
+
+    def test_column_projection_xlsx_file(self, _):
+        file_path = os.path.join(self.directory.name, 'report.xlsx')
+        wb = openpyxl.Workbook()
+        wb.active.append(self.header)
+        wb.active.append(self.row)
+        wb.save(file_path)
+        self.assertEqual(utils.read_xslx_file(file_path, columns=self.columns, read_only=True), self.expected)
+
+    def test_column_projection_key_is_stable(self, _):
+        self.assertEqual(utils.ColumnProjection(['B', 'A']).key, utils.ColumnProjection(['A', 'B']).key)
+        self.assertEqual(utils.ColumnProjection(['B', 'A']), utils.ColumnProjection(['A', 'B']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest.mock
+
+import utils
+from report_cache import ReportCache
+
+
+@unittest.mock.patch('utils.print', create=True)
+class TestDecodeErrors(unittest.TestCase):
+    """The error policy of iter_delimited_values reaches it through every reader"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'informed_csv.txt')
+        with open(self.file_path, 'wb') as f:
+            f.write(b'SKU\tCOST\nA1\t1\nB\xff2\t2\nC3\t3\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def skus(self, rows):
+        return [row['SKU'] for row in rows]
+
+    def test_bad_lines_are_skipped_by_default(self, _):
+        self.assertEqual(self.skus(utils.read_report('informed_csv', file_path=self.file_path)), ['A1', 'C3'])
+
+    def test_readers_pass_the_error_policy_on(self, _):
+        expected = ['A1', 'B�2', 'C3']
+        self.assertEqual(self.skus(utils.read_delimited_file(self.file_path, errors='replace')), expected)
+        self.assertEqual(self.skus(utils.read_delimited_table(self.file_path, errors='replace')), expected)
+        for table in (False, True):
+            self.assertEqual(self.skus(utils.read_report_file(self.file_path, table=table, errors='replace')),
+                             expected)
+            self.assertEqual(self.skus(utils.read_report('informed_csv', file_path=self.file_path, table=table,
+                                                         errors='replace')), expected)
+        self.assertEqual(self.skus(utils.iter_report_rows(self.file_path, errors='replace')), expected)
+        self.assertEqual(list(utils.transform_csv_to_xslx(self.file_path, errors='replace').active.values)[2][0],
+                         'B�2')
+
+    def test_strict_policy_raises(self, _):
+        with self.assertRaises(UnicodeDecodeError):
+            utils.read_report('informed_csv', file_path=self.file_path, errors='strict')
+
+    def test_error_policies_are_cached_apart(self, _):
+        cache = ReportCache(os.path.join(self.directory.name, 'cache'))
+        utils.read_report('informed_csv', file_path=self.file_path, cache=cache)
+        rows = utils.read_report('informed_csv', file_path=self.file_path, cache=cache, errors='replace')
+        self.assertEqual(self.skus(rows), ['A1', 'B�2', 'C3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import types
+import unittest.mock
+
+import openpyxl
+
+import utils
+
+
+@unittest.mock.patch('utils.print', create=True)
+class TestIterReportRows(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.header = ['\xa0SKU ', 'COST', 'Unused']
+        self.rows = [[' A1 ', '1.5', 'x'], ['B2', None]]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_xlsx(self) -> str:
+        file_path = os.path.join(self.directory.name, 'report.xlsx')
+        wb = openpyxl.Workbook()
+        for row in [self.header] + self.rows:
+            wb.active.append(row)
+        wb.save(file_path)
+        return file_path
+
+    def write_txt(self) -> str:
+        file_path = os.path.join(self.directory.name, 'report.txt')
+        with open(file_path, 'w', encoding='utf-8', newline='') as f:
+            for row in [self.header] + self.rows:
+                f.write('\t'.join(value or '' for value in row) + '\n')
+        return file_path
+
+    def test_iter_report_rows_is_generator(self, *_):
+        self.assertIsInstance(utils.iter_report_rows(self.write_txt()), types.GeneratorType)
+
+    def test_iter_report_rows_matches_read_report_file(self, *_):
+        columns = utils.ColumnProjection(['COST'])
+        for file_path in (self.write_xlsx(), self.write_txt()):
+            for projection in (None, columns):
+                expected = utils.read_report_file(file_path, columns=projection, table=True, read_only=True)
+                self.assertEqual(list(utils.iter_report_rows(file_path, columns=projection, read_only=True)),
+                                 list(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
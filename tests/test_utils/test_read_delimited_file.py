@@ -0,0 +1,47 @@
+import os
+import tempfile
+import types
+import unittest
+
+import utils
+
+
+class TestReadDelimitedFile(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.file_path = tempfile.mkstemp(suffix='.txt')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def write(self, content: str):
+        with open(self.file_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+
+    def test_read_delimited_file_is_generator(self):
+        self.write('SKU\tCOST\nA\t1\n')
+        self.assertIsInstance(utils.read_delimited_file(self.file_path), types.GeneratorType)
+
+    def test_read_delimited_file_sanitizes_headers_and_values(self):
+        self.write('\xa0SKU\xa0\tMIN\xa0PRICE\n A1 \t2.5\n')
+        rows = list(utils.read_delimited_file(self.file_path))
+        self.assertEqual(rows, [{'SKU': 'A1', 'MIN PRICE': '2.5'}])
+
+    def test_read_delimited_file_pads_short_rows(self):
+        self.write('SKU\tCOST\tMIN_PRICE\nA\t1\n')
+        rows = list(utils.read_delimited_file(self.file_path))
+        self.assertEqual(rows, [{'SKU': 'A', 'COST': '1', 'MIN_PRICE': ''}])
+
+    def test_read_delimited_file_empty_file(self):
+        self.write('')
+        self.assertEqual(list(utils.read_delimited_file(self.file_path)), [])
+
+    def test_read_delimited_file_matches_workbook_path(self):
+        self.write('SKU\tCOST\n A \t1\nB\t\n')
+        workbook_rows = utils.read_xslx_file(utils.transform_csv_to_xslx(self.file_path))
+        self.assertEqual(list(utils.read_delimited_file(self.file_path)), workbook_rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest.mock
+
+import utils
+from report_cache import ReportCache
+from report_table import ReportTable
+
+
+@unittest.mock.patch('utils.print', create=True)
+class TestReadReportCache(unittest.TestCase):
+    """read_report returns the same kind of rows whether the report was cached or not"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'informed_csv.txt')
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            f.write('SKU\tCOST\nA1\t1\nB2\t2\n')
+        self.cache = ReportCache(os.path.join(self.directory.name, 'cache'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cached_report_is_read_as_dictionaries(self, _):
+        for _ in range(2):
+            rows = utils.read_report('informed_csv', file_path=self.file_path, cache=self.cache)
+            self.assertIsInstance(rows, list)
+            self.assertTrue(all(type(row) is dict for row in rows))
+            self.assertEqual(rows, [{'SKU': 'A1', 'COST': '1'}, {'SKU': 'B2', 'COST': '2'}])
+        rows[0]['COST'] = '3'
+
+    def test_cached_report_is_read_as_a_table(self, _):
+        for _ in range(2):
+            rows = utils.read_report('informed_csv', file_path=self.file_path, cache=self.cache, table=True)
+            self.assertIsInstance(rows, ReportTable)
+            self.assertEqual(rows, [{'SKU': 'A1', 'COST': '1'}, {'SKU': 'B2', 'COST': '2'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import csv
+import os
+import tempfile
+import unittest.mock
+
+from validation import ValidationReport, REJECTS_HEADER
+
+
+@unittest.mock.patch('validation.print', create=True)
+class TestValidationReport(unittest.TestCase):
+
+    def test_validation_report_write(self, mock_print: unittest.mock.MagicMock):
+        report = ValidationReport()
+        report.add('SKU-1', 'COST', 'abc', 'failed validate_number')
+        report.rejected_rows = 1
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'rejects.csv')
+            self.assertEqual(report.write(file_path), file_path)
+            with open(file_path, newline='', encoding='utf-8') as f:
+                self.assertEqual(list(csv.reader(f)),
+                                 [list(REJECTS_HEADER), ['SKU-1', 'COST', 'abc', 'failed validate_number']])
+        mock_print.assert_called_once()
+
+    def test_validation_report_without_rejects_writes_nothing(self, mock_print: unittest.mock.MagicMock):
+        self.assertIsNone(ValidationReport().write())
+        mock_print.assert_not_called()
+
+    def test_validation_report_extend(self, *_):
+        report = ValidationReport()
+        report.extend(ValidationReport([('SKU-1', 'COST', 'abc', 'failed validate_number')], rejected_rows=1))
+        self.assertEqual(len(report), 1)
+        self.assertEqual(report.rejected_rows, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
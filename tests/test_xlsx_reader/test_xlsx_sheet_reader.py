@@ -0,0 +1,50 @@
+import datetime
+import os
+import tempfile
+import unittest.mock
+
+import openpyxl
+
+import utils
+from xlsx_reader import XlsxSheetReader
+
+
+class TestXlsxSheetReader(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.file_path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(['\xa0Merchant SKU ', 'Total Units', 'Date', 'Flag', 'Price', 'Formula'])
+        ws.append([' A1 ', 3, datetime.datetime(2024, 1, 2, 3, 4), True, 1.5, '=B2*2'])
+        ws.append([None, None, None])
+        ws['A5'] = 'gap'
+        ws['D5'] = 12
+        wb.create_sheet('other').append(['not', 'active'])
+        wb.save(self.file_path)
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def test_xlsx_sheet_reader_matches_read_only_worksheet(self):
+        expected = [tuple(row) for row in openpyxl.load_workbook(self.file_path, read_only=True).active.values]
+        self.assertEqual([tuple(row) for row in XlsxSheetReader(self.file_path)], expected)
+
+    @unittest.mock.patch('utils.print', create=True)
+    def test_read_xlsx_file_fast_path_matches_openpyxl(self, *_):
+        for kwargs in ({}, {'table': True}, {'columns': utils.ColumnProjection(['Total Units'])}):
+            fast = utils.read_xslx_file(self.file_path, read_only=True, **kwargs)
+            slow = utils.read_xslx_file(self.file_path, read_only=True, fast=False, **kwargs)
+            self.assertEqual(list(fast), list(slow))
+
+    @unittest.mock.patch('utils.print', create=True)
+    @unittest.mock.patch('utils.XlsxSheetReader')
+    def test_read_xlsx_file_writable_loads_use_openpyxl(self, mock_reader: unittest.mock.MagicMock, *_):
+        rows = utils.read_xslx_file(self.file_path)
+        mock_reader.assert_not_called()
+        self.assertEqual(rows[0]['Total Units'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,101 +1,270 @@
-import csv
-import difflib
-import os
 import traceback
 import typing
 
 import openpyxl
 from openpyxl.workbook import Workbook
 
+from column_types import clean_number
+from delimited_reader import BadLines, DEFAULT_DECODE_ERRORS, iter_delimited_rows
+from file_discovery import find_report_file
 from my_types import RowDataDict
+from normalization import sanitize_names, clean_value, normalize_key
+# The other normalizers live in normalization too, they are imported from here all over the code base
+from normalization import sanitize_cell_value, lower_clean_cell_value, normalize_sku  # noqa: F401
+from report_table import ReportTable, TableRow
+from xlsx_reader import UnsupportedWorkbook, XlsxSheetReader
 
+MARKETPLACE_COLUMN = 'MARKETPLACE_ID'
 
-def sanitize_cell_value(value: typing.Optional[str]) -> str:
+ValueCleaner: typing.TypeAlias = typing.Callable[[typing.Any], typing.Any]
+
+if typing.TYPE_CHECKING:
+    from report_cache import ReportCache
+
+
+def is_sku_column(header: str) -> bool:
     """
-    Sanitizes a cell value by removing all spaces and newlines
-    :param value: The value to sanitize
-    :return: The sanitized value
+    Checks if a column holds skus
+    :param header: The header of the column
+    :return: True if the header contains sku
     """
-    return clean_value(sanitize_names(value))
+    return 'sku' in header.lower()
 
 
-def lower_clean_cell_value(value: typing.Optional[str]) -> str:
+class ColumnProjection:
     """
-    Sanitizes a cell value by removing all spaces and newlines and lower casing the value
+    The columns of a report that are kept when it is read, and which of them are read as numbers.
 
-    :param value: The value to sanitize
-    :return:  The sanitized value
+    SKU and marketplace columns are always kept because the reports are joined on them. The values of number columns
+    are converted with parse_number as they are read, so they are floats from then on.
     """
-    return sanitize_cell_value(value).lower()
 
+    def __init__(self, columns: typing.Iterable[str], numeric: typing.Iterable[str] = ()):
+        self.columns: typing.FrozenSet[str] = frozenset(columns)
+        self.numeric: typing.FrozenSet[str] = frozenset(numeric)
+
+    def __call__(self, header: str) -> bool:
+        return (header in self.columns or is_sku_column(header)
+                or normalize_key(header) == normalize_key(MARKETPLACE_COLUMN))
+
+    def __eq__(self, other: typing.Any) -> bool:
+        return isinstance(other, ColumnProjection) and other.columns == self.columns and other.numeric == self.numeric
+
+    def __hash__(self) -> int:
+        return hash((self.columns, self.numeric))
+
+    def __repr__(self) -> str:
+        if self.numeric:
+            return f'ColumnProjection({sorted(self.columns)!r}, numeric={sorted(self.numeric)!r})'
+        return f'ColumnProjection({sorted(self.columns)!r})'
+
+    @property
+    def key(self) -> str:
+        """A stable key for the projection, used to cache projected reports separately"""
+        key = '\x1f'.join(sorted(self.columns))
+        if self.numeric:
+            key += '\x1e' + '\x1f'.join(sorted(self.numeric))
+        return key
+
+    def indexes(self, header: typing.Sequence[str]) -> typing.List[int]:
+        """
+        Finds the positions of the kept columns
+        :param header: The sanitized header of the report
+        :return: The positions of the kept columns
+        """
+        return [position for position, name in enumerate(header) if self(name)]
+
+    def cleaners(self, header: typing.Sequence[str], indexes: typing.Sequence[int]) -> typing.List[ValueCleaner]:
+        """
+        Finds how the value of every kept column is cleaned
+        :param header: The sanitized header of the report
+        :param indexes: The positions of the kept columns
+        :return: clean_number for number columns and clean_value for the others, in the order of indexes
+        """
+        return [clean_number if header[position] in self.numeric else clean_value for position in indexes]
 
-def clean_value(value: typing.Optional[str]) -> str:
+
+def value_cleaners(columns: typing.Optional[ColumnProjection], header: typing.Sequence[str],
+                   indexes: typing.Sequence[int]) -> typing.List[ValueCleaner]:
     """
-    Remove all spaces and newlines from the value.
-    :param value: The value to clean
-    :return: The cleaned value
+    Finds how the value of every kept column is cleaned
+    :param columns: The projection the report is read with, every value is cleaned with clean_value without one
+    :param header: The sanitized header of the report
+    :param indexes: The positions of the kept columns
+    :return: The cleaner of every kept column in the order of indexes
     """
-    if value is None:
-        return ''
-    return value.strip().replace("\n", "") if isinstance(value, str) else value
+    if columns is None:
+        return [clean_value] * len(indexes)
+    return columns.cleaners(header, indexes)
 
 
-def sanitize_names(name: typing.Any) -> str:
+def project_row(header: typing.Sequence[str], indexes: typing.Sequence[int], values: typing.Sequence,
+                cleaners: typing.Optional[typing.Sequence[ValueCleaner]] = None) -> dict:
     """
-    Sanitizes a name by removing all spaces around and special characters.
-    :param name: The name to sanitize will be cast to a string
-    :return:  The sanitized name
+    Builds a row dictionary from only the kept columns
+    :param header: The sanitized header of the report
+    :param indexes: The positions of the kept columns
+    :param values: The raw values of the row
+    :param cleaners: The cleaner of every kept column, clean_value for every column when not given
+    :return: A dictionary of the kept columns, columns past the end of the row are left out like zip does
     """
-    name = name or ''
-    sanitized_name = str(name)
-
-    if not sanitized_name:
-        return ''
-    if sanitized_name[0] == '\xa0':
-        sanitized_name = sanitized_name.lstrip("\xa0")
-    if sanitized_name[-1] == '\xa0':
-        sanitized_name = sanitized_name.rstrip('\xa0')
-    if "\xa0" in sanitized_name:
-        sanitized_name = sanitized_name.replace("\xa0", " ")
-    if sanitized_name[0] == " ":
-        sanitized_name = sanitized_name.lstrip(" ")
-    return sanitized_name
+    if cleaners is None:
+        cleaners = [clean_value] * len(indexes)
+    return {header[position]: clean(values[position])
+            for position, clean in zip(indexes, cleaners) if position < len(values)}
 
 
-def transform_csv_to_xslx(file_path: str) -> Workbook:
+def transform_csv_to_xslx(file_path: str, *, errors: str = DEFAULT_DECODE_ERRORS) -> Workbook:
     """
     Takes a file and creates an openpyxl Workbook object from it
 
     Accepts csv, tsv, and txt files
 
     :param file_path: The path to the file
+    :param errors: 'skip' drops the lines that do not decode, any codecs error handler decodes them with it instead
     :return: A Workbook object
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f, delimiter='\t')
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        # Have to use a while loop because the file has a lot of UnicodeDecodeErrors,
-        # and we cannot capture errors during a for loop
-        while True:
-            try:
-                try:
-                    row = next(reader)
-                except UnicodeDecodeError:
-                    continue
-                ws.append(row)
-            except StopIteration:
-                break
-        return wb
-
-
-def read_xslx_file(xlsx_file: str | Workbook, **kwargs) -> typing.List[dict]:
+    bad_lines = BadLines()
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for row in iter_delimited_rows(file_path, '\t', errors=errors, bad_lines=bad_lines):
+        ws.append(row)
+    if bad_lines:
+        print(bad_lines.summary(file_path, errors))
+    return wb
+
+
+def iter_delimited_values(file_path: str, delimiter: str = '\t', *,
+                          columns: typing.Optional[ColumnProjection] = None,
+                          errors: str = DEFAULT_DECODE_ERRORS) -> typing.Iterator[typing.List[str]]:
+    """
+    Streams a delimited file straight from csv.reader, yielding the sanitized header and then the cleaned values of
+    every row, padded to the length of the header
+
+    The file is read through iter_decoded_lines, so a line that is not valid utf-8 is handled by the error policy
+    without losing the lines around it, and the bad lines are summed up once the file is read.
+    :param file_path: The path to the file
+    :param delimiter: The delimiter used in the file
+    :param columns: Only keep these columns, the others are never cleaned or stored
+    :param errors: 'skip' drops the lines that do not decode, any codecs error handler decodes them with it instead
+    :return: A generator of the header followed by the values of every row
+    """
+    bad_lines = BadLines()
+    rows = iter_delimited_rows(file_path, delimiter, errors=errors, bad_lines=bad_lines)
+    header = next(rows, None)
+    if header is not None:
+        header = [sanitize_names(value) for value in header]
+        width = len(header)
+        if columns is None:
+            yield header
+            for row in rows:
+                if len(row) < width:
+                    # Short rows are padded the same way a Workbook pads them with empty cells
+                    row += [''] * (width - len(row))
+                yield [clean_value(value) for value in row]
+        else:
+            indexes = columns.indexes(header)
+            cleaners = list(zip(indexes, columns.cleaners(header, indexes)))
+            yield [header[position] for position in indexes]
+            for row in rows:
+                if len(row) < width:
+                    row += [''] * (width - len(row))
+                yield [clean(row[position]) for position, clean in cleaners]
+    if bad_lines:
+        print(bad_lines.summary(file_path, errors))
+
+
+def read_delimited_file(file_path: str, delimiter: str = '\t', *, columns: typing.Optional[ColumnProjection] = None,
+                        errors: str = DEFAULT_DECODE_ERRORS) -> typing.Iterator[dict]:
+    """
+    Streams a delimited file straight from csv.reader, yielding one sanitized dictionary per row
+
+    Accepts csv, tsv, and txt files. Headers are sanitized with sanitize_names and values are cleaned with
+    clean_value, the same as read_xslx_file does for Workbook rows.
+
+    :param file_path: The path to the file
+    :param delimiter: The delimiter used in the file
+    :param columns: Only keep these columns, the others are never cleaned or stored
+    :param errors: 'skip' drops the lines that do not decode, any codecs error handler decodes them with it instead
+    :return: A generator of dictionaries representing the rows in the file
+    """
+    records = iter_delimited_values(file_path, delimiter, columns=columns, errors=errors)
+    header = next(records, None)
+    if header is None:
+        return
+    for values in records:
+        yield dict(zip(header, values))
+
+
+def read_delimited_table(file_path: str, delimiter: str = '\t', *, columns: typing.Optional[ColumnProjection] = None,
+                         errors: str = DEFAULT_DECODE_ERRORS) -> ReportTable:
+    """
+    Reads a delimited file into a compact ReportTable
+    :param file_path: The path to the file
+    :param delimiter: The delimiter used in the file
+    :param columns: Only keep these columns, the others are never cleaned or stored
+    :param errors: 'skip' drops the lines that do not decode, any codecs error handler decodes them with it instead
+    :return: A ReportTable of the rows in the file
+    """
+    records = iter_delimited_values(file_path, delimiter, columns=columns, errors=errors)
+    return ReportTable(next(records, ()), records)
+
+
+def read_xslx_file(xlsx_file: str | Workbook, *, columns: typing.Optional[ColumnProjection] = None,
+                   table: bool = False, fast: bool = True, **kwargs) -> typing.List[dict] | ReportTable:
     """
     Takes a xlsx file and returns a Workbook object
     :param xlsx_file: The path to the file or a Workbook object
+    :param columns: Only keep these columns, the others are never cleaned or stored
+    :param table: Return a compact ReportTable instead of a list of dictionaries
+    :param fast: Parse the sheet XML of a file read read-only straight into values instead of going through openpyxl
     :param kwargs:  Any additional arguments to pass to the load_workbook function
     :return:  A list of dictionaries representing the rows in the file
     """
+    rows = _xlsx_value_rows(xlsx_file, fast=fast, **kwargs)
+    header = [sanitize_names(value) for value in next(rows, ())]
+    try:
+        if table:
+            indexes = range(len(header)) if columns is None else columns.indexes(header)
+            cleaners = value_cleaners(columns, header, indexes)
+            result = ReportTable(
+                [header[position] for position in indexes],
+                # Short rows are padded with empty values so every row has a value for every column
+                ([clean(row[position]) if position < len(row) else '' for position, clean in zip(indexes, cleaners)]
+                 for row in rows)
+            )
+        elif columns is None:
+            result = [
+                dict(zip(header, [clean_value(value) for value in row]))
+                for row in rows
+            ]
+        else:
+            indexes = columns.indexes(header)
+            cleaners = columns.cleaners(header, indexes)
+            result = [
+                project_row(header, indexes, row, cleaners)
+                for row in rows
+            ]
+        print("✅")
+        return result
+    except Exception as error:
+        print("❌")
+        traceback.print_tb(error.__traceback__)
+
+
+def _xlsx_value_rows(xlsx_file: str | Workbook, *, fast: bool = True, **kwargs) -> typing.Iterator[typing.Sequence]:
+    """
+    Iterates the value tuples of the active sheet of a workbook, the header first
+    :param xlsx_file: The path to the file or a Workbook object
+    :param fast: Parse the sheet XML of a file read read-only straight into values instead of going through openpyxl
+    :param kwargs: Any additional arguments to pass to the load_workbook function
+    :return: An iterator of the values of every row
+    """
+    if isinstance(xlsx_file, str) and fast and _reads_values_only(kwargs):
+        try:
+            return iter(XlsxSheetReader(xlsx_file))
+        except UnsupportedWorkbook:
+            pass
     if isinstance(xlsx_file, str):
         wb = openpyxl.load_workbook(xlsx_file, **kwargs)
     else:
@@ -103,50 +272,114 @@ def read_xslx_file(xlsx_file: str | Workbook, **kwargs) -> typing.List[dict]:
     ws = wb.active
     if ws is None:
         ws = wb.create_sheet(title='Worksheet1', index=0) if len(wb.worksheets) == 0 else wb.worksheets[0]
-    rows = list(ws.rows)
-    header = [sanitize_names(cell.value) for cell in rows[0]]
-    try:
-        result = [
-            dict(zip(header, [clean_value(cell.value) for cell in row]))
-            for row in rows[1:]
-        ]
-        print("✅")
-        return result
-    except Exception as error:
-        print("❌")
-        traceback.print_tb(error.__traceback__)
+    return iter(ws.values)
+
+
+def _reads_values_only(load_workbook_kwargs: dict) -> bool:
+    """
+    Checks if load_workbook would read the file the way XlsxSheetReader does
+    :param load_workbook_kwargs: The arguments read_xslx_file was going to pass to load_workbook
+    :return: True for read-only loads that keep formulas
+    """
+    return (load_workbook_kwargs.get('read_only', False) and not load_workbook_kwargs.get('data_only', False)
+            and set(load_workbook_kwargs) <= {'read_only', 'data_only', 'keep_vba', 'keep_links'})
 
 
 def find_file(file_name: str) -> typing.Optional[str]:
     """
-    Finds the closest matching file in the current directory
+    Finds a report in ./files, the newest file matching the report's patterns in file_discovery.FILE_PATTERNS or else
+    the closest matching file name
     :param file_name: The name of the file to find
     :return: The path to the file
     """
-    for root, dirs, files in os.walk("./files"):
-        if closest_match := difflib.get_close_matches(file_name, files, n=1):
-            closest_match: typing.List[str]
-            return os.path.join(root, closest_match[0])
-    return None
+    return find_report_file(file_name)
 
 
-def read_report(file_name: str, **kwargs) -> typing.List[dict]:
+def read_report_file(file_path: str, *, columns: typing.Optional[ColumnProjection] = None, table: bool = False,
+                     errors: str = DEFAULT_DECODE_ERRORS, **kwargs) -> typing.List[dict] | ReportTable:
+    """
+    Reads a report file by its path and returns a list of dictionaries
+    :param file_path: The path to the file
+    :param columns: Only keep these columns
+    :param table: Return a compact ReportTable instead of a list of dictionaries
+    :param errors: How the lines of a delimited file that do not decode are read, see iter_delimited_values
+    :param kwargs: Any additional arguments to pass to the read_xslx_file function
+    :return: A list of dictionaries representing the rows in the file
+    """
+    if file_path.endswith((".xlsx", ".xls")):
+        return read_xslx_file(file_path, columns=columns, table=table, **kwargs)
+    elif file_path.endswith((".csv", ".txt", '.tsv')):
+        if table:
+            result = read_delimited_table(file_path, columns=columns, errors=errors)
+        else:
+            result = list(read_delimited_file(file_path, columns=columns, errors=errors))
+        print("✅")
+        return result
+
+
+def iter_report_rows(file_path: str, *, columns: typing.Optional[ColumnProjection] = None,
+                     errors: str = DEFAULT_DECODE_ERRORS, **kwargs) -> typing.Iterator[TableRow]:
+    """
+    Streams the rows of a report file one at a time, cleaned the same way read_report_file cleans them into a table
+
+    The rows share one header like the rows of a ReportTable but are not kept, so only the rows the caller holds on to
+    take memory.
+    :param file_path: The path to the file
+    :param columns: Only keep these columns
+    :param errors: How the lines of a delimited file that do not decode are read, see iter_delimited_values
+    :param kwargs: Any additional arguments to pass to the load_workbook function
+    :return: A generator of rows
+    """
+    if file_path.endswith((".xlsx", ".xls")):
+        values = _xlsx_value_rows(file_path, **kwargs)
+        header = [sanitize_names(value) for value in next(values, ())]
+        indexes = range(len(header)) if columns is None else columns.indexes(header)
+        cleaners = value_cleaners(columns, header, indexes)
+        table = ReportTable([header[position] for position in indexes])
+        records = ([clean(row[position]) if position < len(row) else '' for position, clean in zip(indexes, cleaners)]
+                   for row in values)
+    elif file_path.endswith((".csv", ".txt", '.tsv')):
+        records = iter_delimited_values(file_path, columns=columns, errors=errors)
+        table = ReportTable(next(records, ()))
+    else:
+        return
+    for record in records:
+        yield TableRow(table, tuple(record))
+
+
+def read_report(file_name: str, *, file_path: typing.Optional[str] = None,
+                cache: typing.Optional['ReportCache'] = None, columns: typing.Optional[ColumnProjection] = None,
+                table: bool = False, errors: str = DEFAULT_DECODE_ERRORS, **kwargs) -> typing.List[dict] | ReportTable:
     """
     Reads a report file and returns a list of dictionaries
     :param file_name: The name of the file to read
+    :param file_path: The path of the file, found by its name in ./files when not given
+    :param cache: A cache of parsed reports, unchanged files are loaded from it instead of being parsed
+    :param columns: Only keep these columns, the others are never cleaned or stored
+    :param table: Return a compact ReportTable instead of a list of dictionaries
+    :param errors: How the lines of a delimited file that do not decode are read, see iter_delimited_values
     :param kwargs: Any additional arguments to pass to the read_xslx_file function
     :return: A list of dictionaries representing the rows in the file
     """
-    file_path = find_file(file_name)
+    file_path = file_path or find_file(file_name)
     print(f"Reading {file_path}", end=' ')
     if not file_path:
         raise FileNotFoundError(f"Could not find file {file_name}")
 
-    if file_path.endswith((".xlsx", ".xls")):
-        return read_xslx_file(file_path, **kwargs)
-    elif file_path.endswith((".csv", ".txt", '.tsv')):
-        wb = transform_csv_to_xslx(file_path)
-        return read_xslx_file(wb, **kwargs)
+    variant = columns.key if columns is not None else ''
+    if errors != DEFAULT_DECODE_ERRORS:
+        # Rows read with another error policy are cached apart
+        variant += f'\x1derrors={errors}'
+    if cache is not None:
+        rows = cache.load(file_path, variant)
+        if rows is not None:
+            print("✅ (cached)")
+            # The cache holds tables, a caller that asked for dictionaries gets them on every run
+            return rows if table else [dict(row) for row in rows]
+    rows = read_report_file(file_path, columns=columns, table=table, errors=errors, **kwargs)
+    if cache is not None and rows is not None:
+        cache.store(file_path, rows, variant)
+    return rows
 
 
 def generate_mapped_cell_dict() -> dict:
@@ -154,8 +387,8 @@ def generate_mapped_cell_dict() -> dict:
     Generates a template dictionary from OUTPUT_MAPPED_CELLS column_name
     :return: A dictionary with the column names as keys and empty strings as values
     """
-    from cell_mapping import OUTPUT_MAPPED_CELLS
-    return {cell['column_name']: '' for cell in OUTPUT_MAPPED_CELLS}
+    from mapping_plan import get_mapping_plan
+    return get_mapping_plan().new_row()
 
 
 def generate_row_data_dict() -> RowDataDict:
@@ -179,5 +412,3 @@ def pick_marketplace():
             print("Please enter a valid marketplace ID")
             continue
         return int(marketplace)
-
-
@@ -0,0 +1,65 @@
+import csv
+import typing
+from datetime import datetime
+
+REJECTS_HEADER = ('SKU', 'Column', 'Value', 'Reason')
+
+
+class Reject(typing.NamedTuple):
+    """An invalid cell of an output row that was dropped"""
+    sku: typing.Any
+    column: str
+    value: typing.Any
+    reason: str
+
+
+class ValidationReport:
+    """
+    Collects the invalid cells of the rows dropped by validation, so they are reported once at the end of a run
+    instead of printed one line per cell.
+    """
+
+    def __init__(self, rejects: typing.Iterable[Reject] = (), rejected_rows: int = 0):
+        self.rejects: typing.List[Reject] = list(rejects)
+        self.rejected_rows = rejected_rows
+
+    def __len__(self) -> int:
+        return len(self.rejects)
+
+    def add(self, sku: typing.Any, column: str, value: typing.Any, reason: str) -> typing.NoReturn:
+        """
+        Records an invalid cell
+        :param sku: The SKU of the row
+        :param column: The output column of the cell
+        :param value: The value of the cell
+        :param reason: Why the value is invalid
+        :return: None
+        """
+        self.rejects.append(Reject(sku, column, value, reason))
+
+    def extend(self, other: 'ValidationReport') -> typing.NoReturn:
+        """
+        Adds the rejects of another report, like one collected by a worker process
+        :param other: The report to add
+        :return: None
+        """
+        self.rejects.extend(other.rejects)
+        self.rejected_rows += other.rejected_rows
+
+    def write(self, file_path: typing.Optional[str] = None) -> typing.Optional[str]:
+        """
+        Writes the rejects to a CSV file and prints a summary, nothing is written when there are no rejects
+        :param file_path: The path of the CSV file, defaults to a timestamped file in the working directory
+        :return: The path of the written file or None
+        """
+        if not self.rejects:
+            return None
+        if file_path is None:
+            file_path = f'rejects_{datetime.now().strftime("%Y-%m-%d_%H-%M")}.csv'
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(REJECTS_HEADER)
+            writer.writerows(self.rejects)
+        print(f'Skipped {self.rejected_rows} invalid rows with {len(self.rejects)} invalid cells, '
+              f'saved them as {file_path}')
+        return file_path
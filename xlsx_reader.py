@@ -0,0 +1,310 @@
+import posixpath
+import typing
+import warnings
+import zipfile
+from xml.etree.ElementTree import fromstring, iterparse
+
+from openpyxl.formula.translate import Translator
+from openpyxl.styles.stylesheet import Stylesheet
+from openpyxl.utils import column_index_from_string, range_boundaries
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, WINDOWS_EPOCH, from_excel, from_ISO8601
+from openpyxl.xml.constants import (
+    ARC_CONTENT_TYPES,
+    ARC_STYLE,
+    ARC_WORKBOOK,
+    CONTYPES_NS,
+    PKG_REL_NS,
+    REL_NS,
+    SHARED_STRINGS,
+    SHEET_MAIN_NS,
+    XLSM,
+    XLSX,
+    XLTM,
+    XLTX,
+)
+
+WORKBOOK_CONTENT_TYPES = (XLTM, XLTX, XLSM, XLSX)
+
+OVERRIDE_TAG = '{%s}Override' % CONTYPES_NS
+DEFAULT_TAG = '{%s}Default' % CONTYPES_NS
+RELATIONSHIP_TAG = '{%s}Relationship' % PKG_REL_NS
+WORKBOOK_PR_TAG = '{%s}workbookPr' % SHEET_MAIN_NS
+WORKBOOK_VIEW_TAG = '{%s}bookViews/{%s}workbookView' % (SHEET_MAIN_NS, SHEET_MAIN_NS)
+SHEET_TAG = '{%s}sheets/{%s}sheet' % (SHEET_MAIN_NS, SHEET_MAIN_NS)
+SHEET_ID_ATTRIBUTE = '{%s}id' % REL_NS
+STRING_ITEM_TAG = '{%s}si' % SHEET_MAIN_NS
+TEXT_TAG = '{%s}t' % SHEET_MAIN_NS
+RICH_TEXT_RUN_TAG = '{%s}r' % SHEET_MAIN_NS
+DIMENSION_TAG = '{%s}dimension' % SHEET_MAIN_NS
+DATA_TAG = '{%s}sheetData' % SHEET_MAIN_NS
+ROW_TAG = '{%s}row' % SHEET_MAIN_NS
+VALUE_TAG = '{%s}v' % SHEET_MAIN_NS
+FORMULA_TAG = '{%s}f' % SHEET_MAIN_NS
+INLINE_STRING_TAG = '{%s}is' % SHEET_MAIN_NS
+_DIGITS = '0123456789'
+
+
+class UnsupportedWorkbook(Exception):
+    """The workbook is laid out in a way only openpyxl reads"""
+
+
+def _text_content(node) -> str:
+    """
+    The text of a shared or inline string without its formatting, like openpyxl's Text.content
+    :param node: The si or is element
+    :return: The plain text followed by the text of every rich text run
+    """
+    if len(node) == 1 and node[0].tag == TEXT_TAG:
+        return node[0].text or ''
+    snippets = []
+    plain = node.find(TEXT_TAG)
+    if plain is not None and plain.text is not None:
+        snippets.append(plain.text)
+    for run in node.iterfind(RICH_TEXT_RUN_TAG):
+        text = run.findtext(TEXT_TAG)
+        if text:
+            snippets.append(text)
+    return ''.join(snippets)
+
+
+def _cast_number(value: str) -> typing.Union[int, float]:
+    if '.' in value or 'E' in value or 'e' in value:
+        return float(value)
+    return int(value)
+
+
+def _row_number(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        number = float(value)
+        if not number.is_integer():
+            raise ValueError(f'{value} is not a valid row number')
+        return int(number)
+
+
+def _read_relationships(archive: zipfile.ZipFile, part_path: str) -> typing.Dict[str, typing.Tuple[str, str]]:
+    """
+    Reads the relationships of a part with their targets resolved to paths in the archive
+    :param archive: The xlsx archive
+    :param part_path: The path of the part
+    :return: Relationship id -> (type, target path)
+    """
+    folder, name = posixpath.split(part_path)
+    try:
+        source = archive.read(posixpath.join(folder, '_rels', f'{name}.rels'))
+    except KeyError:
+        return {}
+    relationships = {}
+    for relationship in fromstring(source).iter(RELATIONSHIP_TAG):
+        target = relationship.get('Target', '')
+        if relationship.get('TargetMode') != 'External':
+            target = target[1:] if target.startswith('/') else posixpath.normpath(posixpath.join(folder, target))
+        relationships[relationship.get('Id')] = (relationship.get('Type', ''), target)
+    return relationships
+
+
+class XlsxSheetReader:
+    """
+    Reads the values of the active sheet of an xlsx file straight from its XML with zipfile and iterparse.
+
+    The rows are the ones the read-only openpyxl worksheet of the file yields from ws.values, with the same padding,
+    number, date, string and formula values, but no openpyxl Cell is ever created. The workbook, its styles and its
+    shared strings are read when the reader is created, the sheet is parsed one row at a time while it is iterated.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        # Column letters of cell coordinates -> column index
+        self._column_indexes: typing.Dict[str, int] = {}
+        with zipfile.ZipFile(file_path) as archive:
+            names = set(archive.namelist())
+            content_types = fromstring(archive.read(ARC_CONTENT_TYPES))
+            parts = {override.get('ContentType'): override.get('PartName', '')[1:]
+                     for override in reversed(list(content_types.iter(OVERRIDE_TAG)))}
+            workbook_path = next((parts[content_type] for content_type in WORKBOOK_CONTENT_TYPES
+                                  if content_type in parts), None)
+            if workbook_path is None:
+                defaults = {default.get('ContentType') for default in content_types.iter(DEFAULT_TAG)}
+                if not defaults & set(WORKBOOK_CONTENT_TYPES):
+                    raise UnsupportedWorkbook('File contains no valid workbook part')
+                workbook_path = ARC_WORKBOOK
+            self.epoch, self.sheet_path = self._read_workbook(archive, workbook_path, names)
+            self.date_formats = self._read_date_formats(archive)
+            strings_path = parts.get(SHARED_STRINGS)
+            self.shared_strings = self._read_shared_strings(archive, strings_path) if strings_path else []
+
+    @staticmethod
+    def _read_workbook(archive: zipfile.ZipFile, workbook_path: str, names: typing.Set[str]):
+        workbook = fromstring(archive.read(workbook_path))
+        properties = workbook.find(WORKBOOK_PR_TAG)
+        date1904 = properties is not None and properties.get('date1904', '').lower() in ('1', 'true')
+        active = next((int(view.get('activeTab')) for view in workbook.iterfind(WORKBOOK_VIEW_TAG)
+                       if view.get('activeTab') is not None), 0)
+        relationships = _read_relationships(archive, workbook_path)
+        # The sheets openpyxl keeps, the active tab is an index into them
+        sheets = []
+        for sheet in workbook.iterfind(SHEET_TAG):
+            sheet_id = sheet.get(SHEET_ID_ATTRIBUTE)
+            if not sheet_id:
+                continue
+            if sheet_id not in relationships:
+                raise UnsupportedWorkbook(f'Sheet {sheet.get("name")} has no relationship')
+            if relationships[sheet_id][1] in names:
+                sheets.append(relationships[sheet_id])
+        if not 0 <= active < len(sheets) or not sheets[active][0].endswith('/worksheet'):
+            raise UnsupportedWorkbook('The active sheet is not a worksheet')
+        return (CALENDAR_MAC_1904 if date1904 else WINDOWS_EPOCH), sheets[active][1]
+
+    @staticmethod
+    def _read_date_formats(archive: zipfile.ZipFile) -> typing.Set[int]:
+        try:
+            source = archive.read(ARC_STYLE)
+        except KeyError:
+            return set()
+        stylesheet = Stylesheet.from_tree(fromstring(source))
+        return stylesheet.date_formats if stylesheet.cell_styles else set()
+
+    @staticmethod
+    def _read_shared_strings(archive: zipfile.ZipFile, strings_path: str) -> typing.List[str]:
+        strings = []
+        with archive.open(strings_path) as source:
+            for _, node in iterparse(source):
+                if node.tag == STRING_ITEM_TAG:
+                    strings.append(_text_content(node).replace('x005F_', ''))
+                    node.clear()
+        return strings
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple]:
+        return self.rows()
+
+    def rows(self) -> typing.Iterator[typing.Tuple]:
+        """
+        Parses the sheet one row at a time
+        :return: An iterator of value tuples, missing cells and rows are None and empty tuples like in openpyxl
+        """
+        with zipfile.ZipFile(self.file_path) as archive, archive.open(self.sheet_path) as source:
+            yield from self._parse_rows(source)
+
+    def _parse_rows(self, source: typing.IO[bytes]) -> typing.Iterator[typing.Tuple]:
+        max_col = max_row = None
+        empty_row: typing.Tuple = ()
+        in_data = False
+        shared_formulae: typing.Dict[str, Translator] = {}
+        row_counter = 0
+        counter = idx = 1
+        # Only end events, every row is complete when it is seen and is cleared right after, like openpyxl does
+        for _, element in iterparse(source):
+            tag = element.tag
+            if tag == ROW_TAG:
+                in_data = True
+                row_number = element.get('r')
+                row_counter = _row_number(row_number) if row_number is not None else row_counter + 1
+                idx = row_counter
+                if max_row is not None and idx > max_row:
+                    break
+                # some rows are missing
+                while counter < idx:
+                    counter += 1
+                    yield empty_row
+                if counter <= idx:
+                    yield self._row_values(element, max_col, shared_formulae)
+                    counter += 1
+                element.clear()
+            elif tag == DATA_TAG:
+                in_data = True
+            elif tag == DIMENSION_TAG and not in_data:
+                _, _, max_col, max_row = range_boundaries(element.get('ref'))
+                if max_col is not None:
+                    empty_row = (None,) * max_col
+        if max_row is not None and max_row < idx:
+            for _ in range(counter, max_row + 1):
+                yield empty_row
+
+    def _row_values(self, row, max_col: typing.Optional[int],
+                    shared_formulae: typing.Dict[str, Translator]) -> typing.Tuple:
+        shared_strings = self.shared_strings
+        date_formats = self.date_formats
+        column_indexes = self._column_indexes
+        cells = []
+        col_counter = 0
+        for element in row:
+            get = element.get
+            coordinate = get('r')
+            if coordinate:
+                letters = coordinate.rstrip(_DIGITS)
+                col_counter = column_indexes.get(letters) or self._column_index(letters)
+            else:
+                col_counter += 1
+            data_type = get('t', 'n')
+            if len(element) == 1 and element[0].tag == VALUE_TAG and data_type != 'inlineStr':
+                # The usual cell, a value and no formula
+                value = element[0].text or None
+            elif (formula := element.find(FORMULA_TAG)) is not None:
+                cells.append((col_counter, self._formula(formula, coordinate, shared_formulae)))
+                continue
+            elif data_type == 'inlineStr':
+                child = element.find(INLINE_STRING_TAG)
+                cells.append((col_counter, _text_content(child) if child is not None else None))
+                continue
+            else:
+                value = element.findtext(VALUE_TAG) or None
+            if value is None:
+                pass
+            elif data_type == 's':
+                value = shared_strings[int(value)]
+            elif data_type == 'n':
+                value = _cast_number(value)
+                style_id = get('s', 0)
+                if style_id:
+                    style_id = int(style_id)
+                if style_id in date_formats:
+                    value = self._date(value, coordinate)
+            elif data_type == 'b':
+                value = bool(int(value))
+            elif data_type == 'd':
+                value = from_ISO8601(value)
+            cells.append((col_counter, value))
+        if not cells and not max_col:
+            return ()
+        width = max_col or cells[-1][0]
+        values = [None] * width
+        for column, value in cells:
+            if 1 <= column <= width:
+                values[column - 1] = value
+        return tuple(values)
+
+    def _column_index(self, letters: str) -> int:
+        index = self._column_indexes[letters] = column_index_from_string(letters.strip('$'))
+        return index
+
+    def _date(self, value: typing.Union[int, float], coordinate: str):
+        # Like the read-only worksheet, durations are read as dates too
+        try:
+            return from_excel(value, self.epoch)
+        except (OverflowError, ValueError):
+            warnings.warn(f'Cell {coordinate} is marked as a date but the serial value {value} is outside the limits '
+                          f'for dates. The cell will be treated as an error.')
+            return '#VALUE!'
+
+    @staticmethod
+    def _formula(formula, coordinate: str, shared_formulae: typing.Dict[str, Translator]) -> str:
+        value = '='
+        if formula.text is not None:
+            value += formula.text
+        if formula.get('t') == 'shared':
+            shared_index = formula.get('si')
+            if shared_index in shared_formulae:
+                value = shared_formulae[shared_index].translate_formula(coordinate)
+            elif value != '=':
+                shared_formulae[shared_index] = Translator(value, coordinate)
+        return value
+
+
+def iter_xlsx_values(file_path: str) -> typing.Iterator[typing.Tuple]:
+    """
+    Streams the values of the active sheet of an xlsx file without creating openpyxl cells
+    :param file_path: The path to the file
+    :return: An iterator of the value tuples of every row, the header first
+    """
+    return XlsxSheetReader(file_path).rows()